@@ -0,0 +1,42 @@
+"""add composite index for paginated user uploads
+
+Revision ID: 005_add_user_uploads_index
+Revises: 004_add_fcm_token
+Create Date: 2025-11-12
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "005_add_user_uploads_index"
+down_revision = "004_add_fcm_token"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Add (user_id, timestamp DESC, id DESC) index for keyset pagination.
+    Built concurrently to avoid locking out writes.
+    """
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_points_user_id_timestamp_id",
+            "points",
+            ["user_id", sa.text("timestamp DESC"), sa.text("id DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    """Remove the user uploads pagination index."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_points_user_id_timestamp_id",
+            table_name="points",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,41 @@
+"""add partial spatial index for visible points
+
+Revision ID: 006_add_visible_points_index
+Revises: 005_add_user_uploads_index
+Create Date: 2025-11-12
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "006_add_visible_points_index"
+down_revision = "005_add_user_uploads_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Replace the full GIST index on location with a partial one.
+
+    Every spatial read path (map points, clusters, vector tiles) filters on
+    is_trash = false, so the partial index serves all of them while skipping
+    trash-flagged rows. Built concurrently to avoid locking out writes.
+    """
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_points_location_visible "
+            "ON points USING GIST (location) WHERE is_trash = false"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_points_location")
+
+
+def downgrade():
+    """Restore the full GIST index on location."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_points_location "
+            "ON points USING GIST (location)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_points_location_visible")
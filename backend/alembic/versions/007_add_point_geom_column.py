@@ -0,0 +1,48 @@
+"""add generated geometry column for point reads
+
+Revision ID: 007_add_point_geom_column
+Revises: 006_add_visible_points_index
+Create Date: 2025-11-13
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "007_add_point_geom_column"
+down_revision = "006_add_visible_points_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Add geom, a stored geometry(Point, 4326) copy of location.
+
+    Read queries use geom for ST_X/ST_Y and the && bbox operator instead of
+    casting the geography column on every row. The partial spatial index
+    moves from location to geom.
+    """
+    op.execute(
+        "ALTER TABLE points ADD COLUMN geom geometry(Point, 4326) "
+        "GENERATED ALWAYS AS (location::geometry) STORED"
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_points_geom_visible "
+            "ON points USING GIST (geom) WHERE is_trash = false"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_points_location_visible")
+
+
+def downgrade():
+    """Move the partial spatial index back to location and drop geom."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_points_location_visible "
+            "ON points USING GIST (location) WHERE is_trash = false"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_points_geom_visible")
+
+    op.drop_column("points", "geom")
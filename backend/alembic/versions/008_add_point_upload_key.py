@@ -0,0 +1,41 @@
+"""add upload key for idempotent upload processing
+
+Revision ID: 008_add_point_upload_key
+Revises: 007_add_point_geom_column
+Create Date: 2025-11-14
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "008_add_point_upload_key"
+down_revision = "007_add_point_geom_column"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Add upload_key, the GCS object name and generation a point was made from.
+
+    Pub/Sub delivers upload notifications at least once; the unique index
+    lets the worker insert with ON CONFLICT DO NOTHING so a redelivered
+    notification can't create a second point. Existing rows stay NULL.
+    """
+    op.add_column("points", sa.Column("upload_key", sa.String(512), nullable=True))
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS points_upload_key_key "
+            "ON points (upload_key)"
+        )
+
+
+def downgrade():
+    """Drop upload_key and its unique index."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS points_upload_key_key")
+
+    op.drop_column("points", "upload_key")
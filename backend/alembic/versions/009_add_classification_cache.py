@@ -0,0 +1,38 @@
+"""add classification cache table
+
+Revision ID: 009_add_classification_cache
+Revises: 008_add_point_upload_key
+Create Date: 2025-11-14
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "009_add_classification_cache"
+down_revision = "008_add_point_upload_key"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create classification_cache, Gemini results keyed by image SHA-256."""
+    op.create_table(
+        "classification_cache",
+        sa.Column("image_hash", sa.String(64), primary_key=True),
+        sa.Column("is_valid", sa.Boolean(), nullable=False),
+        sa.Column("category", sa.Integer(), nullable=True),
+        sa.Column("weight", sa.Float(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade():
+    """Drop classification_cache."""
+    op.drop_table("classification_cache")
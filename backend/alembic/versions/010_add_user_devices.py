@@ -0,0 +1,58 @@
+"""add user devices for multi-device notifications
+
+Revision ID: 010_add_user_devices
+Revises: 009_add_classification_cache
+Create Date: 2025-11-15
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "010_add_user_devices"
+down_revision = "009_add_classification_cache"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Create user_devices, one row per FCM token, and copy the existing
+    users.fcm_token values into it.
+    """
+    op.create_table(
+        "user_devices",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("token", sa.Text(), nullable=False),
+        sa.Column("platform", sa.String(20), nullable=True),
+        sa.Column(
+            "last_seen",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("token"),
+    )
+    op.create_index("ix_user_devices_user_id", "user_devices", ["user_id"])
+
+    op.execute(
+        "INSERT INTO user_devices (user_id, token) "
+        "SELECT id, fcm_token FROM users WHERE fcm_token IS NOT NULL "
+        "ON CONFLICT (token) DO NOTHING"
+    )
+
+
+def downgrade():
+    """Drop user_devices."""
+    op.drop_index("ix_user_devices_user_id", table_name="user_devices")
+    op.drop_table("user_devices")
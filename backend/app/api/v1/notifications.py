@@ -3,14 +3,14 @@ Notifications API endpoints for FCM token management.
 """
 
 import logging
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.crud import update_user_fcm_token
+from app.db.crud import delete_user_devices, upsert_user_device
 from app.db.database import get_db
-from app.db.models import User
-from app.db.schemas import FCMTokenRequest, FCMTokenResponse
+from app.db.schemas import CurrentUser, FCMTokenRequest, FCMTokenResponse
 from app.services.auth import get_current_user
 
 router = APIRouter()
@@ -20,34 +20,29 @@ logger = logging.getLogger(__name__)
 @router.post("/register-token", response_model=FCMTokenResponse)
 async def register_fcm_token(
     request: FCMTokenRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Register or update FCM token for the authenticated user.
+    Register or refresh an FCM device token for the authenticated user.
+    Each device keeps its own token; notifications go to all of them.
 
     Args:
         request: FCM token registration request
-        current_user: Authenticated user object
+        current_user: Authenticated user snapshot
         db: Database session
 
     Returns:
         Success response
     """
     try:
-        # Update user's FCM token
-        updated_user = await update_user_fcm_token(
+        await upsert_user_device(
             db=db,
             user_id=current_user.id,
-            fcm_token=request.fcm_token,
+            token=request.fcm_token,
+            platform=request.platform,
         )
 
-        if not updated_user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found",
-            )
-
         logger.info(
             f"FCM token registered for user {current_user.id} ({current_user.email})"
         )
@@ -57,8 +52,6 @@ async def register_fcm_token(
             message="FCM token registered successfully",
         )
 
-    except HTTPException:
-        raise
     except Exception as e:
         logger.error(f"Failed to register FCM token: {e}")
         raise HTTPException(
@@ -69,35 +62,63 @@ async def register_fcm_token(
 
 @router.delete("/unregister-token", response_model=FCMTokenResponse)
 async def unregister_fcm_token(
-    current_user: User = Depends(get_current_user),
+    fcm_token: Optional[str] = Query(
+        None, min_length=1, description="Token of the device logging out"
+    ),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Remove FCM token for the authenticated user (on logout).
+    Remove the FCM token of one device of the authenticated user (on logout).
+    The user's other devices keep receiving notifications.
+
+    Older clients send no token; all of the user's devices are then removed,
+    as before devices were tracked separately.
 
     Args:
-        current_user: Authenticated user object
+        fcm_token: Token of the device to remove (None = all devices)
+        current_user: Authenticated user snapshot
         db: Database session
 
     Returns:
         Success response
     """
+    return await _unregister_devices(db, current_user, fcm_token)
+
+
+@router.delete("/unregister-all-tokens", response_model=FCMTokenResponse)
+async def unregister_all_fcm_tokens(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Remove the FCM tokens of all devices of the authenticated user
+    (e.g. "log out everywhere").
+
+    Args:
+        current_user: Authenticated user snapshot
+        db: Database session
+
+    Returns:
+        Success response
+    """
+    return await _unregister_devices(db, current_user, None)
+
+
+async def _unregister_devices(
+    db: AsyncSession, current_user: CurrentUser, fcm_token: Optional[str]
+) -> FCMTokenResponse:
+    """Delete one device (or all devices if fcm_token is None) of a user."""
     try:
-        # Remove user's FCM token (set to None)
-        updated_user = await update_user_fcm_token(
+        removed = await delete_user_devices(
             db=db,
             user_id=current_user.id,
-            fcm_token=None,
+            token=fcm_token,
         )
 
-        if not updated_user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found",
-            )
-
         logger.info(
-            f"FCM token unregistered for user {current_user.id} ({current_user.email})"
+            f"{removed} FCM token(s) unregistered for user {current_user.id} "
+            f"({current_user.email})"
         )
 
         return FCMTokenResponse(
@@ -105,8 +126,6 @@ async def unregister_fcm_token(
             message="FCM token unregistered successfully",
         )
 
-    except HTTPException:
-        raise
     except Exception as e:
         logger.error(f"Failed to unregister FCM token: {e}")
         raise HTTPException(
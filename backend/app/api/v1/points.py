@@ -1,34 +1,107 @@
-from typing import List
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+import orjson
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.crud import get_points_in_bounds, get_user_points
+from app.core.config import settings
+from app.db.crud import (
+    get_compact_point_rows_in_bounds,
+    get_point_clusters_in_bounds,
+    get_user_point_rows,
+    get_visible_point,
+    stream_point_rows_in_bounds,
+)
 from app.db.database import get_db
-from app.db.models import User
-from app.db.schemas import PointResponse
+from app.db.schemas import ClusterResponse, CurrentUser, PointResponse
+from app.db.serializers import (
+    compact_point_rows_to_binary,
+    point_rows_to_json,
+    point_rows_to_ndjson,
+)
 from app.services.auth import get_current_user
+from app.services.point_cache import get_points_json
 
 router = APIRouter()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+BINARY_MEDIA_TYPE = "application/octet-stream"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Point IDs are 32-bit integers
+MAX_POINT_ID = 2**31 - 1
+
+# Web map tiles are 256px wide and double in resolution with every zoom level
+TILE_SIZE_PX = 256
+
+
+def _cell_size_for_zoom(zoom: int) -> float:
+    """
+    Convert the configured on-screen cluster cell size to degrees.
+
+    Args:
+        zoom: Web map zoom level
+
+    Returns:
+        Grid cell edge length in degrees, dividing 360 evenly so cell edges
+        line up with the global grid
+    """
+    cells_around_world = TILE_SIZE_PX * 2**zoom / settings.cluster_cell_size_px
+    return 360.0 / max(1, round(cells_around_world))
+
+
+def _encode_cursor(row) -> str:
+    """Encode the (timestamp, id) keyset of a point row as an opaque cursor."""
+    payload = orjson.dumps([row.timestamp.isoformat(), row.id])
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by _encode_cursor."""
+    try:
+        timestamp, point_id = orjson.loads(base64.urlsafe_b64decode(cursor))
+        timestamp, point_id = datetime.fromisoformat(timestamp), int(point_id)
+        # Tampered values must not reach the database as a 500
+        if timestamp.tzinfo is None or not 0 < point_id <= MAX_POINT_ID:
+            raise ValueError("Cursor out of range")
+        return timestamp, point_id
+    except (ValueError, TypeError, OverflowError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 
 @router.get("", response_model=List[PointResponse])
 async def get_points(
+    request: Request,
     lat1: float = Query(..., ge=-90, le=90, description="Southwest latitude"),
     lng1: float = Query(..., ge=-180, le=180, description="Southwest longitude"),
     lat2: float = Query(..., ge=-90, le=90, description="Northeast latitude"),
     lng2: float = Query(..., ge=-180, le=180, description="Northeast longitude"),
+    stream: bool = Query(False, description="Stream points as NDJSON"),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Get all points within a bounding box (public endpoint).
-    Excludes trash-flagged images.
+    Excludes trash-flagged images. Served from the tile cache when possible.
+
+    With ?stream=1 or "Accept: application/x-ndjson" the points are streamed
+    as newline-delimited JSON, one batch of rows at a time, so memory use stays
+    flat for very large viewports.
+
+    With "Accept: application/octet-stream" the points are returned in the
+    compact binary format (lat, lng, id and category only, see
+    compact_point_rows_to_binary); details are then fetched per ID from
+    /points/{point_id}.
 
     Args:
         lat1: Southwest latitude
         lng1: Southwest longitude
         lat2: Northeast latitude
         lng2: Northeast longitude
+        stream: Stream points as NDJSON
 
     Returns:
         List of points within the bounding box
@@ -39,22 +112,127 @@ async def get_points(
     if lng2 <= lng1:
         raise HTTPException(status_code=400, detail="lng2 must be greater than lng1")
 
-    points = await get_points_in_bounds(db, lat1, lng1, lat2, lng2)
-    return points
+    accept = request.headers.get("accept", "")
+
+    if BINARY_MEDIA_TYPE in accept:
+        rows = await get_compact_point_rows_in_bounds(db, lat1, lng1, lat2, lng2)
+        return Response(
+            content=compact_point_rows_to_binary(rows), media_type=BINARY_MEDIA_TYPE
+        )
+
+    if stream or NDJSON_MEDIA_TYPE in accept:
+        batches = stream_point_rows_in_bounds(
+            db, lat1, lng1, lat2, lng2, settings.point_stream_batch_size
+        )
+        return StreamingResponse(
+            (point_rows_to_ndjson(rows) async for rows in batches),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    content = await get_points_json(db, lat1, lng1, lat2, lng2)
+    return Response(content=content, media_type="application/json")
+
+
+@router.get("/clusters", response_model=List[ClusterResponse])
+async def get_point_clusters(
+    lat1: float = Query(..., ge=-90, le=90, description="Southwest latitude"),
+    lng1: float = Query(..., ge=-180, le=180, description="Southwest longitude"),
+    lat2: float = Query(..., ge=-90, le=90, description="Northeast latitude"),
+    lng2: float = Query(..., ge=-180, le=180, description="Northeast longitude"),
+    zoom: int = Query(..., ge=0, le=22, description="Map zoom level"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get points within a bounding box aggregated into zoom-aware grid cells
+    (public endpoint). Excludes trash-flagged images.
+
+    The cell size is fixed in screen pixels, so the number of cells depends on
+    the viewport resolution rather than on the number of points inside it.
+
+    Args:
+        lat1: Southwest latitude
+        lng1: Southwest longitude
+        lat2: Northeast latitude
+        lng2: Northeast longitude
+        zoom: Map zoom level
+
+    Returns:
+        List of clusters with summed weight, point count and max category
+    """
+    # Validate bounds
+    if lat2 <= lat1:
+        raise HTTPException(status_code=400, detail="lat2 must be greater than lat1")
+    if lng2 <= lng1:
+        raise HTTPException(status_code=400, detail="lng2 must be greater than lng1")
+
+    clusters = await get_point_clusters_in_bounds(
+        db, lat1, lng1, lat2, lng2, _cell_size_for_zoom(zoom)
+    )
+    return clusters
 
 
 @router.get("/my-uploads", response_model=List[PointResponse])
 async def get_my_uploads(
-    current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    limit: Optional[int] = Query(
+        None,
+        ge=1,
+        le=settings.uploads_page_max_limit,
+        description="Page size (omit to get all uploads)",
+    ),
+    cursor: Optional[str] = Query(
+        None, description="X-Next-Cursor value from the previous page"
+    ),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     """
-    Get all uploads for the authenticated user (protected endpoint).
+    Get uploads for the authenticated user, newest first (protected endpoint).
+
+    When limit is given and more uploads exist, the response carries an
+    opaque X-Next-Cursor header; pass it back as cursor to get the next page.
 
     Args:
-        current_user: Authenticated user object
+        limit: Page size
+        cursor: Cursor returned with the previous page
+        current_user: Authenticated user snapshot
 
     Returns:
         List of user's uploaded points
     """
-    points = await get_user_points(db, current_user.id)
-    return points
+    before = _decode_cursor(cursor) if cursor else None
+
+    # Fetch one extra row to find out whether another page follows
+    rows = await get_user_point_rows(
+        db, current_user.id, limit=limit + 1 if limit else None, before=before
+    )
+
+    headers = {}
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        headers[NEXT_CURSOR_HEADER] = _encode_cursor(rows[-1])
+
+    return Response(
+        content=point_rows_to_json(rows),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+@router.get("/{point_id}", response_model=PointResponse)
+async def get_point(point_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Get a single point by ID (public endpoint).
+    Used to lazily load details for points received in the binary format.
+
+    Args:
+        point_id: Point ID
+
+    Returns:
+        Point details
+    """
+    point = await get_visible_point(db, point_id)
+
+    if not point:
+        raise HTTPException(status_code=404, detail="Point not found")
+
+    return point
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.crud import get_points_tile
+from app.db.database import get_db
+
+router = APIRouter()
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+
+@router.get("/{z}/{x}/{y}.mvt")
+async def get_tile(
+    z: int = Path(..., ge=0, le=22, description="Tile zoom level"),
+    x: int = Path(..., ge=0, description="Tile column"),
+    y: int = Path(..., ge=0, description="Tile row"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get a Mapbox Vector Tile of trash points (public endpoint).
+    Excludes trash-flagged images.
+
+    Tiles are addressed like any XYZ web map layer, so clients only fetch the
+    tiles that scroll into view and CDNs/browsers can cache each one.
+    Features are in the "points" layer with weight and category attributes
+    (plus count for aggregated cells at low zoom).
+
+    Args:
+        z: Tile zoom level
+        x: Tile column
+        y: Tile row
+
+    Returns:
+        Encoded vector tile
+    """
+    # Validate tile coordinates
+    if x >= 2**z or y >= 2**z:
+        raise HTTPException(status_code=400, detail="Tile out of range for zoom")
+
+    tile = await get_points_tile(
+        db,
+        z,
+        x,
+        y,
+        cluster_max_zoom=settings.tile_cluster_max_zoom,
+        cell_size_px=settings.cluster_cell_size_px,
+    )
+
+    return Response(
+        content=tile,
+        media_type=MVT_MEDIA_TYPE,
+        headers={"Cache-Control": f"public, max-age={settings.tile_cache_max_age}"},
+    )
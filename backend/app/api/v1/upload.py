@@ -1,18 +1,49 @@
+import asyncio
+from typing import List
+
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.db.crud import (
-    decrement_user_points,
-    delete_point,
+    delete_user_point,
     get_point_by_id,
 )
 from app.db.database import get_db
-from app.db.models import User
+from app.db.schemas import (
+    CurrentUser,
+    SignedUrlBatchRequest,
+    SignedUrlResponse,
+)
 from app.services.auth import get_current_user
+from app.services.point_cache import invalidate_point
 from app.services.storage_service import storage_service
 
 router = APIRouter()
 
+# Seconds until a signed upload URL expires
+SIGNED_URL_EXPIRES_IN = 900
+
+
+async def _create_signed_url(
+    current_user: CurrentUser, lat: float, lng: float, content_type: str
+) -> SignedUrlResponse:
+    """Generate a unique filename and its signed upload URL."""
+    file_name = storage_service.generate_filename(current_user.email)
+    signed_url, required_headers = await storage_service.generate_signed_upload_url(
+        file_name=file_name,
+        content_type=content_type,
+        user_id=current_user.id,
+        latitude=lat,
+        longitude=lng,
+    )
+    return SignedUrlResponse(
+        upload_url=signed_url,
+        file_name=file_name,
+        expires_in=SIGNED_URL_EXPIRES_IN,
+        required_headers=required_headers,
+    )
+
 
 @router.post("/signed-url")
 async def generate_signed_url(
@@ -21,7 +52,7 @@ async def generate_signed_url(
     content_type: str = Query(
         "image/jpeg", regex="^image/(jpeg|jpg|png)$", description="Image MIME type"
     ),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     Generate a signed URL for direct client upload to GCS (protected endpoint).
@@ -41,7 +72,7 @@ async def generate_signed_url(
         lat: Latitude coordinate
         lng: Longitude coordinate
         content_type: MIME type of the image (default: image/jpeg)
-        current_user: Authenticated user object
+        current_user: Authenticated user snapshot
 
     Returns:
         upload_url: Signed URL for PUT request
@@ -53,26 +84,59 @@ async def generate_signed_url(
     )
 
     try:
-        # Generate unique filename
-        file_name = storage_service.generate_filename(current_user.email)
-        print(f"Generated filename: {file_name}")
-
-        # Generate signed URL with custom metadata
-        signed_url, required_headers = storage_service.generate_signed_upload_url(
-            file_name=file_name,
-            content_type=content_type,
-            user_id=current_user.id,
-            latitude=lat,
-            longitude=lng,
+        # Generate unique filename and signed URL with custom metadata
+        response = await _create_signed_url(current_user, lat, lng, content_type)
+        print(f"Generated filename: {response.file_name} (expires in 15 minutes)")
+
+        return response.model_dump()
+
+    except Exception as e:
+        import traceback
+
+        print(f"Signed URL generation error: {e}")
+        print(traceback.format_exc())
+        raise HTTPException(
+            status_code=500, detail=f"Failed to generate signed URL: {str(e)}"
         )
-        print(f"Generated signed URL (expires in 15 minutes)")
 
-        return {
-            "upload_url": signed_url,
-            "file_name": file_name,
-            "expires_in": 900,
-            "required_headers": required_headers,
-        }
+
+@router.post("/signed-urls", response_model=List[SignedUrlResponse])
+async def generate_signed_urls(
+    batch: SignedUrlBatchRequest,
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Generate several signed upload URLs in one call (protected endpoint).
+
+    Intended for clients uploading a burst of photos; each URL behaves exactly
+    like one returned by /signed-url.
+
+    Args:
+        batch: Coordinates and content type of each upload
+        current_user: Authenticated user snapshot
+
+    Returns:
+        List of signed URLs, in the same order as the requested uploads
+    """
+    if len(batch.uploads) > settings.signed_url_batch_max:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.signed_url_batch_max} uploads per request",
+        )
+
+    print(
+        f"Signed URL batch request - User: {current_user.email}, Count: {len(batch.uploads)}"
+    )
+
+    try:
+        return await asyncio.gather(
+            *(
+                _create_signed_url(
+                    current_user, upload.lat, upload.lng, upload.content_type
+                )
+                for upload in batch.uploads
+            )
+        )
 
     except Exception as e:
         import traceback
@@ -87,7 +151,7 @@ async def generate_signed_url(
 @router.delete("/{point_id}")
 async def delete_upload(
     point_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -96,7 +160,7 @@ async def delete_upload(
 
     Args:
         point_id: ID of the point to delete
-        current_user: Authenticated user object
+        current_user: Authenticated user snapshot
         db: Database session
 
     Returns:
@@ -104,15 +168,25 @@ async def delete_upload(
     """
     print(f"Delete request - User: {current_user.email}, Point ID: {point_id}")
 
-    # Get the point
-    point = await get_point_by_id(db, point_id)
+    try:
+        # Ownership-checked delete and points decrement in one statement
+        deleted = await delete_user_point(db, point_id, current_user.id, points=250)
+    except Exception as e:
+        import traceback
+
+        print(f"Delete error: {e}")
+        print(traceback.format_exc())
+        raise HTTPException(
+            status_code=500, detail=f"Failed to delete upload: {str(e)}"
+        )
 
-    if not point:
-        print(f"Point {point_id} not found")
-        raise HTTPException(status_code=404, detail="Point not found")
+    if deleted is None:
+        # Nothing deleted: tell a missing point from someone else's
+        point = await get_point_by_id(db, point_id)
+        if not point:
+            print(f"Point {point_id} not found")
+            raise HTTPException(status_code=404, detail="Point not found")
 
-    # Verify ownership
-    if point.user_id != current_user.id:
         print(
             f"Unauthorized delete attempt - Point owner: {point.user_id}, Requester: {current_user.id}"
         )
@@ -120,40 +194,16 @@ async def delete_upload(
             status_code=403, detail="You can only delete your own uploads"
         )
 
-    try:
-        # Delete image from storage bucket
-        print(f"Deleting image from storage: {point.image_url}")
-        image_deleted = await storage_service.delete_image(point.image_url)
-        if image_deleted:
-            print("Image deleted from storage successfully")
-        else:
-            print("Image not found in storage or already deleted")
-
-        # Delete point from database
-        print(f"Deleting point {point_id} from database")
-        deleted = await delete_point(db, point_id)
-
-        if not deleted:
-            raise HTTPException(status_code=500, detail="Failed to delete point")
-
-        # Decrement user points (subtract 250 points)
-        await decrement_user_points(db, current_user.id, points=250)
-        print(f"User {current_user.email} lost 250 points for deletion")
-
-        print(f"Point {point_id} deleted successfully")
-        return {
-            "success": True,
-            "message": "Upload deleted successfully",
-            "point_id": point_id,
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        import traceback
+    # Other instances drop their tiles on the point event; do ours right away
+    invalidate_point(deleted.lat, deleted.lng)
 
-        print(f"Delete error: {e}")
-        print(traceback.format_exc())
-        raise HTTPException(
-            status_code=500, detail=f"Failed to delete upload: {str(e)}"
-        )
+    # The image is removed from storage in the background
+    print(f"Queueing image for deletion: {deleted.image_url}")
+    storage_service.schedule_delete(deleted.image_url)
+
+    print(f"Point {point_id} deleted, user {current_user.email} lost 250 points")
+    return {
+        "success": True,
+        "message": "Upload deleted successfully",
+        "point_id": point_id,
+    }
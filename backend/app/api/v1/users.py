@@ -1,21 +1,33 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import User
-from app.db.schemas import UserResponse
+from app.db.crud import get_user_by_id
+from app.db.database import get_db
+from app.db.schemas import CurrentUser, UserResponse
 from app.services.auth import get_current_user
 
 router = APIRouter()
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
     """
     Get current user information (protected endpoint).
 
     Args:
-        current_user: Authenticated user object
+        current_user: Authenticated user snapshot
+        db: Database session
 
     Returns:
         User information
     """
-    return UserResponse.model_validate(current_user)
+    # Points and uploads change outside this process; always read them fresh
+    user = await get_user_by_id(db, current_user.id)
+
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return UserResponse.model_validate(user)
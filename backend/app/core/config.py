@@ -33,6 +33,12 @@ class Settings(BaseSettings):
     gcs_bucket_name: str = Field(...)
     gcp_project_id: str = Field(default="thinking-avenue-477210-k0")
     gcp_region: str = Field(default="us-west1")
+    storage_emulator_host: str | None = Field(default=None)  # e.g. fake-gcs-server
+    storage_max_workers: int = 16  # Threads (and pooled connections) for GCS calls
+    storage_cleanup_workers: int = 4  # Concurrent background image deletions
+    storage_cleanup_max_attempts: int = 3  # Tries per image before giving up
+    gcs_signing_key_file: str | None = Field(default=None)  # Sign URLs locally
+    signed_url_batch_max: int = 20  # Max signed URLs per batch request
 
     # Application Configuration
     secret_key: str = Field(..., min_length=32)
@@ -49,6 +55,31 @@ class Settings(BaseSettings):
     db_max_overflow: int = 20
     db_echo: bool = False
 
+    # FCM Settings
+    fcm_batch_size: int = 500  # Max messages per send_each call (FCM limit: 500)
+    fcm_batch_wait_seconds: float = 0.05  # Max wait for a batch to fill
+    fcm_max_workers: int = 4  # Batches sent at once
+    fcm_prune_interval_seconds: float = 10.0  # Max delay before dead tokens are cleared
+
+    # Auth Settings
+    auth_token_cache_size: int = 10000  # Verified ID tokens kept in memory
+    auth_user_cache_size: int = 10000  # Authenticated user snapshots kept in memory
+
+    # Map Settings
+    cluster_cell_size_px: int = 32  # Screen size of one heatmap cluster cell
+    tile_cluster_max_zoom: int = 14  # Vector tiles carry raw points above this zoom
+    tile_cache_max_age: int = 300  # Seconds CDNs and browsers may cache tiles
+    point_stream_batch_size: int = 1000  # Rows per flushed NDJSON chunk
+    uploads_page_max_limit: int = 200  # Largest page size for /points/my-uploads
+
+    # Point Cache Settings
+    point_cache_max_bytes: int = 64 * 1024 * 1024
+    point_cache_ttl_seconds: int = 60
+    point_cache_min_zoom: int = 2
+    point_cache_max_zoom: int = 14
+    point_events_channel: str = "point_events"  # Postgres NOTIFY channel
+    point_cache_stats_interval_seconds: int = 300  # Log cache counters (0 = off)
+
     # Validators
     @field_validator("alloydb_connection_uri")
     @classmethod
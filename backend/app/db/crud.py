@@ -1,21 +1,35 @@
-from typing import List, Optional
+import math
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
 
-from geoalchemy2 import Geometry
 from geoalchemy2.elements import WKBElement
 from geoalchemy2.functions import (
     ST_X,
     ST_Y,
     ST_AsText,
-    ST_Intersects,
     ST_MakeEnvelope,
     ST_MakePoint,
 )
-from sqlalchemy import cast, select, text
+from sqlalchemy import (
+    Text,
+    any_,
+    delete,
+    func,
+    literal,
+    or_,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.db.models import Point, User
+from app.core.config import settings
+from app.db.models import Point, User, UserDevice
 from app.db.schemas import (
+    ClusterResponse,
     LocationSchema,
     PointCreate,
     PointResponse,
@@ -118,6 +132,68 @@ async def get_or_create_user(
     return await create_user(db, user_data)
 
 
+async def upsert_user(
+    db: AsyncSession,
+    email: str,
+    name: Optional[str] = None,
+    picture: Optional[str] = None,
+):
+    """
+    Create a user or refresh their profile in a single statement.
+
+    Existing rows are only written when name or picture actually changed;
+    missing (None) values never overwrite stored ones.
+
+    Args:
+        db: Database session
+        email: User email
+        name: User name (optional)
+        picture: User picture URL (optional)
+
+    Returns:
+        Row of (id, email, name, picture)
+    """
+    stmt = insert(User).values(email=email, name=name, picture=picture)
+    new_name = func.coalesce(stmt.excluded.name, User.name)
+    new_picture = func.coalesce(stmt.excluded.picture, User.picture)
+
+    upsert = (
+        stmt.on_conflict_do_update(
+            index_elements=[User.email],
+            set_={"name": new_name, "picture": new_picture, "updated_at": func.now()},
+            where=or_(
+                User.name.is_distinct_from(new_name),
+                User.picture.is_distinct_from(new_picture),
+            ),
+        )
+        .returning(User.id, User.email, User.name, User.picture)
+        .cte("upsert")
+    )
+
+    # An unchanged existing row is not returned by the upsert; read it instead
+    query = select(
+        upsert.c.id, upsert.c.email, upsert.c.name, upsert.c.picture
+    ).union_all(
+        select(User.id, User.email, User.name, User.picture).where(
+            User.email == email, ~select(upsert.c.id).exists()
+        )
+    )
+
+    result = await db.execute(query)
+    row = result.one_or_none()
+    if row is None:
+        # A concurrent first login inserted the row after this statement's
+        # snapshot, so neither branch saw it; a new statement will
+        result = await db.execute(
+            select(User.id, User.email, User.name, User.picture).where(
+                User.email == email
+            )
+        )
+        row = result.one()
+    await db.commit()
+    return row
+
+
 async def update_user(
     db: AsyncSession,
     user_id: int,
@@ -152,93 +228,77 @@ async def update_user(
     return user
 
 
-async def increment_user_points(
+async def upsert_user_device(
     db: AsyncSession,
     user_id: int,
-    points: int = 250,
-) -> Optional[User]:
+    token: str,
+    platform: Optional[str] = None,
+) -> None:
     """
-    Increment user points and upload count.
+    Register a device token for a user, or refresh its last_seen.
+
+    A token already registered to another user (e.g. a shared device after
+    a new login) moves to this user.
 
     Args:
         db: Database session
         user_id: User ID
-        points: Points to add (default 250 per upload)
-
-    Returns:
-        Updated User object or None
+        token: FCM registration token
+        platform: Device platform (android, ios, web)
     """
-    user = await get_user_by_id(db, user_id)
-
-    if not user:
-        return None
-
-    user.total_points += points
-    user.total_uploads += 1
-
+    stmt = insert(UserDevice).values(user_id=user_id, token=token, platform=platform)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[UserDevice.token],
+            set_={
+                "user_id": stmt.excluded.user_id,
+                "platform": func.coalesce(stmt.excluded.platform, UserDevice.platform),
+                "last_seen": func.now(),
+            },
+        )
+    )
     await db.commit()
-    await db.refresh(user)
-
-    return user
 
 
-async def decrement_user_points(
-    db: AsyncSession,
-    user_id: int,
-    points: int = 250,
-) -> Optional[User]:
+async def delete_user_devices(
+    db: AsyncSession, user_id: int, token: Optional[str] = None
+) -> int:
     """
-    Decrement user points and upload count (for deletions).
+    Unregister one or all of a user's devices.
 
     Args:
         db: Database session
         user_id: User ID
-        points: Points to subtract (default 250 per upload)
+        token: FCM token of the device to remove (None removes all devices)
 
     Returns:
-        Updated User object or None
+        Number of devices removed
     """
-    user = await get_user_by_id(db, user_id)
-
-    if not user:
-        return None
-
-    user.total_points = max(0, user.total_points - points)
-    user.total_uploads = max(0, user.total_uploads - 1)
+    stmt = delete(UserDevice).where(UserDevice.user_id == user_id)
+    if token is not None:
+        stmt = stmt.where(UserDevice.token == token)
 
+    result = await db.execute(stmt)
     await db.commit()
-    await db.refresh(user)
-
-    return user
+    return result.rowcount
 
 
-async def update_user_fcm_token(
-    db: AsyncSession,
-    user_id: int,
-    fcm_token: Optional[str],
-) -> Optional[User]:
+async def clear_fcm_tokens(db: AsyncSession, tokens: List[str]) -> int:
     """
-    Update user's FCM token for push notifications.
+    Remove devices whose FCM tokens FCM reported as no longer valid.
 
     Args:
         db: Database session
-        user_id: User ID
-        fcm_token: Firebase Cloud Messaging token (None to remove)
+        tokens: Dead FCM tokens
 
     Returns:
-        Updated User object or None
+        Number of devices removed
     """
-    user = await get_user_by_id(db, user_id)
-
-    if not user:
-        return None
-
-    user.fcm_token = fcm_token
-
+    result = await db.execute(
+        delete(UserDevice).where(UserDevice.token == any_(literal(tokens, ARRAY(Text))))
+    )
     await db.commit()
-    await db.refresh(user)
-
-    return user
+    return result.rowcount
 
 
 # ==================== POINT OPERATIONS ====================
@@ -274,6 +334,164 @@ async def create_point(db: AsyncSession, point_data: PointCreate) -> Point:
     return new_point
 
 
+def _point_row_query():
+    """
+    Build a projected SELECT for the columns of a PointResponse.
+
+    Coordinates are read from the stored geom column in the same statement,
+    so no ORM entities are hydrated and no per-row follow-up queries are issued.
+
+    Returns:
+        Select statement yielding (id, image_url, lat, lng, weight, category,
+        timestamp, user_id) rows
+    """
+    return select(
+        Point.id,
+        Point.image_url,
+        ST_Y(Point.geom).label("lat"),
+        ST_X(Point.geom).label("lng"),
+        Point.weight,
+        Point.category,
+        Point.timestamp,
+        Point.user_id,
+    )
+
+
+def point_row_to_response(row) -> PointResponse:
+    """
+    Convert a projected point row into a PointResponse.
+
+    Args:
+        row: Row produced by _point_row_query()
+
+    Returns:
+        PointResponse object
+    """
+    point_id, image_url, lat, lng, weight, category, timestamp, user_id = row
+    return PointResponse(
+        id=point_id,
+        image_url=image_url,
+        location=LocationSchema(lat=lat, lng=lng),
+        weight=weight,
+        category=category,
+        timestamp=timestamp,
+        user_id=user_id,
+    )
+
+
+def _points_in_bounds_query(
+    lat1: float, lng1: float, lat2: float, lng2: float, query=None
+):
+    """Build the projected, newest-first query for visible points in a bbox."""
+    # Create bounding box envelope (lng1, lat1, lng2, lat2)
+    bbox = ST_MakeEnvelope(lng1, lat1, lng2, lat2, 4326)
+
+    # Query points that intersect with bounding box, coordinates included
+    return (
+        (query if query is not None else _point_row_query())
+        .where(
+            Point.geom.op("&&")(bbox),
+            Point.is_trash == False,  # Exclude trash images
+        )
+        .order_by(Point.timestamp.desc())
+    )
+
+
+async def get_point_rows_in_bounds(
+    db: AsyncSession,
+    lat1: float,
+    lng1: float,
+    lat2: float,
+    lng2: float,
+):
+    """
+    Get projected point rows within a bounding box, newest first.
+    Excludes trash images (is_trash=False).
+
+    Args:
+        db: Database session
+        lat1: Southwest latitude
+        lng1: Southwest longitude
+        lat2: Northeast latitude
+        lng2: Northeast longitude
+
+    Returns:
+        List of (id, image_url, lat, lng, weight, category, timestamp, user_id)
+        rows
+    """
+    result = await db.execute(_points_in_bounds_query(lat1, lng1, lat2, lng2))
+    return result.all()
+
+
+async def get_compact_point_rows_in_bounds(
+    db: AsyncSession,
+    lat1: float,
+    lng1: float,
+    lat2: float,
+    lng2: float,
+):
+    """
+    Get the minimal columns a map needs for points within a bounding box.
+    Excludes trash images (is_trash=False).
+
+    Args:
+        db: Database session
+        lat1: Southwest latitude
+        lng1: Southwest longitude
+        lat2: Northeast latitude
+        lng2: Northeast longitude
+
+    Returns:
+        List of (id, lat, lng, category) rows, newest first
+    """
+    query = select(
+        Point.id,
+        ST_Y(Point.geom).label("lat"),
+        ST_X(Point.geom).label("lng"),
+        Point.category,
+    )
+
+    result = await db.execute(
+        _points_in_bounds_query(lat1, lng1, lat2, lng2, query=query)
+    )
+    return result.all()
+
+
+async def stream_point_rows_in_bounds(
+    db: AsyncSession,
+    lat1: float,
+    lng1: float,
+    lat2: float,
+    lng2: float,
+    batch_size: int,
+) -> AsyncIterator[list]:
+    """
+    Stream projected point rows within a bounding box in batches, newest first.
+    Excludes trash images (is_trash=False).
+
+    Rows are read through a server-side cursor, so only one batch is held in
+    memory at a time regardless of the size of the result.
+
+    Args:
+        db: Database session
+        lat1: Southwest latitude
+        lng1: Southwest longitude
+        lat2: Northeast latitude
+        lng2: Northeast longitude
+        batch_size: Number of rows fetched per batch
+
+    Yields:
+        Lists of up to batch_size projected point rows
+    """
+    query = _points_in_bounds_query(lat1, lng1, lat2, lng2).execution_options(
+        yield_per=batch_size
+    )
+
+    result = await db.stream(query)
+    async for rows in result.partitions(batch_size):
+        yield rows
+
+
 async def get_points_in_bounds(
     db: AsyncSession,
     lat1: float,
@@ -295,103 +513,247 @@ async def get_points_in_bounds(
     Returns:
         List of PointResponse objects
     """
-    # Create bounding box envelope (lng1, lat1, lng2, lat2)
+    rows = await get_point_rows_in_bounds(db, lat1, lng1, lat2, lng2)
+    return [point_row_to_response(row) for row in rows]
+
+
+async def get_point_clusters_in_bounds(
+    db: AsyncSession,
+    lat1: float,
+    lng1: float,
+    lat2: float,
+    lng2: float,
+    cell_size: float,
+) -> List[ClusterResponse]:
+    """
+    Aggregate points within a bounding box into square grid cells.
+    Excludes trash images (is_trash=False).
+
+    Args:
+        db: Database session
+        lat1: Southwest latitude
+        lng1: Southwest longitude
+        lat2: Northeast latitude
+        lng2: Northeast longitude
+        cell_size: Grid cell edge length in degrees (should divide 360)
+
+    Returns:
+        List of ClusterResponse objects, one per non-empty cell
+    """
+    # The grid is global, anchored at (-180, -90). Widen the box to whole
+    # cells so a cell on the viewport edge has the same totals in every
+    # viewport that shows it, instead of being split between them.
+    lng1 = -180.0 + math.floor((lng1 + 180.0) / cell_size) * cell_size
+    lat1 = -90.0 + math.floor((lat1 + 90.0) / cell_size) * cell_size
+    lng2 = -180.0 + math.ceil((lng2 + 180.0) / cell_size) * cell_size
+    lat2 = -90.0 + math.ceil((lat2 + 90.0) / cell_size) * cell_size
     bbox = ST_MakeEnvelope(lng1, lat1, lng2, lat2, 4326)
 
-    # Query points that intersect with bounding box
+    # Snap every point to the grid and aggregate per cell; the cell position
+    # is the mean of its points so clusters sit where the trash actually is.
+    # SnapToGrid rounds to the nearest grid point, so grid points are cell
+    # centers, half a cell off the (-180, -90) corner.
     query = (
-        select(Point)
+        select(
+            func.avg(ST_Y(Point.geom)).label("lat"),
+            func.avg(ST_X(Point.geom)).label("lng"),
+            func.sum(Point.weight).label("weight"),
+            func.count().label("count"),
+            func.max(Point.category).label("category"),
+        )
         .where(
-            ST_Intersects(Point.location, bbox),
+            Point.geom.op("&&")(bbox),
             Point.is_trash == False,  # Exclude trash images
         )
-        .order_by(Point.timestamp.desc())
+        .group_by(
+            func.ST_SnapToGrid(
+                Point.geom,
+                -180.0 + cell_size / 2,
+                -90.0 + cell_size / 2,
+                cell_size,
+                cell_size,
+            )
+        )
     )
 
     result = await db.execute(query)
-    points = result.scalars().all()
-
-    # Convert to response format
-    response_points = []
-    for point in points:
-        # Extract lat/lng from geography point (cast to geometry first)
-        lat_query = select(ST_Y(cast(Point.location, Geometry))).where(
-            Point.id == point.id
+    return [
+        ClusterResponse(
+            location=LocationSchema(lat=lat, lng=lng),
+            weight=weight,
+            count=count,
+            category=category,
         )
-        lng_query = select(ST_X(cast(Point.location, Geometry))).where(
-            Point.id == point.id
+        for lat, lng, weight, count, category in result.all()
+    ]
+
+
+# Half the width of the Web Mercator (EPSG:3857) world in meters
+WEB_MERCATOR_HALF_WIDTH = 20037508.342789244
+
+# Aggregated tile: snap points to a grid and emit one feature per cell.
+# Grid points are cell centers offset half a cell from the tile corner, so
+# cells tile the tile exactly and never straddle its edges.
+_CLUSTER_TILE_SQL = text("""
+    WITH bounds AS (
+        -- Typed explicitly: an untyped bind would be inferred as integer
+        SELECT ST_TileEnvelope(:z, :x, :y) AS geom,
+               CAST(:cell_size AS double precision) AS cell_size
+    ),
+    cells AS (
+        SELECT
+            ST_Centroid(ST_Collect(ST_Transform(p.geom, 3857))) AS geom,
+            SUM(p.weight) AS weight,
+            COUNT(*) AS count,
+            MAX(p.category) AS category
+        FROM points p, bounds
+        WHERE p.is_trash = false
+          AND p.geom && ST_Transform(bounds.geom, 4326)
+        GROUP BY ST_SnapToGrid(
+            ST_Transform(p.geom, 3857),
+            ST_XMin(bounds.geom) + bounds.cell_size / 2,
+            ST_YMin(bounds.geom) + bounds.cell_size / 2,
+            bounds.cell_size,
+            bounds.cell_size
         )
+    ),
+    mvt AS (
+        SELECT ST_AsMVTGeom(cells.geom, bounds.geom) AS geom,
+               cells.weight, cells.count, cells.category
+        FROM cells, bounds
+    )
+    SELECT ST_AsMVT(mvt, 'points') FROM mvt
+""")
+
+# Detailed tile: one feature per point, keyed by point ID
+_POINT_TILE_SQL = text("""
+    WITH bounds AS (
+        SELECT ST_TileEnvelope(:z, :x, :y) AS geom
+    ),
+    mvt AS (
+        SELECT
+            ST_AsMVTGeom(ST_Transform(p.geom, 3857), bounds.geom) AS geom,
+            p.id, p.weight, p.category
+        FROM points p, bounds
+        WHERE p.is_trash = false
+          AND p.geom && ST_Transform(bounds.geom, 4326)
+    )
+    SELECT ST_AsMVT(mvt, 'points', 4096, 'geom', 'id') FROM mvt
+""")
 
-        lat_result = await db.execute(lat_query)
-        lng_result = await db.execute(lng_query)
-
-        lat = lat_result.scalar()
-        lng = lng_result.scalar()
-
-        response_points.append(
-            PointResponse(
-                id=point.id,
-                image_url=point.image_url,
-                location=LocationSchema(lat=lat, lng=lng),
-                weight=point.weight,
-                category=point.category,
-                timestamp=point.timestamp,
-                user_id=point.user_id,
-            )
+
+async def get_points_tile(
+    db: AsyncSession,
+    z: int,
+    x: int,
+    y: int,
+    cluster_max_zoom: int,
+    cell_size_px: int,
+) -> bytes:
+    """
+    Render a Mapbox Vector Tile of the points inside a web map tile.
+    Excludes trash images (is_trash=False).
+
+    Below cluster_max_zoom points are aggregated into grid cells carrying
+    summed weight, count and max category; from that zoom on every point is
+    a feature with its own weight and category.
+
+    Args:
+        db: Database session
+        z: Tile zoom level
+        x: Tile column
+        y: Tile row
+        cluster_max_zoom: First zoom level that returns raw points
+        cell_size_px: Cluster cell size in screen pixels (256px per tile)
+
+    Returns:
+        Encoded MVT bytes (empty if the tile has no points)
+    """
+    if z < cluster_max_zoom:
+        tile_width = 2 * WEB_MERCATOR_HALF_WIDTH / 2**z
+        # A whole number of cells per tile, so cell edges line up with tile edges
+        cells_per_tile = max(1, round(256 / cell_size_px))
+        cell_size = tile_width / cells_per_tile
+        result = await db.execute(
+            _CLUSTER_TILE_SQL, {"z": z, "x": x, "y": y, "cell_size": cell_size}
         )
+    else:
+        result = await db.execute(_POINT_TILE_SQL, {"z": z, "x": x, "y": y})
 
-    return response_points
+    tile = result.scalar()
+    return bytes(tile) if tile else b""
 
 
-async def get_user_points(db: AsyncSession, user_id: int) -> List[PointResponse]:
+async def get_user_point_rows(
+    db: AsyncSession,
+    user_id: int,
+    limit: Optional[int] = None,
+    before: Optional[Tuple[datetime, int]] = None,
+):
     """
-    Get all points uploaded by a specific user.
+    Get projected rows of points uploaded by a specific user, newest first.
     Includes both valid and trash-flagged images.
 
+    Pages are addressed by keyset on (timestamp, id), served by the
+    ix_points_user_id_timestamp_id index.
+
     Args:
         db: Database session
         user_id: User ID
+        limit: Maximum number of rows (None = all)
+        before: (timestamp, id) of the last row of the previous page
 
     Returns:
-        List of PointResponse objects
+        List of (id, image_url, lat, lng, weight, category, timestamp, user_id)
+        rows
     """
     query = (
-        select(Point).where(Point.user_id == user_id).order_by(Point.timestamp.desc())
+        _point_row_query()
+        .where(Point.user_id == user_id)
+        .order_by(Point.timestamp.desc(), Point.id.desc())
     )
 
+    if before is not None:
+        query = query.where(tuple_(Point.timestamp, Point.id) < tuple_(*before))
+    if limit is not None:
+        query = query.limit(limit)
+
     result = await db.execute(query)
-    points = result.scalars().all()
-
-    # Convert to response format
-    response_points = []
-    for point in points:
-        # Extract lat/lng from geography point (cast to geometry first)
-        lat_query = select(ST_Y(cast(Point.location, Geometry))).where(
-            Point.id == point.id
-        )
-        lng_query = select(ST_X(cast(Point.location, Geometry))).where(
-            Point.id == point.id
-        )
+    return result.all()
 
-        lat_result = await db.execute(lat_query)
-        lng_result = await db.execute(lng_query)
-
-        lat = lat_result.scalar()
-        lng = lng_result.scalar()
-
-        response_points.append(
-            PointResponse(
-                id=point.id,
-                image_url=point.image_url,
-                location=LocationSchema(lat=lat, lng=lng),
-                weight=point.weight,
-                category=point.category,
-                timestamp=point.timestamp,
-                user_id=point.user_id,
-            )
-        )
 
-    return response_points
+async def get_user_points(db: AsyncSession, user_id: int) -> List[PointResponse]:
+    """
+    Get all points uploaded by a specific user.
+    Includes both valid and trash-flagged images.
+
+    Args:
+        db: Database session
+        user_id: User ID
+
+    Returns:
+        List of PointResponse objects
+    """
+    rows = await get_user_point_rows(db, user_id)
+    return [point_row_to_response(row) for row in rows]
+
+
+async def get_visible_point(db: AsyncSession, point_id: int) -> Optional[PointResponse]:
+    """
+    Get a single point as shown on the public map.
+    Trash-flagged images are treated as missing.
+
+    Args:
+        db: Database session
+        point_id: Point ID
+
+    Returns:
+        PointResponse object or None
+    """
+    query = _point_row_query().where(Point.id == point_id, Point.is_trash == False)
+    result = await db.execute(query)
+    row = result.first()
+    return point_row_to_response(row) if row else None
 
 
 async def get_point_by_id(db: AsyncSession, point_id: int) -> Optional[Point]:
@@ -410,23 +772,62 @@ async def get_point_by_id(db: AsyncSession, point_id: int) -> Optional[Point]:
     return result.scalar_one_or_none()
 
 
-async def delete_point(db: AsyncSession, point_id: int) -> bool:
+async def delete_user_point(
+    db: AsyncSession,
+    point_id: int,
+    user_id: int,
+    points: int = 250,
+):
     """
-    Delete a point from the database.
+    Delete a user's own point and take back its points in one statement.
+
+    The ownership-checked DELETE, the counter decrement and the point change
+    event (for other instances' tile caches) run as a single CTE and commit
+    together.
 
     Args:
         db: Database session
         point_id: Point ID to delete
+        user_id: ID of the user who must own the point
+        points: Points to subtract (default 250 per upload)
 
     Returns:
-        True if deleted successfully, False if not found
+        Row of (image_url, lat, lng) of the deleted point, or None if no
+        point with this ID belongs to the user
     """
-    point = await get_point_by_id(db, point_id)
-
-    if not point:
-        return False
-
-    await db.delete(point)
+    deleted = (
+        delete(Point)
+        .where(Point.id == point_id, Point.user_id == user_id)
+        .returning(
+            Point.user_id,
+            Point.image_url,
+            ST_Y(Point.geom).label("lat"),
+            ST_X(Point.geom).label("lng"),
+        )
+        .cte("deleted")
+    )
+    updated_user = (
+        update(User)
+        .where(User.id == deleted.c.user_id)
+        .values(
+            total_points=func.greatest(User.total_points - points, 0),
+            total_uploads=func.greatest(User.total_uploads - 1, 0),
+        )
+        .returning(User.id)
+        .cte("updated_user")
+    )
+    event = func.json_build_object("lat", deleted.c.lat, "lng", deleted.c.lng)
+
+    result = await db.execute(
+        select(
+            deleted.c.image_url,
+            deleted.c.lat,
+            deleted.c.lng,
+            # NOTIFY is transactional: only delivered if the delete commits
+            func.pg_notify(settings.point_events_channel, event.cast(Text)),
+        ).add_cte(updated_user)
+    )
+    row = result.one_or_none()
     await db.commit()
 
-    return True
+    return row
@@ -26,7 +26,6 @@ class UserResponse(BaseModel):
     email: str
     name: Optional[str] = None
     picture: Optional[str] = None
-    fcm_token: Optional[str] = None
     total_points: int = 0
     total_uploads: int = 0
     created_at: datetime
@@ -34,6 +33,17 @@ class UserResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class CurrentUser(BaseModel):
+    """Compact snapshot of the authenticated user (internal use)."""
+
+    id: int
+    email: str
+    name: Optional[str] = None
+    picture: Optional[str] = None
+
+    model_config = {"from_attributes": True, "frozen": True}
+
+
 class UserWithPointsResponse(BaseModel):
     """Schema for user response with their points."""
 
@@ -73,6 +83,15 @@ class PointResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class ClusterResponse(BaseModel):
+    """Schema for an aggregated grid cell of points in API."""
+
+    location: LocationSchema
+    weight: float = Field(..., description="Sum of point weights in the cell")
+    count: int = Field(..., description="Number of points in the cell")
+    category: int = Field(..., description="Highest category in the cell")
+
+
 class PointWithUserResponse(BaseModel):
     """Schema for point response with user information."""
 
@@ -97,6 +116,31 @@ class UploadResponse(BaseModel):
     weight: Optional[float] = None
 
 
+class SignedUrlRequest(BaseModel):
+    """Schema for one upload in a signed URL batch request."""
+
+    lat: float = Field(..., ge=-90, le=90, description="Latitude")
+    lng: float = Field(..., ge=-180, le=180, description="Longitude")
+    content_type: str = Field(
+        "image/jpeg", pattern="^image/(jpeg|jpg|png)$", description="Image MIME type"
+    )
+
+
+class SignedUrlBatchRequest(BaseModel):
+    """Schema for requesting several signed upload URLs at once."""
+
+    uploads: List[SignedUrlRequest] = Field(..., min_length=1)
+
+
+class SignedUrlResponse(BaseModel):
+    """Schema for a signed upload URL."""
+
+    upload_url: str
+    file_name: str
+    expires_in: int
+    required_headers: dict[str, str]
+
+
 class BoundsQuery(BaseModel):
     """Schema for bounding box query parameters."""
 
@@ -134,6 +178,9 @@ class FCMTokenRequest(BaseModel):
     fcm_token: str = Field(
         ..., min_length=1, description="Firebase Cloud Messaging token"
     )
+    platform: Optional[str] = Field(
+        None, pattern="^(android|ios|web)$", description="Device platform"
+    )
 
 
 class FCMTokenResponse(BaseModel):
@@ -0,0 +1,117 @@
+"""
+Fast JSON encoders for API list responses.
+
+Encode projected database rows straight to the wire format of the matching
+Pydantic schemas, skipping model construction and response validation.
+"""
+
+import sys
+from array import array
+from typing import Iterable
+
+import orjson
+
+# Pydantic renders UTC datetimes with a "Z" suffix; match it byte for byte
+_ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+# Header of the compact binary point format: magic + version
+POINTS_BINARY_MAGIC = b"TMP1"
+
+
+def point_row_to_dict(row) -> dict:
+    """
+    Convert a projected point row to the PointResponse JSON structure.
+
+    Args:
+        row: (id, image_url, lat, lng, weight, category, timestamp, user_id) row
+
+    Returns:
+        Dict in PointResponse field order
+    """
+    point_id, image_url, lat, lng, weight, category, timestamp, user_id = row
+    return {
+        "id": point_id,
+        "image_url": image_url,
+        "location": {"lat": lat, "lng": lng},
+        "weight": weight,
+        "category": category,
+        "timestamp": timestamp,
+        "user_id": user_id,
+    }
+
+
+def point_row_to_json(row) -> bytes:
+    """
+    Encode a projected point row as a PointResponse JSON object.
+
+    Args:
+        row: Projected point row
+
+    Returns:
+        JSON bytes
+    """
+    return orjson.dumps(point_row_to_dict(row), option=_ORJSON_OPTIONS)
+
+
+def point_rows_to_json(rows: Iterable) -> bytes:
+    """
+    Encode projected point rows as a List[PointResponse] JSON array.
+
+    Args:
+        rows: Projected point rows
+
+    Returns:
+        JSON array bytes
+    """
+    return orjson.dumps(
+        [point_row_to_dict(row) for row in rows], option=_ORJSON_OPTIONS
+    )
+
+
+def point_rows_to_ndjson(rows: Iterable) -> bytes:
+    """
+    Encode projected point rows as newline-delimited PointResponse objects.
+
+    Args:
+        rows: Projected point rows
+
+    Returns:
+        NDJSON bytes (one JSON object per line)
+    """
+    return b"".join(point_row_to_json(row) + b"\n" for row in rows)
+
+
+def compact_point_rows_to_binary(rows: Iterable) -> bytes:
+    """
+    Pack (id, lat, lng, category) rows into the compact binary point format.
+
+    Layout (little-endian, column-oriented so every array is 4-byte aligned
+    and can be viewed directly as a typed array by clients):
+
+        4 bytes          magic "TMP1"
+        uint32           count
+        float32[count]   latitudes
+        float32[count]   longitudes
+        uint32[count]    point IDs
+        uint8[count]     categories (weight = category / 4)
+
+    Args:
+        rows: Compact point rows
+
+    Returns:
+        Packed bytes
+    """
+    columns = list(zip(*rows)) or [(), (), (), ()]
+    ids, lats, lngs, categories = columns
+
+    count = array("I", [len(ids)])
+    packed = [count, array("f", lats), array("f", lngs), array("I", ids)]
+    if sys.byteorder == "big":
+        for column in packed:
+            column.byteswap()
+
+    return (
+        POINTS_BINARY_MAGIC
+        + b"".join(column.tobytes() for column in packed)
+        + bytes(categories)
+    )
@@ -9,7 +9,14 @@ from fastapi.staticfiles import StaticFiles
 from app.api.v1.router import api_router
 from app.core.config import settings
 from app.db.database import init_db
-from app.services.fcm_service import initialize_firebase
+from app.services.fcm_service import initialize_firebase, notification_dispatcher
+from app.services.point_cache import (
+    start_point_cache_stats,
+    start_point_event_listener,
+    stop_point_cache_stats,
+    stop_point_event_listener,
+)
+from app.services.storage_service import storage_service
 
 # Initialize FastAPI app with settings from config
 app = FastAPI(
@@ -26,17 +33,32 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database connection and Firebase on startup."""
+    """Initialize database connection, Firebase and background tasks on startup."""
     await init_db()
     initialize_firebase()
+    await start_point_event_listener()
+    start_point_cache_stats()
+    storage_service.start_credentials_refresher()
     print("Application startup complete")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background listeners and release clients on shutdown."""
+    await stop_point_event_listener()
+    stop_point_cache_stats()
+    storage_service.stop_credentials_refresher()
+    await notification_dispatcher.close()
+    await storage_service.stop_cleanup()
+    storage_service.close()
+
+
 # Health check endpoint (not versioned)
 @app.get("/health")
 async def health_check():
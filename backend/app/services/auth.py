@@ -2,14 +2,14 @@ from typing import Optional, Tuple
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from google.auth.transport import requests
-from google.oauth2 import id_token
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import BoundedCache
 from app.core.config import settings
-from app.db.crud import get_or_create_user
+from app.db.crud import upsert_user
 from app.db.database import get_db
-from app.db.models import User
+from app.db.schemas import CurrentUser
+from app.services.token_verifier import GoogleTokenVerifier
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
@@ -20,10 +20,15 @@ class AuthService:
 
     def __init__(self):
         self.google_client_id = settings.google_oauth_client_id
+        self.token_verifier = GoogleTokenVerifier(
+            audience=self.google_client_id,
+            max_cached_tokens=settings.auth_token_cache_size,
+        )
 
     async def verify_token(self, token: str) -> dict:
         """
-        Verify a Google OAuth ID token.
+        Verify a Google OAuth ID token locally against Google's cached
+        signing certificates. Verified tokens are memoized until they expire.
 
         Args:
             token: Google OAuth ID token
@@ -36,9 +41,7 @@ class AuthService:
         """
         try:
             # Verify the token
-            idinfo = id_token.verify_oauth2_token(
-                token, requests.Request(), self.google_client_id
-            )
+            idinfo = await self.token_verifier.verify(token)
 
             # Verify issuer
             if idinfo["iss"] not in [
@@ -84,11 +87,49 @@ class AuthService:
 # Singleton instance
 auth_service = AuthService()
 
+# Authenticated users by email, so repeat requests skip the database
+_user_cache = BoundedCache(max_cost=settings.auth_user_cache_size)
+
+
+async def resolve_user(
+    db: AsyncSession,
+    email: str,
+    name: Optional[str],
+    picture: Optional[str],
+) -> CurrentUser:
+    """
+    Resolve the user for verified token claims.
+    Creates the user in the database if not exists.
+
+    Cached snapshots are returned without any database access as long as the
+    token's name and picture match; otherwise the user is upserted once.
+
+    Args:
+        db: Database session
+        email: User email
+        name: User name from the token (optional)
+        picture: User picture URL from the token (optional)
+
+    Returns:
+        CurrentUser snapshot
+    """
+    user = _user_cache.get(email)
+    if (
+        user is not None
+        and (not name or name == user.name)
+        and (not picture or picture == user.picture)
+    ):
+        return user
+
+    user = CurrentUser.model_validate(await upsert_user(db, email, name, picture))
+    _user_cache.set(email, user)
+    return user
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db),
-) -> User:
+) -> CurrentUser:
     """
     Dependency to get current authenticated user.
     Creates user in database if not exists.
@@ -98,7 +139,7 @@ async def get_current_user(
         db: Database session
 
     Returns:
-        User object
+        CurrentUser snapshot (id, email, name, picture)
 
     Raises:
         HTTPException: If authentication fails
@@ -110,8 +151,8 @@ async def get_current_user(
 
     print(f"Token verified for user: {email}")
 
-    # Get or create user in database
-    user = await get_or_create_user(db, email, name, picture)
+    # Get or create user (cached after the first request)
+    user = await resolve_user(db, email, name, picture)
 
     print(f"User authenticated: {user.email} (ID: {user.id})")
 
@@ -123,7 +164,7 @@ async def get_current_user_optional(
         HTTPBearer(auto_error=False)
     ),
     db: AsyncSession = Depends(get_db),
-) -> Optional[User]:
+) -> Optional[CurrentUser]:
     """
     Optional dependency to get current user if authenticated.
     Does not raise error if no credentials provided.
@@ -133,7 +174,7 @@ async def get_current_user_optional(
         db: Database session
 
     Returns:
-        User object or None
+        CurrentUser snapshot or None
     """
     if credentials is None:
         return None
@@ -141,7 +182,7 @@ async def get_current_user_optional(
     try:
         token = credentials.credentials
         email, name, picture = await auth_service.get_user_info_from_token(token)
-        user = await get_or_create_user(db, email, name, picture)
+        user = await resolve_user(db, email, name, picture)
         return user
     except HTTPException:
         return None
@@ -1,15 +1,23 @@
 """
 Firebase Cloud Messaging (FCM) service for sending push notifications.
 Uses FCM v1 API via firebase-admin SDK.
+
+Notifications are queued on a dispatcher and sent in batches with
+send_each on a background executor, so callers never wait on FCM.
 """
 
+import asyncio
 import logging
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
 
 import firebase_admin
 from firebase_admin import credentials, messaging
 
 from app.core.config import settings
+from app.db.crud import clear_fcm_tokens
+from app.db.database import AsyncSessionLocal
 
 logger = logging.getLogger(__name__)
 
@@ -51,85 +59,393 @@ def initialize_firebase():
         raise
 
 
+@dataclass
+class SendResult:
+    """Outcome of sending one message."""
+
+    token: str
+    success: bool
+    message_id: Optional[str] = None
+    error: Optional[Exception] = None
+
+
+# Sends a batch of messages (blocking) and returns one result per message
+FcmTransport = Callable[[List[messaging.Message]], List[SendResult]]
+
+# Clears dead tokens from storage and returns how many were cleared
+TokenPruner = Callable[[List[str]], Awaitable[int]]
+
+# Errors meaning the token will never work again
+DEAD_TOKEN_ERRORS = (messaging.UnregisteredError, messaging.SenderIdMismatchError)
+
+
+def firebase_transport(messages: List[messaging.Message]) -> List[SendResult]:
+    """Send a batch with the FCM v1 API (one HTTP round trip per batch)."""
+    response = messaging.send_each(messages)
+    return [
+        SendResult(
+            token=message.token,
+            success=result.success,
+            message_id=result.message_id,
+            error=result.exception,
+        )
+        for message, result in zip(messages, response.responses)
+    ]
+
+
+class FakeFcmTransport:
+    """
+    In-memory FCM transport for offline runs.
+    Records every batch; tokens in unregistered fail with UnregisteredError.
+    """
+
+    def __init__(self, unregistered: Optional[Set[str]] = None):
+        self.unregistered = set(unregistered or ())
+        self.batches: List[List[messaging.Message]] = []
+
+    def __call__(self, messages: List[messaging.Message]) -> List[SendResult]:
+        self.batches.append(list(messages))
+        return [
+            (
+                SendResult(
+                    token=message.token,
+                    success=False,
+                    error=messaging.UnregisteredError("Unregistered token"),
+                )
+                if message.token in self.unregistered
+                else SendResult(
+                    token=message.token,
+                    success=True,
+                    message_id=f"fake/{len(self.batches)}/{index}",
+                )
+            )
+            for index, message in enumerate(messages)
+        ]
+
+
+class NotificationDispatcher:
+    """
+    Queues notifications and sends them in batches on a background executor.
+
+    Callers get a future per message and don't have to wait for it; queued
+    messages are collected for up to FCM_BATCH_WAIT_SECONDS (or until
+    FCM_BATCH_SIZE are waiting) and sent with one send_each call.
+
+    Tokens reported as unregistered are buffered and cleared in bulk every
+    FCM_PRUNE_INTERVAL_SECONDS; until then, messages to them are dropped
+    without an FCM call.
+    """
+
+    def __init__(
+        self,
+        transport: FcmTransport = firebase_transport,
+        prune_tokens: Optional[TokenPruner] = None,
+        max_batch_size: int = settings.fcm_batch_size,
+        max_wait_seconds: float = settings.fcm_batch_wait_seconds,
+        max_workers: int = settings.fcm_max_workers,
+        prune_interval_seconds: float = settings.fcm_prune_interval_seconds,
+    ):
+        """
+        Args:
+            transport: Sends a batch of messages (FakeFcmTransport for tests)
+            prune_tokens: Clears dead tokens from storage (None = keep them)
+            max_batch_size: Max messages per batch (FCM allows up to 500)
+            max_wait_seconds: Max time a message waits for its batch to fill
+            max_workers: Batches sent at once
+            prune_interval_seconds: Max time a dead token waits to be cleared
+        """
+        self.transport = transport
+        self.prune_tokens = prune_tokens
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.prune_interval_seconds = prune_interval_seconds
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="fcm"
+        )
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._batches: Set[asyncio.Task] = set()
+
+        # Tokens found dead that haven't been cleared from storage yet
+        self.dead_tokens: Set[str] = set()
+        self._prune_task: Optional[asyncio.Task] = None
+
+    def enqueue_multicast(
+        self, message: messaging.MulticastMessage
+    ) -> List[asyncio.Future]:
+        """
+        Queue a message for each token of a multicast message.
+
+        Expanded like send_each_for_multicast, but the per-device messages
+        share batches with everyone else's.
+
+        Args:
+            message: Message addressed to several devices
+
+        Returns:
+            Futures resolving to each device's SendResult, in token order
+        """
+        return [
+            self.enqueue(
+                messaging.Message(
+                    data=message.data,
+                    notification=message.notification,
+                    android=message.android,
+                    webpush=message.webpush,
+                    apns=message.apns,
+                    fcm_options=message.fcm_options,
+                    token=token,
+                )
+            )
+            for token in message.tokens
+        ]
+
+    def enqueue(self, message: messaging.Message) -> asyncio.Future:
+        """
+        Queue a message for the next batch.
+
+        Args:
+            message: Message to send
+
+        Returns:
+            Future resolving to the message's SendResult
+        """
+        future = asyncio.get_running_loop().create_future()
+
+        if message.token in self.dead_tokens:
+            future.set_result(
+                SendResult(
+                    token=message.token,
+                    success=False,
+                    error=messaging.UnregisteredError("Token is being pruned"),
+                )
+            )
+            return future
+
+        if self._runner is None:
+            self._queue = asyncio.Queue()
+            self._runner = asyncio.create_task(self._run())
+
+        self._queue.put_nowait((message, future))
+        return future
+
+    async def prune_dead_tokens(self) -> int:
+        """
+        Clear all buffered dead tokens with one storage update.
+
+        Returns:
+            Number of tokens cleared
+        """
+        if not self.dead_tokens or self.prune_tokens is None:
+            return 0
+
+        tokens = list(self.dead_tokens)
+        try:
+            cleared = await self.prune_tokens(tokens)
+        except Exception as e:
+            logger.warning(f"Failed to clear {len(tokens)} dead FCM tokens: {e}")
+            self._schedule_prune()
+            return 0
+
+        self.dead_tokens.difference_update(tokens)
+        logger.info(f"Cleared {cleared} dead FCM tokens")
+        return cleared
+
+    def _schedule_prune(self) -> None:
+        if self.prune_tokens is not None and self._prune_task is None:
+            self._prune_task = asyncio.create_task(self._prune_later())
+
+    async def _prune_later(self) -> None:
+        try:
+            await asyncio.sleep(self.prune_interval_seconds)
+        finally:
+            self._prune_task = None
+        await self.prune_dead_tokens()
+
+    async def close(self) -> None:
+        """Send everything still queued, then stop."""
+        if self._runner is not None:
+            # Flush the batch being collected instead of waiting for it to fill
+            self._queue.put_nowait(None)
+            await self._runner
+            self._runner = None
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        if self._prune_task is not None:
+            self._prune_task.cancel()
+            self._prune_task = None
+        await self.prune_dead_tokens()
+        self.executor.shutdown(wait=False)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        closing = False
+        while not closing:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            flush_at = loop.time() + self.max_wait_seconds
+            while len(batch) < self.max_batch_size:
+                remaining = flush_at - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    # close() was called: send what we have and stop
+                    closing = True
+                    break
+                batch.append(item)
+
+            task = asyncio.create_task(self._send(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _send(
+        self, batch: List[Tuple[messaging.Message, asyncio.Future]]
+    ) -> None:
+        messages = [message for message, _ in batch]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.transport, messages
+            )
+        except Exception as e:
+            logger.error(f"Failed to send {len(messages)} notifications: {e}")
+            results = [
+                SendResult(token=message.token, success=False, error=e)
+                for message in messages
+            ]
+
+        sent = sum(result.success for result in results)
+        logger.info(f"Sent notification batch: {sent}/{len(results)} delivered")
+
+        for (_, future), result in zip(batch, results):
+            if not result.success and result.error is not None:
+                if isinstance(result.error, DEAD_TOKEN_ERRORS):
+                    logger.warning(
+                        f"FCM token is unregistered or invalid: {result.token[:20]}..."
+                    )
+                    self.dead_tokens.add(result.token)
+                else:
+                    logger.error(f"Failed to send notification: {result.error}")
+            if not future.done():
+                future.set_result(result)
+
+        if self.dead_tokens:
+            self._schedule_prune()
+
+
+async def clear_dead_tokens(tokens: List[str]) -> int:
+    """Delete the user_devices rows of dead tokens with a single DELETE."""
+    async with AsyncSessionLocal() as db:
+        return await clear_fcm_tokens(db, tokens)
+
+
+# Singleton instance
+notification_dispatcher = NotificationDispatcher(prune_tokens=clear_dead_tokens)
+
+
+def build_multicast_message(
+    tokens: List[str], title: str, body: str, data: Optional[dict] = None
+) -> messaging.MulticastMessage:
+    """
+    Build a high-priority notification message for a user's devices.
+
+    Args:
+        tokens: FCM device tokens
+        title: Notification title
+        body: Notification body text
+        data: Optional data payload (key-value pairs)
+
+    Returns:
+        FCM multicast message
+    """
+    return messaging.MulticastMessage(
+        notification=messaging.Notification(
+            title=title,
+            body=body,
+        ),
+        data=data or {},
+        tokens=tokens,
+        android=messaging.AndroidConfig(
+            priority="high",
+            notification=messaging.AndroidNotification(
+                sound="default",
+                priority="high",
+            ),
+        ),
+        apns=messaging.APNSConfig(
+            headers={
+                "apns-priority": "10",
+            },
+            payload=messaging.APNSPayload(
+                aps=messaging.Aps(
+                    sound="default",
+                ),
+            ),
+        ),
+    )
+
+
 async def send_notification(
-    token: str,
+    tokens: List[str],
     title: str,
     body: str,
     data: Optional[dict] = None,
+    wait: bool = True,
 ) -> bool:
     """
-    Send a push notification to a specific device using FCM v1 API.
+    Send a push notification to all of a user's devices using FCM v1 API.
+
+    The messages go out with the next dispatcher batch.
 
     Args:
-        token: FCM device token
+        tokens: FCM device tokens
         title: Notification title
         body: Notification body text
         data: Optional data payload (key-value pairs)
+        wait: Wait for the delivery results; otherwise return once queued
 
     Returns:
-        True if sent successfully, False otherwise
+        True if sent (or queued) to at least one device, False otherwise
     """
-    if not token:
-        logger.warning("Cannot send notification: token is empty")
+    if not tokens:
+        logger.warning("Cannot send notification: no device tokens")
         return False
 
-    try:
-        # Construct the message
-        message = messaging.Message(
-            notification=messaging.Notification(
-                title=title,
-                body=body,
-            ),
-            data=data or {},
-            token=token,
-            android=messaging.AndroidConfig(
-                priority="high",
-                notification=messaging.AndroidNotification(
-                    sound="default",
-                    priority="high",
-                ),
-            ),
-            apns=messaging.APNSConfig(
-                headers={
-                    "apns-priority": "10",
-                },
-                payload=messaging.APNSPayload(
-                    aps=messaging.Aps(
-                        sound="default",
-                    ),
-                ),
-            ),
-        )
-
-        # Send the message
-        response = messaging.send(message)
-        logger.info(
-            f"Successfully sent notification to token {token[:20]}...: {response}"
-        )
+    futures = notification_dispatcher.enqueue_multicast(
+        build_multicast_message(tokens, title, body, data)
+    )
+    if not wait:
         return True
 
-    except messaging.UnregisteredError:
-        logger.warning(f"FCM token is unregistered or invalid: {token[:20]}...")
-        return False
-    except Exception as e:
-        logger.error(f"Failed to send notification: {e}")
-        return False
+    results = await asyncio.gather(*futures)
+    delivered = sum(result.success for result in results)
+    if delivered:
+        logger.info(f"Successfully sent notification to {delivered} device(s)")
+    return delivered > 0
 
 
 async def send_image_accepted_notification(
-    token: str,
+    tokens: List[str],
     category: int,
     weight: float,
     points_earned: int = 250,
+    wait: bool = True,
 ) -> bool:
     """
     Send notification when an uploaded image is accepted.
 
     Args:
-        token: FCM device token
+        tokens: FCM tokens of the user's devices
         category: Trash category (1-4)
         weight: Trash weight (0.25-1.0)
         points_earned: Points earned (default 250)
+        wait: Wait for the delivery result; otherwise return once queued
 
     Returns:
         True if sent successfully, False otherwise
@@ -153,19 +469,21 @@ async def send_image_accepted_notification(
         "points_earned": str(points_earned),
     }
 
-    return await send_notification(token, title, body, data)
+    return await send_notification(tokens, title, body, data, wait=wait)
 
 
 async def send_image_rejected_notification(
-    token: str,
+    tokens: List[str],
     reason: str = "Image doesn't meet quality standards",
+    wait: bool = True,
 ) -> bool:
     """
     Send notification when an uploaded image is rejected.
 
     Args:
-        token: FCM device token
+        tokens: FCM tokens of the user's devices
         reason: Rejection reason (default message)
+        wait: Wait for the delivery result; otherwise return once queued
 
     Returns:
         True if sent successfully, False otherwise
@@ -178,4 +496,4 @@ async def send_image_rejected_notification(
         "reason": reason,
     }
 
-    return await send_notification(token, title, body, data)
+    return await send_notification(tokens, title, body, data, wait=wait)
@@ -0,0 +1,318 @@
+"""
+Tile-keyed cache for the public point query.
+
+Bounding boxes are snapped to a quantized lat/lng tile grid. Each tile's
+points are stored pre-serialized in a bounded LRU + TTL cache, so repeated
+pans over popular viewports are answered without touching the database.
+
+The worker announces new points with Postgres NOTIFY on the
+POINT_EVENTS_CHANNEL channel; the listener here invalidates only the tiles
+containing the new point. Both services already share the database, so it
+stands in for a dedicated message bus.
+"""
+
+import asyncio
+import json
+import logging
+import math
+from typing import Dict, List, Optional, Tuple
+
+import asyncpg
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import BoundedCache
+from app.core.config import settings
+from app.db.crud import get_point_rows_in_bounds
+from app.db.database import engine
+from app.db.serializers import point_row_to_json
+
+logger = logging.getLogger(__name__)
+
+# A bounding box is served from at most this many tiles per axis
+MAX_TILES_PER_AXIS = 4
+
+# Approximate in-memory size of a cached entry besides its JSON bytes
+ENTRY_OVERHEAD_BYTES = 200
+
+# Seconds to wait before re-establishing a dropped listener connection
+LISTENER_RETRY_SECONDS = 5
+
+# (zoom, x, y) on a grid of 2^zoom x 2^zoom lat/lng tiles
+TileKey = Tuple[int, int, int]
+
+point_cache = BoundedCache(
+    max_cost=settings.point_cache_max_bytes,
+    ttl=settings.point_cache_ttl_seconds,
+)
+
+# Bumped on every invalidation so in-flight fills can detect they are stale
+_invalidation_count = 0
+
+_listener_connection: Optional[asyncpg.Connection] = None
+_listener_task: Optional[asyncio.Task] = None
+_stats_task: Optional[asyncio.Task] = None
+
+
+def _tile_index(value: float, origin: float, span: float, zoom: int) -> int:
+    tiles = 2**zoom
+    return max(0, min(int((value - origin) / span * tiles), tiles - 1))
+
+
+def tile_for_point(lat: float, lng: float, zoom: int) -> TileKey:
+    """
+    Get the tile containing a coordinate.
+
+    Args:
+        lat: Latitude
+        lng: Longitude
+        zoom: Tile grid zoom level
+
+    Returns:
+        Tile key
+    """
+    return (
+        zoom,
+        _tile_index(lng, -180.0, 360.0, zoom),
+        _tile_index(lat, -90.0, 180.0, zoom),
+    )
+
+
+def tile_bounds(key: TileKey) -> Tuple[float, float, float, float]:
+    """
+    Get the bounding box of a tile.
+
+    Args:
+        key: Tile key
+
+    Returns:
+        Tuple of (lat1, lng1, lat2, lng2)
+    """
+    zoom, x, y = key
+    lng_size = 360.0 / 2**zoom
+    lat_size = 180.0 / 2**zoom
+    return (
+        -90.0 + y * lat_size,
+        -180.0 + x * lng_size,
+        -90.0 + (y + 1) * lat_size,
+        -180.0 + (x + 1) * lng_size,
+    )
+
+
+def tiles_for_bounds(
+    lat1: float, lng1: float, lat2: float, lng2: float
+) -> List[TileKey]:
+    """
+    Snap a bounding box to the tiles covering it.
+
+    Picks the finest zoom at which the box spans at most MAX_TILES_PER_AXIS
+    tiles per axis, clamped to the configured cache zoom range.
+
+    Args:
+        lat1: Southwest latitude
+        lng1: Southwest longitude
+        lat2: Northeast latitude
+        lng2: Northeast longitude
+
+    Returns:
+        List of tile keys
+    """
+    span = max((lng2 - lng1) / 360.0, (lat2 - lat1) / 180.0)
+    zoom = math.floor(math.log2((MAX_TILES_PER_AXIS - 1) / span))
+    zoom = max(settings.point_cache_min_zoom, min(zoom, settings.point_cache_max_zoom))
+
+    _, x1, y1 = tile_for_point(lat1, lng1, zoom)
+    _, x2, y2 = tile_for_point(lat2, lng2, zoom)
+    return [(zoom, x, y) for x in range(x1, x2 + 1) for y in range(y1, y2 + 1)]
+
+
+def _encode_entry(row) -> tuple:
+    """Serialize a point row, keeping the fields needed to filter and sort."""
+    return (row.timestamp, row.id, row.lat, row.lng, point_row_to_json(row))
+
+
+async def _fill_tiles(db: AsyncSession, keys: List[TileKey]) -> Dict[TileKey, list]:
+    """
+    Load and cache several tiles with a single query over their envelope.
+
+    Args:
+        db: Database session
+        keys: Tiles to load (same zoom level)
+
+    Returns:
+        Dict mapping each key to its encoded entries
+    """
+    invalidations_before = _invalidation_count
+
+    bounds = [tile_bounds(key) for key in keys]
+    rows = await get_point_rows_in_bounds(
+        db,
+        min(b[0] for b in bounds),
+        min(b[1] for b in bounds),
+        max(b[2] for b in bounds),
+        max(b[3] for b in bounds),
+    )
+
+    tiles: Dict[TileKey, list] = {key: [] for key in keys}
+    zoom = keys[0][0]
+    for row in rows:
+        tile = tiles.get(tile_for_point(row.lat, row.lng, zoom))
+        if tile is not None:
+            tile.append(_encode_entry(row))
+
+    # Don't cache results that may predate an invalidation received meanwhile
+    if _invalidation_count == invalidations_before:
+        for key, entries in tiles.items():
+            cost = sum(len(entry[4]) + ENTRY_OVERHEAD_BYTES for entry in entries)
+            point_cache.set(key, entries, cost=cost + ENTRY_OVERHEAD_BYTES)
+
+    return tiles
+
+
+async def get_points_json(
+    db: AsyncSession,
+    lat1: float,
+    lng1: float,
+    lat2: float,
+    lng2: float,
+) -> bytes:
+    """
+    Get the serialized point list for a bounding box, using cached tiles.
+
+    The result is the same JSON array as List[PointResponse], newest first.
+
+    Args:
+        db: Database session
+        lat1: Southwest latitude
+        lng1: Southwest longitude
+        lat2: Northeast latitude
+        lng2: Northeast longitude
+
+    Returns:
+        JSON array bytes
+    """
+    keys = tiles_for_bounds(lat1, lng1, lat2, lng2)
+    tiles = {key: point_cache.get(key) for key in keys}
+
+    missing = [key for key, entries in tiles.items() if entries is None]
+    if missing:
+        tiles.update(await _fill_tiles(db, missing))
+
+    # Tiles overhang the requested box, so trim to the exact bounds
+    entries = [
+        entry
+        for tile in tiles.values()
+        for entry in tile
+        if lat1 <= entry[2] <= lat2 and lng1 <= entry[3] <= lng2
+    ]
+    entries.sort(key=lambda entry: (entry[0], entry[1]), reverse=True)
+
+    return b"[" + b",".join(entry[4] for entry in entries) + b"]"
+
+
+def invalidate_point(lat: float, lng: float) -> int:
+    """
+    Drop the cached tiles containing a coordinate at every cache zoom level.
+
+    Args:
+        lat: Latitude of the changed point
+        lng: Longitude of the changed point
+
+    Returns:
+        Number of cached tiles removed
+    """
+    global _invalidation_count
+    _invalidation_count += 1
+
+    removed = 0
+    for zoom in range(settings.point_cache_min_zoom, settings.point_cache_max_zoom + 1):
+        if point_cache.pop(tile_for_point(lat, lng, zoom)):
+            removed += 1
+    return removed
+
+
+def _on_point_event(connection, pid, channel, payload) -> None:
+    """Handle a NOTIFY payload of the form {"lat": ..., "lng": ...}."""
+    try:
+        event = json.loads(payload)
+        removed = invalidate_point(float(event["lat"]), float(event["lng"]))
+        logger.debug(f"Point event {event}: invalidated {removed} cached tiles")
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring malformed point event {payload!r}: {e}")
+
+
+def _on_listener_terminated(connection) -> None:
+    """Drop everything (events may have been missed) and reconnect."""
+    global _listener_connection, _listener_task
+    logger.warning("Point event listener connection lost, clearing point cache")
+    point_cache.clear()
+    _listener_connection = None
+    _listener_task = asyncio.create_task(_connect_listener(LISTENER_RETRY_SECONDS))
+
+
+async def _connect_listener(delay: float = 0) -> None:
+    global _listener_connection
+    while _listener_connection is None:
+        await asyncio.sleep(delay)
+        delay = LISTENER_RETRY_SECONDS
+        try:
+            dsn = engine.url.set(drivername="postgresql").render_as_string(
+                hide_password=False
+            )
+            connection = await asyncpg.connect(dsn)
+            await connection.add_listener(
+                settings.point_events_channel, _on_point_event
+            )
+            connection.add_termination_listener(_on_listener_terminated)
+            _listener_connection = connection
+            logger.info(
+                f"Listening for point events on '{settings.point_events_channel}'"
+            )
+        except Exception as e:
+            logger.error(f"Failed to start point event listener: {e}")
+
+
+async def start_point_event_listener() -> None:
+    """
+    Start listening for point change events from the worker.
+    Cached tiles still expire after POINT_CACHE_TTL_SECONDS if this fails.
+    """
+    global _listener_task
+    _listener_task = asyncio.create_task(_connect_listener())
+
+
+async def stop_point_event_listener() -> None:
+    """Stop listening for point change events."""
+    global _listener_connection, _listener_task
+
+    if _listener_task is not None:
+        _listener_task.cancel()
+        _listener_task = None
+
+    if _listener_connection is not None:
+        connection, _listener_connection = _listener_connection, None
+        connection.remove_termination_listener(_on_listener_terminated)
+        await connection.close()
+
+
+async def _log_stats_loop() -> None:
+    while True:
+        await asyncio.sleep(settings.point_cache_stats_interval_seconds)
+        logger.info(f"Point cache stats: {point_cache.stats()}")
+
+
+def start_point_cache_stats() -> None:
+    """
+    Periodically log the cache's hit/miss/eviction counters.
+    Disabled when POINT_CACHE_STATS_INTERVAL_SECONDS is 0.
+    """
+    global _stats_task
+    if settings.point_cache_stats_interval_seconds > 0 and _stats_task is None:
+        _stats_task = asyncio.create_task(_log_stats_loop())
+
+
+def stop_point_cache_stats() -> None:
+    """Stop logging cache counters."""
+    global _stats_task
+    if _stats_task is not None:
+        _stats_task.cancel()
+        _stats_task = None
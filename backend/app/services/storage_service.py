@@ -1,53 +1,237 @@
+import asyncio
+import functools
+import logging
 import random
 import string
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import List, Optional
 
+from google.api_core.exceptions import NotFound
 from google.auth import default
+from google.auth.credentials import AnonymousCredentials
 from google.auth.transport import requests as auth_requests
 from google.cloud import storage
+from google.oauth2 import service_account
+from requests.adapters import HTTPAdapter
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+# Refresh the IAM signing token when it has less than this left
+CREDENTIALS_REFRESH_MARGIN = timedelta(minutes=5)
+
+# Seconds between background checks of the signing token
+CREDENTIALS_CHECK_INTERVAL = 60
+
+SIGNED_URL_EXPIRATION = timedelta(minutes=15)
+
+# Seconds shutdown waits for queued image deletions
+CLEANUP_SHUTDOWN_TIMEOUT = 10
+
 
 class StorageService:
-    """Service for handling Google Cloud Storage operations."""
+    """
+    Service for handling Google Cloud Storage operations.
+
+    The google-cloud-storage client is synchronous, so every network call runs
+    on a bounded thread pool and never blocks the event loop. The client's
+    HTTP session keeps one pooled connection per worker thread.
+    """
 
     def __init__(self):
-        self.client = storage.Client()
-        self.bucket = self.client.bucket(settings.gcs_bucket_name)
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.storage_max_workers, thread_name_prefix="gcs"
+        )
+
+        client_options = None
+        if settings.storage_emulator_host:
+            # Local fake GCS server (e.g. fake-gcs-server); URL signing unsupported
+            self.credentials = AnonymousCredentials()
+            project = settings.gcp_project_id
+            client_options = {"api_endpoint": settings.storage_emulator_host}
+        else:
+            # Default credentials also do IAM signing on Cloud Run
+            self.credentials, project = default(scopes=storage.Client.SCOPE)
+
+        # Size the connection pool to the thread pool so connections are reused
+        session = auth_requests.AuthorizedSession(self.credentials)
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=settings.storage_max_workers
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        self.client = storage.Client(
+            project=project or settings.gcp_project_id,
+            credentials=self.credentials,
+            _http=session,
+            client_options=client_options,
+        )
+
+        # A service account key (if configured) signs URLs locally, no IAM calls
+        self.signing_credentials = None
+        if settings.gcs_signing_key_file:
+            self.signing_credentials = (
+                service_account.Credentials.from_service_account_file(
+                    settings.gcs_signing_key_file
+                )
+            )
+        elif isinstance(self.credentials, service_account.Credentials):
+            self.signing_credentials = self.credentials
 
-        # Get default credentials for IAM signing on Cloud Run
-        self.credentials, _ = default()
+        self.bucket = self.client.bucket(settings.gcs_bucket_name)
         self.auth_request = auth_requests.Request()
+        self._refresher_task: Optional[asyncio.Task] = None
 
-    async def delete_image(self, image_url: str) -> bool:
+        # Background deletion of images whose points were deleted
+        self._cleanup_queue: Optional[asyncio.Queue] = None
+        self._cleanup_workers: List[asyncio.Task] = []
+
+    async def _run(self, func, *args, **kwargs):
+        """Run a blocking GCS call on the storage thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs)
+        )
+
+    def close(self) -> None:
+        """Release the thread pool and HTTP connections."""
+        self.executor.shutdown(wait=False)
+        self.client.close()
+
+    def _needs_refresh(self) -> bool:
+        """Check whether the IAM signing token is missing or about to expire."""
+        if not self.credentials.valid:
+            return True
+        expiry = self.credentials.expiry
+        return (
+            expiry is not None
+            and expiry - datetime.utcnow() < CREDENTIALS_REFRESH_MARGIN
+        )
+
+    async def _refresh_credentials_loop(self) -> None:
+        while True:
+            try:
+                if self._needs_refresh():
+                    await self._run(self.credentials.refresh, self.auth_request)
+            except Exception as e:
+                logger.warning(f"Failed to refresh signing credentials: {e}")
+            await asyncio.sleep(CREDENTIALS_CHECK_INTERVAL)
+
+    def start_credentials_refresher(self) -> None:
         """
-        Delete an image from GCS by its public URL.
+        Keep the IAM signing token fresh in the background, so signing a URL
+        never waits for a token refresh. Not needed when signing locally.
+        """
+        if self.signing_credentials is not None or settings.storage_emulator_host:
+            return
+        if self._refresher_task is None:
+            self._refresher_task = asyncio.create_task(self._refresh_credentials_loop())
+
+    def stop_credentials_refresher(self) -> None:
+        """Stop the background token refresh."""
+        if self._refresher_task is not None:
+            self._refresher_task.cancel()
+            self._refresher_task = None
+
+    def blob_name_from_url(self, image_url: str) -> Optional[str]:
+        """
+        Extract the blob name from a public image URL.
+        Format: https://storage.googleapis.com/bucket-name/path/to/file.jpg
 
         Args:
             image_url: Public URL of the image
 
         Returns:
-            True if deleted successfully, False otherwise
+            Blob name, or None if the URL is not in our bucket
         """
-        try:
-            # Extract blob name from URL
-            # Format: https://storage.googleapis.com/bucket-name/path/to/file.jpg
-            if settings.gcs_bucket_name not in image_url:
-                return False
+        prefix = f"{settings.gcs_bucket_name}/"
+        if prefix not in image_url:
+            return None
+        return image_url.split(prefix, 1)[1]
+
+    async def delete_image(self, image_url: str) -> bool:
+        """
+        Delete an image from GCS by its public URL.
 
-            blob_name = image_url.split(f"{settings.gcs_bucket_name}/")[1]
-            blob = self.bucket.blob(blob_name)
+        A single DELETE request is issued; a 404 means the image is already
+        gone.
 
-            if blob.exists():
-                blob.delete()
-                return True
+        Args:
+            image_url: Public URL of the image
+
+        Returns:
+            True if the image is gone (deleted now or already missing),
+            False otherwise
+        """
+        blob_name = self.blob_name_from_url(image_url)
+        if blob_name is None:
             return False
 
+        try:
+            await self._run(self.bucket.blob(blob_name).delete)
+            return True
+        except NotFound:
+            return True
         except Exception as e:
-            print(f"GCS delete error: {e}")
+            logger.error(f"GCS delete error: {e}")
             return False
 
+    def schedule_delete(self, image_url: str) -> None:
+        """
+        Queue an image for deletion in the background.
+
+        The caller doesn't wait for GCS; failed deletions are retried with
+        backoff up to STORAGE_CLEANUP_MAX_ATTEMPTS times.
+
+        Args:
+            image_url: Public URL of the image
+        """
+        if not self._cleanup_workers:
+            self._cleanup_queue = asyncio.Queue()
+            self._cleanup_workers = [
+                asyncio.create_task(self._cleanup_loop())
+                for _ in range(settings.storage_cleanup_workers)
+            ]
+        self._cleanup_queue.put_nowait(image_url)
+
+    async def _cleanup_loop(self) -> None:
+        while True:
+            image_url = await self._cleanup_queue.get()
+            try:
+                await self._delete_with_retries(image_url)
+            finally:
+                self._cleanup_queue.task_done()
+
+    async def _delete_with_retries(self, image_url: str) -> None:
+        if self.blob_name_from_url(image_url) is None:
+            logger.warning(f"Not deleting image outside our bucket: {image_url}")
+            return
+
+        for attempt in range(1, settings.storage_cleanup_max_attempts + 1):
+            if await self.delete_image(image_url):
+                logger.info(f"Deleted image: {image_url}")
+                return
+            if attempt < settings.storage_cleanup_max_attempts:
+                await asyncio.sleep(2**attempt)
+        logger.error(f"Giving up deleting image: {image_url}")
+
+    async def stop_cleanup(self) -> None:
+        """Finish queued image deletions (up to a timeout), then stop."""
+        if not self._cleanup_workers:
+            return
+        try:
+            await asyncio.wait_for(self._cleanup_queue.join(), CLEANUP_SHUTDOWN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Dropping {self._cleanup_queue.qsize()} queued image deletions"
+            )
+        for worker in self._cleanup_workers:
+            worker.cancel()
+        self._cleanup_workers = []
+
     def generate_filename(self, user_email: str) -> str:
         """
         Generate unique filename for upload.
@@ -64,7 +248,7 @@ class StorageService:
         random_id = "".join(random.choices(string.ascii_lowercase + string.digits, k=8))
         return f"uploads/{safe_email}/{timestamp}_{random_id}.jpg"
 
-    def generate_signed_upload_url(
+    async def generate_signed_upload_url(
         self,
         file_name: str,
         content_type: str,
@@ -91,8 +275,6 @@ class StorageService:
         Returns:
             Tuple of (signed_url, required_headers)
         """
-        blob = self.bucket.blob(file_name)
-
         # Custom metadata that will be attached to the blob
         metadata = {
             "user_id": str(user_id),
@@ -106,25 +288,34 @@ class StorageService:
             f"x-goog-meta-{key}": value for key, value in metadata.items()
         }
 
-        # For Cloud Run: Use IAM-based signing since compute engine credentials don't have private keys
-        # Refresh credentials to get a valid access token
-        if not self.credentials.valid:
-            self.credentials.refresh(self.auth_request)
+        if self.signing_credentials is not None:
+            sign_kwargs = {"credentials": self.signing_credentials}
+        else:
+            # For Cloud Run: Use IAM-based signing since compute engine credentials
+            # don't have private keys. The token is normally kept fresh by the
+            # background refresher; refresh here only if it hasn't run yet.
+            if not self.credentials.valid:
+                await self._run(self.credentials.refresh, self.auth_request)
+            sign_kwargs = {
+                "service_account_email": self.credentials.service_account_email,
+                "access_token": self.credentials.token,
+            }
 
-        # Generate signed URL for PUT operation using IAM signing
-        signed_url = blob.generate_signed_url(
+        # Signing is CPU work (local key) or an IAM signBlob call, so keep it
+        # off the event loop
+        signed_url = await self._run(
+            self.bucket.blob(file_name).generate_signed_url,
             version="v4",
-            expiration=timedelta(minutes=15),
+            expiration=SIGNED_URL_EXPIRATION,
             method="PUT",
             content_type=content_type,
             headers=required_headers,
-            service_account_email=self.credentials.service_account_email,
-            access_token=self.credentials.token,
+            **sign_kwargs,
         )
 
         return signed_url, required_headers
 
-    def download_image(self, file_name: str) -> bytes:
+    async def download_image(self, file_name: str) -> bytes:
         """
         Download an image from GCS by filename.
 
@@ -139,11 +330,12 @@ class StorageService:
         """
         try:
             blob = self.bucket.blob(file_name)
-            if not blob.exists():
-                raise Exception(f"File not found: {file_name}")
-            return blob.download_as_bytes()
+            return await self._run(blob.download_as_bytes)
+        except NotFound:
+            logger.error(f"GCS download error: file not found: {file_name}")
+            raise Exception(f"Failed to download image: File not found: {file_name}")
         except Exception as e:
-            print(f"GCS download error: {e}")
+            logger.error(f"GCS download error: {e}")
             raise Exception(f"Failed to download image: {str(e)}")
 
 
@@ -0,0 +1,237 @@
+"""
+Helpers shared by backend tests: throwaway signing keys and a seeded
+PostGIS schema.
+
+Nothing here imports the app at module level, so conftest can use it
+before settings are configured.
+"""
+
+import functools
+import json
+import random
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+
+@functools.lru_cache(maxsize=None)
+def private_key_pem(name: str = "default") -> bytes:
+    """Generate (once per name) an RSA private key in PKCS#8 PEM."""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+def certificate_pem(name: str = "default") -> str:
+    """Self-signed certificate for private_key_pem(name), as Google serves them."""
+    key = serialization.load_pem_private_key(private_key_pem(name), password=None)
+    subject = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, name)])
+    now = datetime.now(timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(subject)
+        .issuer_name(subject)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    return certificate.public_bytes(serialization.Encoding.PEM).decode()
+
+
+def service_account_info() -> str:
+    """Service account key file contents (JSON) for a throwaway key."""
+    return json.dumps(
+        {
+            "type": "service_account",
+            "project_id": "test-project",
+            "private_key_id": "test-key",
+            "private_key": private_key_pem().decode(),
+            "client_email": "test@test-project.iam.gserviceaccount.com",
+            "client_id": "1",
+            "token_uri": "https://oauth2.googleapis.com/token",
+        }
+    )
+
+
+async def create_schema(url: str):
+    """
+    Recreate the app's tables in an empty PostGIS database.
+
+    Args:
+        url: Database URL (postgresql+asyncpg://...)
+
+    Returns:
+        AsyncEngine without connection pooling (safe across event loops)
+    """
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    from app.db.models import Base
+
+    engine = create_async_engine(url, poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS postgis"))
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    return engine
+
+
+async def seed_points(
+    engine,
+    count: int,
+    users: int = 1,
+    bounds=(40.0, -74.5, 41.0, -73.5),
+    trash_ratio: float = 0.0,
+    seed: int = 0,
+) -> List[int]:
+    """
+    Insert users and randomly placed points.
+
+    Args:
+        engine: Engine from create_schema
+        count: Number of points
+        users: Number of users owning the points (round robin)
+        bounds: (lat1, lng1, lat2, lng2) box the points are placed in
+        trash_ratio: Share of points flagged is_trash
+        seed: Random seed, for reproducible datasets
+
+    Returns:
+        IDs of the created users
+    """
+    from sqlalchemy import insert, text
+
+    from app.db.models import Point, User
+
+    rng = random.Random(seed)
+    lat1, lng1, lat2, lng2 = bounds
+    now = datetime.now(timezone.utc)
+
+    async with engine.begin() as conn:
+        result = await conn.execute(
+            insert(User).returning(User.id),
+            [
+                {"email": f"user{i}@example.com", "name": f"User {i}"}
+                for i in range(users)
+            ],
+        )
+        user_ids = list(result.scalars())
+
+        rows = []
+        for i in range(count):
+            category = rng.randint(1, 4)
+            rows.append(
+                {
+                    "user_id": user_ids[i % users],
+                    "image_url": f"https://storage.googleapis.com/test-bucket/{i}.jpg",
+                    "location": f"POINT({rng.uniform(lng1, lng2)} "
+                    f"{rng.uniform(lat1, lat2)})",
+                    "weight": category / 4.0,
+                    "category": category,
+                    "is_trash": rng.random() < trash_ratio,
+                    "timestamp": now - timedelta(seconds=i),
+                }
+            )
+        for start in range(0, len(rows), 5000):
+            await conn.execute(insert(Point), rows[start : start + 5000])
+        await conn.execute(text("ANALYZE"))
+
+    return user_ids
+
+
+def _protobuf_fields(buf: bytes):
+    """Yield (field number, value) of a protobuf message; enough for MVT."""
+
+    def varint(i):
+        result = shift = 0
+        while True:
+            byte = buf[i]
+            result |= (byte & 0x7F) << shift
+            i += 1
+            if byte < 0x80:
+                return result, i
+            shift += 7
+
+    i = 0
+    while i < len(buf):
+        key, i = varint(i)
+        field, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, i = varint(i)
+        elif wire_type == 1:
+            value, i = struct.unpack("<d", buf[i : i + 8])[0], i + 8
+        elif wire_type == 2:
+            length, i = varint(i)
+            value, i = buf[i : i + length], i + length
+        elif wire_type == 5:
+            value, i = struct.unpack("<f", buf[i : i + 4])[0], i + 4
+        else:
+            raise ValueError(f"Unsupported wire type {wire_type}")
+        yield field, value
+
+
+def _packed_varints(buf: bytes) -> List[int]:
+    values, i = [], 0
+    while i < len(buf):
+        result = shift = 0
+        while True:
+            byte = buf[i]
+            result |= (byte & 0x7F) << shift
+            i += 1
+            shift += 7
+            if byte < 0x80:
+                break
+        values.append(result)
+    return values
+
+
+def _zigzag(value: int) -> int:
+    return (value >> 1) ^ -(value & 1)
+
+
+def decode_point_tile(tile: bytes) -> List[Tuple[dict, Tuple[int, int]]]:
+    """
+    Decode the point features of a Mapbox Vector Tile.
+
+    Returns:
+        (properties, (x, y) in tile coordinates) per feature
+    """
+    features = []
+    for field, layer in _protobuf_fields(tile):
+        if field != 3:
+            continue
+        keys, values, raw_features = [], [], []
+        for layer_field, value in _protobuf_fields(layer):
+            if layer_field == 2:
+                raw_features.append(value)
+            elif layer_field == 3:
+                keys.append(value.decode())
+            elif layer_field == 4:
+                # Value messages: string, float, double, int, uint, sint, bool
+                value_field, decoded = next(_protobuf_fields(value))
+                values.append(_zigzag(decoded) if value_field == 6 else decoded)
+
+        for raw in raw_features:
+            tags, geometry = [], []
+            for feature_field, value in _protobuf_fields(raw):
+                if feature_field == 2:
+                    tags = _packed_varints(value)
+                elif feature_field == 4:
+                    geometry = _packed_varints(value)
+            properties = {
+                keys[tags[i]]: values[tags[i + 1]] for i in range(0, len(tags), 2)
+            }
+            # MoveTo(1) command followed by one zigzag-encoded point
+            point = (_zigzag(geometry[1]), _zigzag(geometry[2]))
+            features.append((properties, point))
+    return features
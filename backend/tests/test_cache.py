@@ -0,0 +1,98 @@
+from unittest import mock
+
+from app.core.cache import BoundedCache
+
+
+def test_get_returns_default_on_miss():
+    cache = BoundedCache(max_cost=10)
+
+    assert cache.get("missing") is None
+    assert cache.get("missing", "default") == "default"
+    assert cache.misses == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = BoundedCache(max_cost=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.evictions == 1
+
+
+def test_eviction_is_bounded_by_cost():
+    cache = BoundedCache(max_cost=100)
+    cache.set("small", "x", cost=10)
+    cache.set("large", "y", cost=60)
+    cache.set("larger", "z", cost=50)
+
+    assert "small" not in cache
+    assert "large" not in cache
+    assert cache.stats()["cost"] == 50
+
+
+def test_entry_larger_than_cache_is_not_stored():
+    cache = BoundedCache(max_cost=10)
+    cache.set("a", 1, cost=5)
+    cache.set("huge", 2, cost=11)
+
+    assert "huge" not in cache
+    assert "a" in cache
+
+
+def test_overwrite_replaces_cost():
+    cache = BoundedCache(max_cost=10)
+    cache.set("a", 1, cost=8)
+    cache.set("a", 2, cost=3)
+
+    assert cache.get("a") == 2
+    assert cache.stats()["cost"] == 3
+
+
+def test_entries_expire_after_ttl():
+    cache = BoundedCache(max_cost=10, ttl=60)
+    with mock.patch("app.core.cache.time.monotonic", return_value=1000.0):
+        cache.set("a", 1)
+
+    with mock.patch("app.core.cache.time.monotonic", return_value=1059.0):
+        assert cache.get("a") == 1
+    with mock.patch("app.core.cache.time.monotonic", return_value=1060.0):
+        assert cache.get("a") is None
+        assert "a" not in cache
+
+
+def test_explicit_expiry_overrides_ttl():
+    cache = BoundedCache(max_cost=10, ttl=60)
+    with mock.patch("app.core.cache.time.monotonic", return_value=1000.0):
+        cache.set("a", 1, expires_at=1005.0)
+    with mock.patch("app.core.cache.time.monotonic", return_value=1005.0):
+        assert cache.get("a") is None
+
+
+def test_pop_and_clear():
+    cache = BoundedCache(max_cost=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.pop("a") is True
+    assert cache.pop("a") is False
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats()["cost"] == 0
+
+
+def test_stats_counts_hits_and_misses():
+    cache = BoundedCache(max_cost=10)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
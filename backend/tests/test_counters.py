@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.crud import delete_user_point
+from app.db.models import Point, User
+from tests.helpers import create_schema, seed_points
+
+POINTS_PER_UPLOAD = 250
+
+
+async def delete_point(engine, point_id: int, user_id: int):
+    # One session (and connection) per request, as in concurrent API calls
+    async with AsyncSession(engine) as db:
+        return await delete_user_point(db, point_id, user_id)
+
+
+@pytest.mark.postgis
+def test_counters_stay_exact_under_concurrent_deletes(postgis_url):
+    count = 40
+    deleted = 20
+
+    async def run():
+        engine = await create_schema(postgis_url)
+        try:
+            (user_id,) = await seed_points(engine, count)
+            async with engine.begin() as conn:
+                await conn.execute(
+                    update(User)
+                    .where(User.id == user_id)
+                    .values(total_points=count * POINTS_PER_UPLOAD, total_uploads=count)
+                )
+                point_ids = list(
+                    (await conn.execute(select(Point.id).order_by(Point.id))).scalars()
+                )
+
+            # Every delete is sent twice at once (e.g. a retried request)
+            results = await asyncio.gather(
+                *(
+                    delete_point(engine, point_id, user_id)
+                    for point_id in point_ids[:deleted]
+                    for _ in range(2)
+                )
+            )
+
+            async with AsyncSession(engine) as db:
+                user = await db.get(User, user_id)
+            return results, user
+        finally:
+            await engine.dispose()
+
+    results, user = asyncio.run(run())
+
+    assert sum(result is not None for result in results) == deleted
+    assert user.total_uploads == count - deleted
+    assert user.total_points == (count - deleted) * POINTS_PER_UPLOAD
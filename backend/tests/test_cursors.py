@@ -0,0 +1,113 @@
+import base64
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+import orjson
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.api.v1 import points
+from app.db.database import get_db
+from app.db.schemas import CurrentUser
+from app.services.auth import get_current_user
+
+PointRow = namedtuple(
+    "PointRow",
+    "id image_url lat lng weight category timestamp user_id",
+)
+
+START = datetime(2025, 1, 7, 10, 0, tzinfo=timezone.utc)
+
+
+def make_rows(count: int) -> list:
+    """Newest first, with timestamp ties broken by descending ID."""
+    rows = [
+        PointRow(
+            id=i,
+            image_url=f"https://storage.googleapis.com/test-bucket/{i}.jpg",
+            lat=40.5,
+            lng=-74.0,
+            weight=0.5,
+            category=2,
+            # Pairs of uploads share a timestamp
+            timestamp=START + timedelta(seconds=i // 2, microseconds=123),
+            user_id=7,
+        )
+        for i in range(1, count + 1)
+    ]
+    return sorted(rows, key=lambda row: (row.timestamp, row.id), reverse=True)
+
+
+def encode(value) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(value)).decode()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    rows = make_rows(25)
+
+    async def get_user_point_rows(db, user_id, limit=None, before=None):
+        page = [row for row in rows if not before or (row.timestamp, row.id) < before]
+        return page[:limit] if limit else page
+
+    monkeypatch.setattr(points, "get_user_point_rows", get_user_point_rows)
+    app = FastAPI()
+    app.include_router(points.router, prefix="/points")
+    app.dependency_overrides[get_current_user] = lambda: CurrentUser(
+        id=7, email="user@example.com"
+    )
+    app.dependency_overrides[get_db] = lambda: None
+    return TestClient(app)
+
+
+def test_cursor_round_trip():
+    row = make_rows(3)[1]
+
+    assert points._decode_cursor(points._encode_cursor(row)) == (
+        row.timestamp,
+        row.id,
+    )
+
+
+def test_pages_cover_every_upload_once(client):
+    ids, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 10, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/points/my-uploads", params=params)
+        assert response.status_code == 200
+        ids += [point["id"] for point in response.json()]
+        pages += 1
+        cursor = response.headers.get(points.NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert ids == [row.id for row in make_rows(25)]
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        "é",
+        base64.urlsafe_b64encode(b"not json").decode(),
+        encode({"timestamp": "2025-01-07T10:00:00+00:00", "id": 1}),
+        encode(["2025-01-07T10:00:00+00:00"]),
+        encode([1, 2]),
+        encode(["yesterday", 1]),
+        encode(["2025-01-07T10:00:00+00:00", "one"]),
+        encode(["2025-01-07T10:00:00+00:00", None]),
+        encode(["2025-01-07T10:00:00+00:00", 0]),
+        encode(["2025-01-07T10:00:00+00:00", 2**63]),
+        encode(["2025-01-07T10:00:00", 1]),  # No timezone
+        base64.urlsafe_b64encode(b'["2025-01-07T10:00:00+00:00", 1e999]').decode(),
+    ],
+)
+def test_malformed_cursor_is_a_bad_request(client, cursor):
+    with pytest.raises(HTTPException) as error:
+        points._decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+    response = client.get("/points/my-uploads", params={"cursor": cursor})
+    assert response.status_code == 400
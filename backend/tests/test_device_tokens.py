@@ -0,0 +1,54 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import notifications
+from app.db.database import get_db
+from app.db.schemas import CurrentUser
+from app.services.auth import get_current_user
+
+USER = CurrentUser(id=7, email="user@example.com")
+
+
+@pytest.fixture
+def deletes(monkeypatch):
+    calls = []
+
+    async def delete_user_devices(db, user_id, token=None):
+        calls.append((user_id, token))
+        return 1
+
+    monkeypatch.setattr(notifications, "delete_user_devices", delete_user_devices)
+    return calls
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(notifications.router, prefix="/notifications")
+    app.dependency_overrides[get_current_user] = lambda: USER
+    app.dependency_overrides[get_db] = lambda: None
+    return TestClient(app)
+
+
+def test_unregister_token_removes_only_that_device(client, deletes):
+    response = client.delete(
+        "/notifications/unregister-token", params={"fcm_token": "phone"}
+    )
+
+    assert response.status_code == 200
+    assert deletes == [(7, "phone")]
+
+
+def test_unregister_token_without_token_removes_all_devices(client, deletes):
+    response = client.delete("/notifications/unregister-token")
+
+    assert response.status_code == 200
+    assert deletes == [(7, None)]
+
+
+def test_unregister_all_tokens_removes_all_devices(client, deletes):
+    response = client.delete("/notifications/unregister-all-tokens")
+
+    assert response.status_code == 200
+    assert deletes == [(7, None)]
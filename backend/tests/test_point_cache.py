@@ -0,0 +1,200 @@
+import asyncio
+import random
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.cache import BoundedCache
+from app.core.config import settings
+from app.db.serializers import point_rows_to_json
+from app.services import point_cache as point_cache_module
+from app.services.point_cache import (
+    get_points_json,
+    invalidate_point,
+    point_cache,
+    tile_bounds,
+    tile_for_point,
+    tiles_for_bounds,
+)
+
+
+def test_tile_bounds_contain_their_points():
+    for lat, lng in [(40.7, -74.0), (-33.9, 151.2), (0.0, 0.0), (89.9, 179.9)]:
+        for zoom in range(settings.point_cache_min_zoom, 10):
+            lat1, lng1, lat2, lng2 = tile_bounds(tile_for_point(lat, lng, zoom))
+            assert lat1 <= lat <= lat2
+            assert lng1 <= lng <= lng2
+
+
+def test_tiles_for_bounds_covers_the_box_with_few_tiles():
+    box = (40.0, -74.5, 41.0, -73.5)
+    keys = tiles_for_bounds(*box)
+    zooms = {zoom for zoom, _, _ in keys}
+
+    assert len(zooms) == 1
+    assert len({x for _, x, _ in keys}) <= 4
+    assert len({y for _, _, y in keys}) <= 4
+
+    tiles = [tile_bounds(key) for key in keys]
+    assert min(t[0] for t in tiles) <= box[0]
+    assert min(t[1] for t in tiles) <= box[1]
+    assert max(t[2] for t in tiles) >= box[2]
+    assert max(t[3] for t in tiles) >= box[3]
+
+
+def test_invalidate_point_drops_only_tiles_containing_it():
+    point_cache.clear()
+    zoom = settings.point_cache_min_zoom + 4
+    here = tile_for_point(40.7, -74.0, zoom)
+    elsewhere = tile_for_point(-33.9, 151.2, zoom)
+    point_cache.set(here, [])
+    point_cache.set(elsewhere, [])
+
+    removed = invalidate_point(40.7, -74.0)
+
+    assert removed == 1
+    assert here not in point_cache
+    assert elsewhere in point_cache
+    point_cache.clear()
+
+
+PointRow = namedtuple(
+    "PointRow",
+    "id image_url lat lng weight category timestamp user_id",
+)
+
+VIEWPORT = (40.0, -74.5, 41.0, -73.5)
+
+
+def make_rows(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 7, 10, 0, tzinfo=timezone.utc)
+    return [
+        PointRow(
+            id=i,
+            image_url=f"https://storage.googleapis.com/test-bucket/{i}.jpg",
+            # Spill over the viewport, so trimming to the bounds matters
+            lat=rng.uniform(39.5, 41.5),
+            lng=rng.uniform(-75.0, -73.0),
+            weight=0.5,
+            category=2,
+            timestamp=start + timedelta(seconds=rng.randint(0, 10**6)),
+            user_id=1,
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def expected_json(rows, lat1, lng1, lat2, lng2) -> bytes:
+    visible = [
+        row for row in rows if lat1 <= row.lat <= lat2 and lng1 <= row.lng <= lng2
+    ]
+    visible.sort(key=lambda row: (row.timestamp, row.id), reverse=True)
+    return point_rows_to_json(visible)
+
+
+class FakeDatabase:
+    """Stands in for get_point_rows_in_bounds and records each query."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+        self.during_query = None
+
+    async def get_point_rows_in_bounds(self, db, lat1, lng1, lat2, lng2):
+        self.queries.append((lat1, lng1, lat2, lng2))
+        if self.during_query is not None:
+            self.during_query()
+        return [
+            row
+            for row in self.rows
+            if lat1 <= row.lat <= lat2 and lng1 <= row.lng <= lng2
+        ]
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase(make_rows(500))
+    monkeypatch.setattr(
+        point_cache_module,
+        "get_point_rows_in_bounds",
+        database.get_point_rows_in_bounds,
+    )
+    monkeypatch.setattr(point_cache_module, "point_cache", BoundedCache(max_cost=10**8))
+    return database
+
+
+def test_cold_viewport_is_loaded_with_one_query(database):
+    body = asyncio.run(get_points_json(None, *VIEWPORT))
+
+    assert body == expected_json(database.rows, *VIEWPORT)
+    assert len(database.queries) == 1
+    assert point_cache_module.point_cache.misses == len(tiles_for_bounds(*VIEWPORT))
+
+
+def test_warm_viewport_is_served_from_cache(database):
+    async def run():
+        first = await get_points_json(None, *VIEWPORT)
+        second = await get_points_json(None, *VIEWPORT)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert second == first
+    assert len(database.queries) == 1
+    assert point_cache_module.point_cache.hits == len(tiles_for_bounds(*VIEWPORT))
+
+
+def test_overlapping_viewport_loads_only_missing_tiles(database):
+    panned = (40.0, -74.0, 41.0, -73.0)
+
+    async def run():
+        await get_points_json(None, *VIEWPORT)
+        return await get_points_json(None, *panned)
+
+    body = asyncio.run(run())
+
+    assert body == expected_json(database.rows, *panned)
+    assert len(database.queries) == 2
+    cached = set(tiles_for_bounds(*VIEWPORT))
+    missing = [key for key in tiles_for_bounds(*panned) if key not in cached]
+    bounds = [tile_bounds(key) for key in missing]
+    assert database.queries[1] == (
+        min(b[0] for b in bounds),
+        min(b[1] for b in bounds),
+        max(b[2] for b in bounds),
+        max(b[3] for b in bounds),
+    )
+
+
+def test_fill_racing_an_invalidation_is_not_cached(database):
+    database.during_query = lambda: invalidate_point(40.5, -74.0)
+
+    async def run():
+        first = await get_points_json(None, *VIEWPORT)
+        database.during_query = None
+        second = await get_points_json(None, *VIEWPORT)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first == second == expected_json(database.rows, *VIEWPORT)
+    assert len(database.queries) == 2
+
+
+def test_new_point_is_visible_after_invalidation(database):
+    new_point = make_rows(1, seed=1)[0]._replace(
+        id=10_000, lat=40.5, lng=-74.0, timestamp=datetime.now(timezone.utc)
+    )
+
+    async def run():
+        await get_points_json(None, *VIEWPORT)
+        database.rows.append(new_point)
+        invalidate_point(new_point.lat, new_point.lng)
+        return await get_points_json(None, *VIEWPORT)
+
+    body = asyncio.run(run())
+
+    assert body == expected_json(database.rows, *VIEWPORT)
+    assert body.startswith(b'[{"id":10000,')
@@ -0,0 +1,107 @@
+"""
+Point read paths against a seeded PostGIS database.
+
+The benchmark compares the per-viewport latency of the original read path
+(ORM entities plus two coordinate SELECTs per row) with the single
+projected query:
+
+    TEST_DATABASE_URL=postgresql+asyncpg://... pytest -m benchmark -s
+"""
+
+import asyncio
+import time
+
+import pytest
+from geoalchemy2 import Geometry
+from geoalchemy2.functions import ST_X, ST_Y, ST_MakeEnvelope
+from sqlalchemy import cast, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.crud import get_points_in_bounds, get_user_points
+from app.db.models import Point
+from app.db.schemas import LocationSchema, PointResponse
+from tests.helpers import create_schema, seed_points
+
+VIEWPORT = (40.0, -74.5, 41.0, -73.5)
+
+
+async def get_points_in_bounds_per_row(db: AsyncSession, lat1, lng1, lat2, lng2):
+    """The read path before single-query projection, for comparison."""
+    bbox = ST_MakeEnvelope(lng1, lat1, lng2, lat2, 4326)
+    result = await db.execute(
+        select(Point)
+        .where(Point.geom.op("&&")(bbox), Point.is_trash == False)
+        .order_by(Point.timestamp.desc())
+    )
+
+    points = []
+    for point in result.scalars().all():
+        geometry = cast(Point.location, Geometry)
+        lat = await db.scalar(select(ST_Y(geometry)).where(Point.id == point.id))
+        lng = await db.scalar(select(ST_X(geometry)).where(Point.id == point.id))
+        points.append(
+            PointResponse(
+                id=point.id,
+                image_url=point.image_url,
+                location=LocationSchema(lat=lat, lng=lng),
+                weight=point.weight,
+                category=point.category,
+                timestamp=point.timestamp,
+                user_id=point.user_id,
+            )
+        )
+    return points
+
+
+@pytest.mark.postgis
+def test_projected_reads_match_per_row_reads(postgis_url):
+    async def run():
+        engine = await create_schema(postgis_url)
+        try:
+            user_ids = await seed_points(engine, 300, users=2, trash_ratio=0.1)
+            async with AsyncSession(engine) as db:
+                projected = await get_points_in_bounds(db, *VIEWPORT)
+                per_row = await get_points_in_bounds_per_row(db, *VIEWPORT)
+                uploads = await get_user_points(db, user_ids[0])
+        finally:
+            await engine.dispose()
+        return projected, per_row, uploads
+
+    projected, per_row, uploads = asyncio.run(run())
+
+    assert projected == per_row
+    assert len(projected) > 0
+    # A user's uploads include trash-flagged points and are newest first
+    assert len(uploads) == 150
+    assert [p.timestamp for p in uploads] == sorted(
+        (p.timestamp for p in uploads), reverse=True
+    )
+
+
+@pytest.mark.postgis
+@pytest.mark.benchmark
+@pytest.mark.parametrize("count", [500, 5000])
+def test_viewport_latency(postgis_url, count):
+    async def timed(db, query, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            points = await query(db, *VIEWPORT)
+        return (time.perf_counter() - started) / repeat, len(points)
+
+    async def run():
+        engine = await create_schema(postgis_url)
+        try:
+            await seed_points(engine, count)
+            async with AsyncSession(engine) as db:
+                before, n = await timed(db, get_points_in_bounds_per_row, 1)
+                after, _ = await timed(db, get_points_in_bounds, 5)
+        finally:
+            await engine.dispose()
+        return before, after, n
+
+    before, after, n = asyncio.run(run())
+    print(
+        f"\n{n} points/viewport: per-row {before * 1000:.1f} ms, "
+        f"projected {after * 1000:.1f} ms ({before / after:.0f}x)"
+    )
+    assert after < before
@@ -0,0 +1,135 @@
+"""
+Row serializers must produce exactly the bytes of the Pydantic path.
+
+The benchmark compares both paths at 1k, 10k and 100k points:
+
+    pytest -m benchmark -s tests/test_serializers.py
+"""
+
+import random
+import struct
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.db.crud import point_row_to_response
+from app.db.schemas import PointResponse
+from app.db.serializers import (
+    POINTS_BINARY_MAGIC,
+    compact_point_rows_to_binary,
+    point_row_to_json,
+    point_rows_to_json,
+    point_rows_to_ndjson,
+)
+
+points_adapter = TypeAdapter(List[PointResponse])
+
+
+def make_rows(count: int, seed: int = 0) -> list:
+    """(id, image_url, lat, lng, weight, category, timestamp, user_id) rows."""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 7, 10, 0, tzinfo=timezone.utc)
+    rows = []
+    for i in range(count):
+        category = rng.randint(1, 4)
+        rows.append(
+            (
+                i + 1,
+                f"https://storage.googleapis.com/bucket/uploads/u_{i}/img.jpg",
+                rng.uniform(-90, 90),
+                rng.uniform(-180, 180),
+                category / 4.0,
+                category,
+                # Mix whole seconds and microseconds
+                start + timedelta(seconds=i, microseconds=(i % 3) * 12345),
+                rng.randint(1, 50),
+            )
+        )
+    return rows
+
+
+def pydantic_response_body(rows) -> bytes:
+    """What FastAPI sends for response_model=List[PointResponse]."""
+    points = [point_row_to_response(row) for row in rows]
+    content = points_adapter.dump_python(
+        points_adapter.validate_python(points), mode="json"
+    )
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def test_point_rows_to_json_matches_fastapi_response():
+    rows = make_rows(200)
+    assert point_rows_to_json(rows) == pydantic_response_body(rows)
+
+
+def test_point_rows_to_json_matches_pydantic_dump_json():
+    rows = make_rows(200)
+    points = [point_row_to_response(row) for row in rows]
+    assert point_rows_to_json(rows) == points_adapter.dump_json(points)
+
+
+def test_point_row_to_json_matches_model_dump_json():
+    for row in make_rows(20):
+        assert (
+            point_row_to_json(row)
+            == point_row_to_response(row).model_dump_json().encode()
+        )
+
+
+def test_empty_list():
+    assert point_rows_to_json([]) == pydantic_response_body([]) == b"[]"
+
+
+def test_ndjson_has_one_point_per_line():
+    rows = make_rows(5)
+    lines = point_rows_to_ndjson(rows).split(b"\n")
+
+    assert lines[-1] == b""
+    assert lines[:-1] == [point_row_to_json(row) for row in rows]
+
+
+def test_compact_binary_layout():
+    rows = [(7, 40.5, -74.25, 3), (8, -33.5, 151.0, 1)]
+    data = compact_point_rows_to_binary(rows)
+
+    assert data[:4] == POINTS_BINARY_MAGIC
+    (count,) = struct.unpack_from("<I", data, 4)
+    assert count == 2
+    lats = struct.unpack_from("<2f", data, 8)
+    lngs = struct.unpack_from("<2f", data, 16)
+    ids = struct.unpack_from("<2I", data, 24)
+    assert lats == (40.5, -33.5)
+    assert lngs == (-74.25, 151.0)
+    assert ids == (7, 8)
+    assert data[32:] == bytes([3, 1])
+
+
+def test_compact_binary_empty():
+    data = compact_point_rows_to_binary([])
+    assert data == POINTS_BINARY_MAGIC + struct.pack("<I", 0)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("count", [1_000, 10_000, 100_000])
+def test_serializer_speed(count):
+    rows = make_rows(count)
+
+    started = time.perf_counter()
+    expected = pydantic_response_body(rows)
+    pydantic_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    body = point_rows_to_json(rows)
+    orjson_seconds = time.perf_counter() - started
+
+    assert body == expected
+    print(
+        f"\n{count} points: pydantic {pydantic_seconds * 1000:.0f} ms, "
+        f"orjson {orjson_seconds * 1000:.0f} ms "
+        f"({pydantic_seconds / orjson_seconds:.0f}x)"
+    )
@@ -0,0 +1,101 @@
+import asyncio
+import json
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from google.oauth2 import service_account
+
+from app.api.v1 import upload
+from app.core.config import settings
+from app.db.schemas import CurrentUser
+from app.services.auth import get_current_user
+from app.services.storage_service import storage_service
+from tests.helpers import service_account_info
+
+USER = CurrentUser(id=7, email="user@example.com")
+
+
+@pytest.fixture(autouse=True)
+def local_signing(monkeypatch):
+    """Sign with a throwaway service account key, so no IAM call is made."""
+    credentials = service_account.Credentials.from_service_account_info(
+        json.loads(service_account_info())
+    )
+    monkeypatch.setattr(storage_service, "signing_credentials", credentials)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(upload.router, prefix="/upload")
+    app.dependency_overrides[get_current_user] = lambda: USER
+    return TestClient(app)
+
+
+def test_signed_upload_url_is_v4_with_metadata_headers():
+    url, headers = asyncio.run(
+        storage_service.generate_signed_upload_url(
+            file_name="uploads/a.jpg",
+            content_type="image/jpeg",
+            user_id=7,
+            latitude=40.5,
+            longitude=-74.25,
+        )
+    )
+
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    assert parsed.path == f"/{settings.gcs_bucket_name}/uploads/a.jpg"
+    assert query["X-Goog-Algorithm"] == ["GOOG4-RSA-SHA256"]
+    assert query["X-Goog-Credential"][0].startswith(
+        "test@test-project.iam.gserviceaccount.com/"
+    )
+    assert query["X-Goog-Expires"] == ["900"]
+    assert query["X-Goog-Signature"][0]
+    assert "x-goog-meta-user_id" in query["X-Goog-SignedHeaders"][0]
+
+    assert headers["x-goog-meta-user_id"] == "7"
+    assert headers["x-goog-meta-latitude"] == "40.5"
+    assert headers["x-goog-meta-longitude"] == "-74.25"
+    assert "x-goog-meta-uploaded_at" in headers
+
+
+def test_signed_url_endpoint(client):
+    response = client.post("/upload/signed-url", params={"lat": 40.5, "lng": -74.25})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["file_name"].startswith("uploads/user_example_com/")
+    assert "X-Goog-Signature=" in body["upload_url"]
+    assert body["expires_in"] == upload.SIGNED_URL_EXPIRES_IN
+    assert body["required_headers"]["x-goog-meta-user_id"] == "7"
+
+
+def test_batch_endpoint_returns_urls_in_request_order(client):
+    uploads = [{"lat": i, "lng": -i, "content_type": "image/png"} for i in range(5)]
+
+    response = client.post("/upload/signed-urls", json={"uploads": uploads})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body) == 5
+    assert [r["required_headers"]["x-goog-meta-latitude"] for r in body] == [
+        str(float(i)) for i in range(5)
+    ]
+    assert len({r["file_name"] for r in body}) == 5
+
+
+def test_batch_endpoint_rejects_oversized_batch(client):
+    uploads = [{"lat": 0, "lng": 0}] * (settings.signed_url_batch_max + 1)
+
+    response = client.post("/upload/signed-urls", json={"uploads": uploads})
+
+    assert response.status_code == 400
+
+
+def test_batch_endpoint_rejects_empty_batch(client):
+    response = client.post("/upload/signed-urls", json={"uploads": []})
+
+    assert response.status_code == 422
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+from google.api_core.exceptions import NotFound, ServiceUnavailable
+
+from app.core.config import settings
+from app.services import storage_service as storage_module
+from app.services.storage_service import StorageService
+
+BUCKET_URL = f"https://storage.googleapis.com/{settings.gcs_bucket_name}"
+
+
+class FakeBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+
+    def delete(self):
+        self.bucket.deletes.append(self.name)
+        outcomes = self.bucket.outcomes.get(self.name)
+        if outcomes:
+            error = outcomes.pop(0)
+            if error is not None:
+                raise error
+
+
+class FakeBucket:
+    """Records deletions; outcomes maps blob names to errors raised in turn."""
+
+    def __init__(self, **outcomes):
+        self.outcomes = outcomes
+        self.deletes = []
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    real_sleep = asyncio.sleep
+
+    async def no_backoff(seconds):
+        await real_sleep(0)
+
+    monkeypatch.setattr(storage_module.asyncio, "sleep", no_backoff)
+    service = StorageService()
+    yield service
+    service.close()
+
+
+def test_delete_image_treats_missing_blob_as_deleted(service):
+    service.bucket = FakeBucket(**{"a.jpg": [NotFound("gone")]})
+
+    assert asyncio.run(service.delete_image(f"{BUCKET_URL}/a.jpg"))
+    assert service.bucket.deletes == ["a.jpg"]
+
+
+def test_delete_image_reports_other_errors(service):
+    service.bucket = FakeBucket(**{"a.jpg": [ServiceUnavailable("busy")]})
+
+    assert not asyncio.run(service.delete_image(f"{BUCKET_URL}/a.jpg"))
+
+
+def test_delete_image_ignores_urls_outside_bucket(service):
+    service.bucket = FakeBucket()
+
+    assert not asyncio.run(service.delete_image("https://example.com/a.jpg"))
+    assert service.bucket.deletes == []
+
+
+def test_scheduled_delete_retries_until_success(service):
+    service.bucket = FakeBucket(
+        **{"a.jpg": [ServiceUnavailable("busy"), ServiceUnavailable("busy"), None]}
+    )
+
+    async def run():
+        service.schedule_delete(f"{BUCKET_URL}/a.jpg")
+        await service.stop_cleanup()
+
+    asyncio.run(run())
+
+    assert service.bucket.deletes == ["a.jpg"] * 3
+
+
+def test_scheduled_delete_gives_up_after_max_attempts(service, monkeypatch):
+    monkeypatch.setattr(settings, "storage_cleanup_max_attempts", 2)
+    service.bucket = FakeBucket(**{"a.jpg": [ServiceUnavailable("busy")] * 5})
+
+    async def run():
+        service.schedule_delete(f"{BUCKET_URL}/a.jpg")
+        await service.stop_cleanup()
+
+    asyncio.run(run())
+
+    assert service.bucket.deletes == ["a.jpg"] * 2
+
+
+def test_scheduled_delete_skips_urls_outside_bucket(service):
+    service.bucket = FakeBucket()
+
+    async def run():
+        service.schedule_delete("https://example.com/other-bucket/a.jpg")
+        await service.stop_cleanup()
+
+    asyncio.run(run())
+
+    assert service.bucket.deletes == []
+
+
+def test_stop_cleanup_drains_queue_and_stops_workers(service):
+    service.bucket = FakeBucket()
+
+    async def run():
+        for i in range(20):
+            service.schedule_delete(f"{BUCKET_URL}/{i}.jpg")
+        workers = list(service._cleanup_workers)
+        await service.stop_cleanup()
+        await asyncio.sleep(0)
+        return workers
+
+    workers = asyncio.run(run())
+
+    assert sorted(service.bucket.deletes) == sorted(f"{i}.jpg" for i in range(20))
+    assert service._cleanup_workers == []
+    assert all(worker.cancelled() or worker.done() for worker in workers)
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.crud import WEB_MERCATOR_HALF_WIDTH, get_points_tile
+from tests.helpers import create_schema, decode_point_tile, seed_points
+
+# At zoom 3 with 60px cells a tile has 4x4 cells of ~1252344.27m, not a whole
+# number of meters, so a truncated cell size would shift the grid
+Z, X, Y = 3, 2, 2
+CELL_SIZE_PX = 60
+CELLS_PER_TILE = 4
+EXTENT = 4096
+
+# Points this far inside a cell edge still belong to that cell
+INSET_METERS = 0.1
+
+
+@pytest.mark.postgis
+def test_cluster_cells_line_up_with_tile_edges(postgis_url):
+    tile_width = 2 * WEB_MERCATOR_HALF_WIDTH / 2**Z
+    cell_size = tile_width / CELLS_PER_TILE
+    xmin = -WEB_MERCATOR_HALF_WIDTH + X * tile_width
+    ymax = WEB_MERCATOR_HALF_WIDTH - Y * tile_width
+
+    # Four points per cell, just inside its corners: the cell centroid is its center
+    corners = []
+    for column in range(CELLS_PER_TILE):
+        for row in range(CELLS_PER_TILE):
+            left = xmin + column * cell_size
+            top = ymax - row * cell_size
+            for x in (left + INSET_METERS, left + cell_size - INSET_METERS):
+                for y in (top - INSET_METERS, top - cell_size + INSET_METERS):
+                    corners.append({"x": x, "y": y})
+
+    async def run():
+        engine = await create_schema(postgis_url)
+        try:
+            (user_id,) = await seed_points(engine, 0)
+            async with engine.begin() as conn:
+                await conn.execute(
+                    text("""
+                        INSERT INTO points
+                            (user_id, image_url, location, weight, category, is_trash)
+                        VALUES (
+                            :user_id,
+                            'https://storage.googleapis.com/test-bucket/a.jpg',
+                            ST_Transform(
+                                ST_SetSRID(ST_MakePoint(:x, :y), 3857), 4326
+                            )::geography,
+                            0.5, 2, false
+                        )
+                    """),
+                    [{"user_id": user_id, **corner} for corner in corners],
+                )
+            async with AsyncSession(engine) as db:
+                return await get_points_tile(
+                    db, Z, X, Y, cluster_max_zoom=Z + 1, cell_size_px=CELL_SIZE_PX
+                )
+        finally:
+            await engine.dispose()
+
+    features = decode_point_tile(asyncio.run(run()))
+
+    cell_extent = EXTENT // CELLS_PER_TILE
+    centers = {cell_extent // 2 + i * cell_extent for i in range(CELLS_PER_TILE)}
+    assert len(features) == CELLS_PER_TILE**2
+    for properties, (x, y) in features:
+        assert properties["count"] == 4
+        assert x in centers and y in centers
@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+import pytest
+from google.auth import crypt, jwt
+
+from app.services.token_verifier import MIN_CERTS_REFRESH_INTERVAL, GoogleTokenVerifier
+from tests.helpers import certificate_pem, private_key_pem
+
+AUDIENCE = "test-client-id"
+
+
+def sign(key_name="default", key_id="key-1", **claims):
+    now = int(time.time())
+    payload = {
+        "iss": "https://accounts.google.com",
+        "aud": AUDIENCE,
+        "sub": "1234",
+        "email": "user@example.com",
+        "iat": now,
+        "exp": now + 3600,
+    }
+    payload.update(claims)
+    signer = crypt.RSASigner.from_string(private_key_pem(key_name), key_id)
+    return jwt.encode(signer, payload).decode()
+
+
+class FakeCerts:
+    """Certificate endpoint serving whichever keys are currently published."""
+
+    def __init__(self, **keys):
+        self.keys = keys
+        self.fetches = 0
+
+    async def __call__(self):
+        self.fetches += 1
+        return {kid: certificate_pem(name) for kid, name in self.keys.items()}, 300
+
+
+def test_valid_token_is_verified():
+    certs = FakeCerts(**{"key-1": "default"})
+    verifier = GoogleTokenVerifier(audience=AUDIENCE, fetch_certs=certs)
+
+    claims = asyncio.run(verifier.verify(sign()))
+
+    assert claims["email"] == "user@example.com"
+    assert claims["aud"] == AUDIENCE
+
+
+def test_certs_and_claims_are_cached():
+    certs = FakeCerts(**{"key-1": "default"})
+    verifier = GoogleTokenVerifier(audience=AUDIENCE, fetch_certs=certs)
+    token = sign()
+
+    async def verify_twice():
+        first = await verifier.verify(token)
+        second = await verifier.verify(token)
+        await verifier.verify(sign(sub="5678"))
+        return first, second
+
+    first, second = asyncio.run(verify_twice())
+
+    assert second is first
+    assert certs.fetches == 1
+
+
+def test_wrong_audience_is_rejected():
+    verifier = GoogleTokenVerifier(
+        audience=AUDIENCE, fetch_certs=FakeCerts(**{"key-1": "default"})
+    )
+
+    with pytest.raises(ValueError):
+        asyncio.run(verifier.verify(sign(aud="someone-else")))
+
+
+def test_expired_token_is_rejected():
+    verifier = GoogleTokenVerifier(
+        audience=AUDIENCE, fetch_certs=FakeCerts(**{"key-1": "default"})
+    )
+    now = int(time.time())
+
+    with pytest.raises(ValueError):
+        asyncio.run(verifier.verify(sign(iat=now - 7200, exp=now - 3600)))
+
+
+def test_signature_from_another_key_is_rejected():
+    verifier = GoogleTokenVerifier(
+        audience=AUDIENCE, fetch_certs=FakeCerts(**{"key-1": "default"})
+    )
+
+    with pytest.raises(ValueError):
+        asyncio.run(verifier.verify(sign(key_name="attacker")))
+
+
+def test_unknown_key_id_refetches_rotated_certs():
+    certs = FakeCerts(**{"key-1": "default"})
+    verifier = GoogleTokenVerifier(audience=AUDIENCE, fetch_certs=certs)
+
+    async def rotate():
+        await verifier.verify(sign())
+        certs.keys = {"key-2": "rotated"}
+        # Forced refreshes are rate limited; pretend the last one is old
+        verifier._certs_fetched_at -= MIN_CERTS_REFRESH_INTERVAL
+        return await verifier.verify(sign(key_name="rotated", key_id="key-2"))
+
+    claims = asyncio.run(rotate())
+
+    assert claims["sub"] == "1234"
+    assert certs.fetches == 2
+
+
+def test_unknown_key_id_refetch_is_rate_limited():
+    certs = FakeCerts(**{"key-1": "default"})
+    verifier = GoogleTokenVerifier(audience=AUDIENCE, fetch_certs=certs)
+
+    async def verify_unknown():
+        await verifier.verify(sign())
+        await verifier.verify(sign(key_id="key-9"))
+
+    with pytest.raises(ValueError):
+        asyncio.run(verify_unknown())
+    assert certs.fetches == 1
@@ -0,0 +1,100 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import BoundedCache
+from app.db.crud import upsert_user
+from app.db.schemas import CurrentUser
+from app.services import auth
+from tests.helpers import create_schema
+
+
+@pytest.fixture
+def upserts(monkeypatch):
+    calls = []
+
+    async def upsert_user(db, email, name=None, picture=None):
+        calls.append((email, name, picture))
+        return SimpleNamespace(id=7, email=email, name=name, picture=picture)
+
+    monkeypatch.setattr(auth, "upsert_user", upsert_user)
+    monkeypatch.setattr(auth, "_user_cache", BoundedCache(max_cost=100))
+    return calls
+
+
+def test_cache_miss_upserts_the_user(upserts):
+    user = asyncio.run(auth.resolve_user(None, "a@example.com", "A", "pic"))
+
+    assert user == CurrentUser(id=7, email="a@example.com", name="A", picture="pic")
+    assert upserts == [("a@example.com", "A", "pic")]
+
+
+def test_cache_hit_skips_the_database(upserts):
+    async def run():
+        first = await auth.resolve_user(None, "a@example.com", "A", "pic")
+        # Tokens without name/picture claims don't invalidate the snapshot
+        second = await auth.resolve_user(None, "a@example.com", "A", "pic")
+        third = await auth.resolve_user(None, "a@example.com", None, None)
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+
+    assert second is first and third is first
+    assert len(upserts) == 1
+
+
+def test_changed_profile_is_upserted_again(upserts):
+    async def run():
+        await auth.resolve_user(None, "a@example.com", "A", "pic")
+        return await auth.resolve_user(None, "a@example.com", "New name", "pic")
+
+    user = asyncio.run(run())
+
+    assert user.name == "New name"
+    assert len(upserts) == 2
+
+
+async def upsert(engine, email, name=None, picture=None):
+    # One session (and connection) per request, as in concurrent logins
+    async with AsyncSession(engine) as db:
+        return await upsert_user(db, email, name, picture)
+
+
+@pytest.mark.postgis
+def test_upsert_creates_then_refreshes_the_user(postgis_url):
+    async def run():
+        engine = await create_schema(postgis_url)
+        try:
+            created = await upsert(engine, "a@example.com", "A", "pic")
+            unchanged = await upsert(engine, "a@example.com", "A", "pic")
+            # Missing claims never overwrite stored values
+            partial = await upsert(engine, "a@example.com", None, None)
+            renamed = await upsert(engine, "a@example.com", "B", None)
+            return created, unchanged, partial, renamed
+        finally:
+            await engine.dispose()
+
+    created, unchanged, partial, renamed = asyncio.run(run())
+
+    assert created.id == unchanged.id == partial.id == renamed.id
+    assert tuple(unchanged) == tuple(created)
+    assert (partial.name, partial.picture) == ("A", "pic")
+    assert (renamed.name, renamed.picture) == ("B", "pic")
+
+
+@pytest.mark.postgis
+def test_concurrent_first_logins_resolve_to_one_user(postgis_url):
+    async def run():
+        engine = await create_schema(postgis_url)
+        try:
+            return await asyncio.gather(
+                *(upsert(engine, "new@example.com", "New") for _ in range(20))
+            )
+        finally:
+            await engine.dispose()
+
+    rows = asyncio.run(run())
+
+    assert len({row.id for row in rows}) == 1
@@ -289,12 +289,14 @@ class ApiService {
     }
   }
 
-  // Protected endpoint: Unregister FCM token (on logout)
-  Future<void> unregisterFCMToken(String idToken) async {
+  // Protected endpoint: Unregister this device's FCM token (on logout)
+  Future<void> unregisterFCMToken(String fcmToken, String idToken) async {
     try {
       debugPrint('Unregistering FCM token from backend');
 
-      final uri = Uri.parse('$baseUrl/notifications/unregister-token');
+      final uri = Uri.parse(
+        '$baseUrl/notifications/unregister-token',
+      ).replace(queryParameters: {'fcm_token': fcmToken});
 
       final response = await http.delete(
         uri,
@@ -231,9 +231,14 @@ class FCMService {
 
   /// Unregister FCM token from backend (on logout)
   Future<void> unregisterToken(String idToken) async {
+    if (_fcmToken == null) {
+      developer.log('No FCM token available to unregister', name: 'FCMService');
+      return;
+    }
+
     try {
       final apiService = ApiService();
-      await apiService.unregisterFCMToken(idToken);
+      await apiService.unregisterFCMToken(_fcmToken!, idToken);
       developer.log('FCM token unregistered from backend', name: 'FCMService');
     } catch (e) {
       developer.log('Failed to unregister FCM token: $e', name: 'FCMService');
@@ -0,0 +1,436 @@
+"""
+Pull-mode consumer for GCS upload notifications.
+
+Alternative to the /process-upload push endpoint for running the worker as a
+long-lived process: messages are pulled in batches, processed concurrently
+through the upload pipeline, kept leased while in flight, and acked or
+nacked one by one.
+
+Run with:
+    PUBSUB_SUBSCRIPTION=projects/<project>/subscriptions/<sub> python -m app.consumer
+
+Set PUBSUB_EMULATOR_HOST to run against the local Pub/Sub emulator, or use
+InMemoryBroker to run fully in-process.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import signal
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field, replace
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.db.database import engine
+from app.pipeline import (
+    InvalidUploadError,
+    UploadInProgressError,
+    UploadPipeline,
+    parse_notification,
+    upload_pipeline,
+)
+from app.services.fcm_service import initialize_firebase, notification_dispatcher
+from app.services.image_preprocessor import image_preprocessor
+from app.services.storage_service import storage_service
+from google.api_core.exceptions import DeadlineExceeded
+from google.cloud import pubsub_v1
+
+logger = logging.getLogger(__name__)
+
+# Longest ack deadline Pub/Sub accepts, which caps the retry backoff
+MAX_ACK_DEADLINE_SECONDS = 600
+
+
+@dataclass
+class ReceivedMessage:
+    """A pulled message, identified for ack/nack by its ack ID."""
+
+    ack_id: str
+    message_id: str
+    data: bytes
+    attributes: Dict[str, str] = field(default_factory=dict)
+    delivery_attempt: int = 1
+
+
+class Broker(ABC):
+    """Minimal pull-subscription interface used by the consumer."""
+
+    @abstractmethod
+    async def pull(self, max_messages: int, timeout: float) -> List[ReceivedMessage]:
+        """Wait up to timeout seconds for at most max_messages messages."""
+
+    @abstractmethod
+    async def ack(self, ack_ids: List[str]) -> None:
+        """Acknowledge messages so they are never redelivered."""
+
+    @abstractmethod
+    async def nack(self, ack_ids: List[str]) -> None:
+        """Release messages for immediate redelivery."""
+
+    @abstractmethod
+    async def extend_lease(self, ack_ids: List[str], seconds: int) -> None:
+        """Keep messages leased to us for another seconds."""
+
+    async def close(self) -> None:
+        """Release broker resources."""
+
+
+class PubSubBroker(Broker):
+    """
+    Google Cloud Pub/Sub pull subscription.
+    The client honors PUBSUB_EMULATOR_HOST, so it also works with the emulator.
+    """
+
+    def __init__(self, subscription: str):
+        """
+        Args:
+            subscription: Full path, projects/<project>/subscriptions/<name>
+        """
+        self.subscription = subscription
+        self.client = pubsub_v1.SubscriberClient()
+
+    async def _run(self, func, **kwargs):
+        return await asyncio.to_thread(func, **kwargs)
+
+    async def pull(self, max_messages: int, timeout: float) -> List[ReceivedMessage]:
+        try:
+            response = await self._run(
+                self.client.pull,
+                request={
+                    "subscription": self.subscription,
+                    "max_messages": max_messages,
+                },
+                timeout=timeout,
+            )
+        except DeadlineExceeded:
+            return []
+
+        return [
+            ReceivedMessage(
+                ack_id=received.ack_id,
+                message_id=received.message.message_id,
+                data=received.message.data,
+                attributes=dict(received.message.attributes),
+                delivery_attempt=received.delivery_attempt or 1,
+            )
+            for received in response.received_messages
+        ]
+
+    async def ack(self, ack_ids: List[str]) -> None:
+        await self._run(
+            self.client.acknowledge,
+            request={"subscription": self.subscription, "ack_ids": ack_ids},
+        )
+
+    async def nack(self, ack_ids: List[str]) -> None:
+        await self.extend_lease(ack_ids, 0)
+
+    async def extend_lease(self, ack_ids: List[str], seconds: int) -> None:
+        await self._run(
+            self.client.modify_ack_deadline,
+            request={
+                "subscription": self.subscription,
+                "ack_ids": ack_ids,
+                "ack_deadline_seconds": seconds,
+            },
+        )
+
+    async def close(self) -> None:
+        self.client.close()
+
+
+class InMemoryBroker(Broker):
+    """
+    In-process broker with Pub/Sub delivery semantics (at-least-once, leases,
+    redelivery after nack or lease expiry), for local runs without GCP.
+    """
+
+    def __init__(self, ack_deadline_seconds: int = 10):
+        self.ack_deadline_seconds = ack_deadline_seconds
+        self.acked: List[ReceivedMessage] = []
+
+        self._pending: Deque[ReceivedMessage] = deque()
+        # ack_id -> (message, lease deadline)
+        self._leased: Dict[str, Tuple[ReceivedMessage, float]] = {}
+        self._ids = itertools.count(1)
+        self._available = asyncio.Event()
+
+    def publish(self, data: bytes, attributes: Optional[Dict[str, str]] = None) -> str:
+        """
+        Publish a message.
+
+        Args:
+            data: Message payload
+            attributes: Optional message attributes
+
+        Returns:
+            Message ID
+        """
+        message_id = str(next(self._ids))
+        self._pending.append(
+            ReceivedMessage(
+                ack_id="",
+                message_id=message_id,
+                data=data,
+                attributes=attributes or {},
+                delivery_attempt=0,
+            )
+        )
+        self._available.set()
+        return message_id
+
+    def _requeue(self, ack_id: str) -> None:
+        message, _ = self._leased.pop(ack_id)
+        self._pending.append(message)
+        self._available.set()
+
+    def _requeue_expired(self) -> None:
+        now = asyncio.get_running_loop().time()
+        for ack_id, (_, deadline) in list(self._leased.items()):
+            if deadline <= now:
+                self._requeue(ack_id)
+
+    async def pull(self, max_messages: int, timeout: float) -> List[ReceivedMessage]:
+        loop = asyncio.get_running_loop()
+        give_up_at = loop.time() + timeout
+
+        self._requeue_expired()
+        while not self._pending:
+            remaining = give_up_at - loop.time()
+            if remaining <= 0:
+                return []
+            self._available.clear()
+            try:
+                # Wake up periodically to notice expired leases
+                await asyncio.wait_for(self._available.wait(), min(remaining, 1.0))
+            except asyncio.TimeoutError:
+                pass
+            self._requeue_expired()
+
+        messages = []
+        deadline = loop.time() + self.ack_deadline_seconds
+        while self._pending and len(messages) < max_messages:
+            # Each delivery gets its own ack ID, so stale acks can't hit it
+            message = self._pending.popleft()
+            message = replace(
+                message,
+                ack_id=f"{message.message_id}-{next(self._ids)}",
+                delivery_attempt=message.delivery_attempt + 1,
+            )
+            self._leased[message.ack_id] = (message, deadline)
+            messages.append(message)
+        return messages
+
+    async def ack(self, ack_ids: List[str]) -> None:
+        for ack_id in ack_ids:
+            # Acks with an expired ack ID are ignored, as in Pub/Sub
+            if ack_id in self._leased:
+                self.acked.append(self._leased.pop(ack_id)[0])
+
+    async def nack(self, ack_ids: List[str]) -> None:
+        for ack_id in ack_ids:
+            if ack_id in self._leased:
+                self._requeue(ack_id)
+
+    async def extend_lease(self, ack_ids: List[str], seconds: int) -> None:
+        deadline = asyncio.get_running_loop().time() + seconds
+        for ack_id in ack_ids:
+            if ack_id in self._leased:
+                self._leased[ack_id] = (self._leased[ack_id][0], deadline)
+
+
+class PullConsumer:
+    """Pulls upload notifications in batches and processes them concurrently."""
+
+    def __init__(
+        self,
+        broker: Broker,
+        pipeline: UploadPipeline,
+        max_messages: int = settings.pull_max_messages,
+        max_in_flight: int = settings.pull_max_in_flight,
+        lease_seconds: int = settings.pull_lease_seconds,
+        pull_timeout: float = settings.pull_timeout_seconds,
+        retry_base_seconds: int = settings.pull_retry_base_seconds,
+    ):
+        """
+        Args:
+            broker: Message source
+            pipeline: Upload pipeline that processes each notification
+            max_messages: Max messages per pull
+            max_in_flight: Max messages being processed at once
+            lease_seconds: Ack deadline kept on in-flight messages
+            pull_timeout: Seconds a pull waits for messages
+            retry_base_seconds: Redelivery delay after a first failed attempt,
+                doubled on every further attempt
+        """
+        self.broker = broker
+        self.pipeline = pipeline
+        self.max_messages = max_messages
+        self.lease_seconds = lease_seconds
+        self.pull_timeout = pull_timeout
+        self.retry_base_seconds = retry_base_seconds
+
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._in_flight: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        """Stop pulling; messages already in flight are finished."""
+        self._stopping.set()
+
+    async def _unless_stopped(self, awaitable):
+        """
+        Await something, giving up as soon as stop() is called.
+
+        Returns:
+            (completed, result); the awaitable is cancelled if not completed
+        """
+        task = asyncio.ensure_future(awaitable)
+        stopped = asyncio.create_task(self._stopping.wait())
+        try:
+            await asyncio.wait({task, stopped}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stopped.cancel()
+        if task.done():
+            return True, task.result()
+        task.cancel()
+        return False, None
+
+    async def run(self) -> None:
+        """Consume messages until stop() is called."""
+        lease_task = asyncio.create_task(self._extend_leases())
+        try:
+            while not self._stopping.is_set():
+                # Only pull what we can start processing right away
+                acquired, _ = await self._unless_stopped(self._slots.acquire())
+                if not acquired:
+                    break
+                free = 1
+                while free < self.max_messages and not self._slots.locked():
+                    await self._slots.acquire()
+                    free += 1
+
+                try:
+                    pulled, messages = await self._unless_stopped(
+                        self.broker.pull(free, self.pull_timeout)
+                    )
+                    messages = messages or []
+                except Exception as e:
+                    logger.error(f"Pull failed: {e}")
+                    pulled, messages = True, []
+                    await asyncio.sleep(1)
+
+                for _ in range(free - len(messages)):
+                    self._slots.release()
+                if not pulled:
+                    break
+                if not messages:
+                    continue
+
+                ack_ids = [message.ack_id for message in messages]
+                self._in_flight.update(ack_ids)
+                await self._try(self.broker.extend_lease, ack_ids, self.lease_seconds)
+
+                for message in messages:
+                    task = asyncio.create_task(self._handle(message))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+        finally:
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+            lease_task.cancel()
+
+    async def _handle(self, message: ReceivedMessage) -> None:
+        try:
+            try:
+                job = parse_notification(
+                    json.loads(message.data), message_id=message.message_id
+                )
+            except (InvalidUploadError, ValueError) as e:
+                # Malformed notifications will never succeed; drop them
+                logger.error(f"Dropping message {message.message_id}: {e}")
+                await self._try(self.broker.ack, [message.ack_id])
+                return
+
+            result = await self.pipeline.process(job)
+            logger.info(f"Message {message.message_id}: {result['status']}")
+            await self._try(self.broker.ack, [message.ack_id])
+        except UploadInProgressError as e:
+            logger.info(f"Message {message.message_id}: {e}, redelivering later")
+            await self._retry_later(message)
+        except Exception as e:
+            logger.error(
+                f"Message {message.message_id} failed "
+                f"(attempt {message.delivery_attempt}): {e}",
+                exc_info=True,
+            )
+            await self._retry_later(message)
+        finally:
+            self._in_flight.discard(message.ack_id)
+            self._slots.release()
+
+    async def _retry_later(self, message: ReceivedMessage) -> None:
+        """
+        Have a message redelivered after a delay that grows with its attempts.
+
+        Instead of a nack (immediate redelivery), the lease is set to the
+        backoff delay and left to expire.
+        """
+        delay = min(
+            self.retry_base_seconds * 2 ** (message.delivery_attempt - 1),
+            MAX_ACK_DEADLINE_SECONDS,
+        )
+        self._in_flight.discard(message.ack_id)
+        await self._try(self.broker.extend_lease, [message.ack_id], delay)
+
+    async def _extend_leases(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 2)
+            if self._in_flight:
+                await self._try(
+                    self.broker.extend_lease, list(self._in_flight), self.lease_seconds
+                )
+
+    async def _try(self, operation, *args) -> None:
+        """Run a broker call; a failure only causes an early redelivery."""
+        try:
+            await operation(*args)
+        except Exception as e:
+            logger.warning(f"Broker {operation.__name__} failed: {e}")
+
+
+async def main() -> None:
+    """Run the pull consumer until SIGINT/SIGTERM."""
+    if not settings.pubsub_subscription:
+        raise SystemExit("PUBSUB_SUBSCRIPTION must be set to run the pull consumer")
+
+    initialize_firebase()
+    broker = PubSubBroker(settings.pubsub_subscription)
+    consumer = PullConsumer(broker, upload_pipeline)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, consumer.stop)
+
+    logger.info(f"Pulling upload notifications from {settings.pubsub_subscription}")
+    try:
+        await consumer.run()
+    finally:
+        logger.info("Consumer shutting down...")
+        await broker.close()
+        await notification_dispatcher.close()
+        storage_service.close()
+        image_preprocessor.close()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+"""
+In-process LRU cache with a cost bound and optional expiry.
+Used for hot read paths that can tolerate per-instance caching.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class BoundedCache:
+    """
+    Least-recently-used cache bounded by the total cost of its entries.
+
+    Each entry has a cost (1 by default, or e.g. its size in bytes) and an
+    optional expiry time. When the total cost exceeds max_cost the least
+    recently used entries are evicted. Not thread-safe; intended for use
+    from a single event loop.
+    """
+
+    def __init__(self, max_cost: int, ttl: Optional[float] = None):
+        """
+        Args:
+            max_cost: Upper bound for the summed cost of all entries
+            ttl: Default time-to-live in seconds (None = no expiry)
+        """
+        self.max_cost = max_cost
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._cost = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and not self._is_expired(entry)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a value and mark it as recently used.
+
+        Args:
+            key: Cache key
+            default: Value returned on a miss
+
+        Returns:
+            Cached value or default if missing or expired
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        if self._is_expired(entry):
+            self._remove(key)
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        cost: int = 1,
+        expires_at: Optional[float] = None,
+    ) -> None:
+        """
+        Store a value, evicting least recently used entries if needed.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            cost: Cost of the entry counted against max_cost
+            expires_at: time.monotonic() deadline (defaults to now + ttl)
+        """
+        if key in self._entries:
+            self._remove(key)
+
+        # An entry larger than the whole cache would only flush everything
+        if cost > self.max_cost:
+            return
+
+        if expires_at is None and self.ttl is not None:
+            expires_at = time.monotonic() + self.ttl
+
+        self._entries[key] = (value, cost, expires_at)
+        self._cost += cost
+
+        while self._cost > self.max_cost:
+            _, (_, evicted_cost, _) = self._entries.popitem(last=False)
+            self._cost -= evicted_cost
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> bool:
+        """
+        Remove an entry.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            True if the key was present, False otherwise
+        """
+        if key not in self._entries:
+            return False
+        self._remove(key)
+        return True
+
+    def clear(self) -> None:
+        """Remove all entries (counters are kept)."""
+        self._entries.clear()
+        self._cost = 0
+
+    def stats(self) -> dict:
+        """
+        Get cache counters.
+
+        Returns:
+            Dict with entries, cost, max_cost, hits, misses and evictions
+        """
+        return {
+            "entries": len(self._entries),
+            "cost": self._cost,
+            "max_cost": self.max_cost,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _is_expired(self, entry: tuple) -> bool:
+        expires_at = entry[2]
+        return expires_at is not None and expires_at <= time.monotonic()
+
+    def _remove(self, key: Hashable) -> None:
+        _, cost, _ = self._entries.pop(key)
+        self._cost -= cost
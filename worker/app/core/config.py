@@ -38,6 +38,44 @@ class Settings(BaseSettings):
     db_max_overflow: int = 10
     db_echo: bool = False
 
+    # Pipeline Settings (max uploads in each stage at once)
+    download_concurrency: int = 32
+    classify_concurrency: int = 16
+    db_concurrency: int = 10  # Keep within db_pool_size + db_max_overflow
+    notify_concurrency: int = 32
+    storage_max_workers: int = 32  # Threads (and pooled connections) for GCS calls
+    seen_uploads_cache_size: int = 100000  # Processed upload keys kept in memory
+    classification_cache_size: int = 10000  # Gemini results kept in memory
+
+    # Gemini Classification
+    gemini_backend: str = "gemini"  # "fake" classifies offline, deterministically
+    gemini_batch_size: int = 1  # >1 sends up to this many images per request
+    gemini_batch_wait_seconds: float = 0.5  # Max wait for a batch to fill
+
+    # Image Preprocessing (before Gemini)
+    image_max_edge: int = 1024  # Longest side in pixels sent to the model
+    image_jpeg_quality: int = 85
+    preprocess_workers: int = 2  # Processes decoding/resizing images
+
+    # Pull Consumer Settings (python -m app.consumer)
+    pubsub_subscription: str | None = Field(
+        default=None
+    )  # projects/.../subscriptions/...
+    pull_max_messages: int = 50  # Max messages per pull request
+    pull_max_in_flight: int = 100  # Max messages being processed at once
+    pull_lease_seconds: int = 60  # Ack deadline kept on in-flight messages
+    pull_timeout_seconds: float = 30.0  # How long a pull waits for messages
+    pull_retry_base_seconds: int = 10  # Retry delay, doubled per attempt
+
+    # FCM Settings
+    fcm_batch_size: int = 500  # Max messages per send_each call (FCM limit: 500)
+    fcm_batch_wait_seconds: float = 0.05  # Max wait for a batch to fill
+    fcm_max_workers: int = 4  # Batches sent at once
+    fcm_prune_interval_seconds: float = 10.0  # Max delay before dead tokens are cleared
+
+    # Postgres NOTIFY channel the API listens on to invalidate its point cache
+    point_events_channel: str = "point_events"
+
     # Validators
     @field_validator("alloydb_connection_uri")
     @classmethod
@@ -3,15 +3,20 @@ CRUD operations for worker service.
 Handles database operations for points and users.
 """
 
+import json
 import logging
-from typing import Optional, Tuple
+from typing import List, Optional
 
-from app.db.models import Point, User
-from sqlalchemy import select
+from app.core.config import settings
+from app.db.models import ClassificationCache, Point, User, UserDevice
+from sqlalchemy import Text, any_, delete, func, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
 
+POINTS_PER_UPLOAD = 250
+
 
 async def create_point_with_user_update(
     db: AsyncSession,
@@ -21,9 +26,13 @@ async def create_point_with_user_update(
     longitude: float,
     weight: float,
     category: int,
-) -> Tuple[Point, Optional[User]]:
+    upload_key: Optional[str] = None,
+) -> Optional[int]:
     """
-    Create a new point and update user statistics in a single transaction.
+    Create a new point and update user statistics in a single statement.
+
+    The point INSERT and the counter UPDATE run as one CTE, so the counters
+    are incremented in SQL and concurrent uploads never lose an update.
 
     Args:
         db: Database session
@@ -33,48 +42,74 @@ async def create_point_with_user_update(
         longitude: GPS longitude
         weight: Category weight (0.25 to 1.0)
         category: Density category (1-4)
+        upload_key: Idempotency key of the upload ("<object name>#<generation>")
 
     Returns:
-        Tuple of (created_point, updated_user)
-        User may be None if user_id doesn't exist
+        ID of the created point, or None if a point with this upload_key
+        already exists; the user is then left unchanged
 
     Raises:
         Exception: If database operations fail
     """
     try:
-        # Create point with PostGIS POINT format (longitude, latitude)
-        new_point = Point(
-            user_id=user_id,
-            image_url=image_url,
-            location=f"POINT({longitude} {latitude})",
-            weight=weight,
-            category=category,
-            is_trash=False,
+        # Create point with PostGIS POINT format (longitude, latitude).
+        # A redelivered notification hits the unique upload_key and inserts nothing.
+        new_point = (
+            insert(Point)
+            .values(
+                user_id=user_id,
+                image_url=image_url,
+                location=f"POINT({longitude} {latitude})",
+                weight=weight,
+                category=category,
+                is_trash=False,
+                upload_key=upload_key,
+            )
+            .on_conflict_do_nothing(index_elements=[Point.upload_key])
+            .returning(Point.id, Point.user_id)
+            .cte("new_point")
         )
+        # UPDATE ... FROM new_point only touches the user if a point was inserted
+        updated_user = (
+            update(User)
+            .where(User.id == new_point.c.user_id)
+            .values(
+                total_points=User.total_points + POINTS_PER_UPLOAD,
+                total_uploads=User.total_uploads + 1,
+            )
+            .returning(User.id, User.total_points, User.total_uploads)
+            .cte("updated_user")
+        )
+        result = await db.execute(
+            select(
+                new_point.c.id,
+                updated_user.c.total_points,
+                updated_user.c.total_uploads,
+            ).outerjoin(updated_user, updated_user.c.id == new_point.c.user_id)
+        )
+        row = result.one_or_none()
 
-        db.add(new_point)
-
-        # Update user points and upload count
-        result = await db.execute(select(User).where(User.id == user_id))
-        user = result.scalar_one_or_none()
+        if row is None:
+            logger.info(f"Upload {upload_key} already processed, skipping")
+            await db.rollback()
+            return None
 
-        if user:
-            user.total_points = (user.total_points or 0) + 250
-            user.total_uploads = (user.total_uploads or 0) + 1
+        if row.total_points is None:
+            logger.warning(f"User {user_id} not found in database")
+        else:
             logger.info(
-                f"Updated user {user.email}: {user.total_points} points, "
-                f"{user.total_uploads} uploads"
+                f"Updated user {user_id}: {row.total_points} points, "
+                f"{row.total_uploads} uploads"
             )
-        else:
-            logger.warning(f"User {user_id} not found in database")
+
+        # Announce the new point so API instances drop their cached map tiles.
+        # NOTIFY is transactional: it is only delivered if the commit succeeds.
+        await notify_point_changed(db, latitude, longitude)
 
         # Commit transaction
         await db.commit()
 
-        # Refresh to get auto-generated fields
-        await db.refresh(new_point)
-
-        return new_point, user
+        return row.id
 
     except Exception as e:
         logger.error(f"Failed to create point: {e}", exc_info=True)
@@ -82,6 +117,38 @@ async def create_point_with_user_update(
         raise
 
 
+async def notify_point_changed(
+    db: AsyncSession, latitude: float, longitude: float
+) -> None:
+    """
+    Queue a point change event on the point events channel.
+
+    Args:
+        db: Database session (event is sent when its transaction commits)
+        latitude: Latitude of the changed point
+        longitude: Longitude of the changed point
+    """
+    payload = json.dumps({"lat": latitude, "lng": longitude})
+    await db.execute(select(func.pg_notify(settings.point_events_channel, payload)))
+
+
+async def get_point_id_by_upload_key(
+    db: AsyncSession, upload_key: str
+) -> Optional[int]:
+    """
+    Get the ID of the point created from an upload, if any.
+
+    Args:
+        db: Database session
+        upload_key: Idempotency key of the upload
+
+    Returns:
+        Point ID or None if the upload hasn't produced a point
+    """
+    result = await db.execute(select(Point.id).where(Point.upload_key == upload_key))
+    return result.scalar_one_or_none()
+
+
 async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
     """
     Get user by ID.
@@ -101,39 +168,85 @@ async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
         raise
 
 
-async def increment_user_stats(
-    db: AsyncSession, user_id: int, points: int = 250, uploads: int = 1
-) -> Optional[User]:
+async def get_user_device_tokens(db: AsyncSession, user_id: int) -> List[str]:
     """
-    Increment user points and upload count.
+    Get the FCM tokens of all of a user's registered devices.
 
     Args:
         db: Database session
         user_id: User ID
-        points: Points to add (default: 250)
-        uploads: Upload count to add (default: 1)
 
     Returns:
-        Updated user object or None if not found
+        List of FCM tokens (empty if the user has no devices)
     """
-    try:
-        result = await db.execute(select(User).where(User.id == user_id))
-        user = result.scalar_one_or_none()
+    result = await db.execute(
+        select(UserDevice.token).where(UserDevice.user_id == user_id)
+    )
+    return list(result.scalars().all())
 
-        if user:
-            user.total_points = (user.total_points or 0) + points
-            user.total_uploads = (user.total_uploads or 0) + uploads
-            await db.commit()
-            await db.refresh(user)
-            logger.info(
-                f"Incremented user {user.email} stats: +{points} points, +{uploads} uploads"
-            )
-            return user
-        else:
-            logger.warning(f"User {user_id} not found")
-            return None
 
-    except Exception as e:
-        logger.error(f"Failed to increment user stats: {e}", exc_info=True)
-        await db.rollback()
-        raise
+async def clear_fcm_tokens(db: AsyncSession, tokens: List[str]) -> int:
+    """
+    Remove devices whose FCM tokens FCM reported as no longer valid.
+
+    Args:
+        db: Database session
+        tokens: Dead FCM tokens
+
+    Returns:
+        Number of devices removed
+    """
+    result = await db.execute(
+        delete(UserDevice).where(UserDevice.token == any_(literal(tokens, ARRAY(Text))))
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def get_classification(
+    db: AsyncSession, image_hash: str
+) -> Optional[ClassificationCache]:
+    """
+    Get a stored classification result by image hash.
+
+    Args:
+        db: Database session
+        image_hash: SHA-256 hex digest of the image bytes
+
+    Returns:
+        Stored result or None if the image hasn't been classified
+    """
+    result = await db.execute(
+        select(ClassificationCache).where(ClassificationCache.image_hash == image_hash)
+    )
+    return result.scalar_one_or_none()
+
+
+async def save_classification(
+    db: AsyncSession,
+    image_hash: str,
+    is_valid: bool,
+    category: Optional[int],
+    weight: Optional[float],
+) -> None:
+    """
+    Store a classification result (first result for a hash wins).
+
+    Args:
+        db: Database session
+        image_hash: SHA-256 hex digest of the image bytes
+        is_valid: Whether the image is a valid trash photo
+        category: Density category (1-4) or None
+        weight: Category weight (0.25 to 1.0) or None
+    """
+    await db.execute(
+        insert(ClassificationCache)
+        .values(
+            image_hash=image_hash,
+            is_valid=is_valid,
+            category=category,
+            weight=weight,
+        )
+        .on_conflict_do_nothing(index_elements=[ClassificationCache.image_hash])
+    )
+    await db.commit()
@@ -1,7 +1,8 @@
-from geoalchemy2 import Geography
+from geoalchemy2 import Geography, Geometry
 from sqlalchemy import (
     Boolean,
     Column,
+    Computed,
     DateTime,
     Float,
     ForeignKey,
@@ -12,7 +13,7 @@ from sqlalchemy import (
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 
 Base = declarative_base()
 
@@ -48,6 +49,9 @@ class User(Base):
 
     # Relationship to points
     points = relationship("Point", back_populates="user", cascade="all, delete-orphan")
+    devices = relationship(
+        "UserDevice", back_populates="user", cascade="all, delete-orphan"
+    )
 
     def __repr__(self):
         return f"<User(id={self.id}, email={self.email})>"
@@ -56,7 +60,8 @@ class User(Base):
 class Point(Base):
     """
     Model for geo-tagged photo points with trash classification.
-    Uses PostGIS Geography type for location storage.
+    Uses PostGIS Geography type for location storage, with a generated
+    Geometry copy (geom) used by read queries.
     """
 
     __tablename__ = "points"
@@ -66,10 +71,21 @@ class Point(Base):
         Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
     )
     image_url = Column(Text, nullable=False)
-    location = Column(Geography(geometry_type="POINT", srid=4326), nullable=False)
+    # Not indexed (migration 006 dropped its index); spatial reads use geom
+    location = Column(
+        Geography(geometry_type="POINT", srid=4326, spatial_index=False),
+        nullable=False,
+    )
+    # Planar copy of location maintained by PostgreSQL for cheap bbox/coord reads
+    geom = Column(
+        Geometry(geometry_type="POINT", srid=4326, spatial_index=False),
+        Computed("location::geometry", persisted=True),
+    )
     weight = Column(Float, nullable=False)  # 0.25 to 1.0 (category/4.0)
     category = Column(Integer, nullable=False)  # 1-4 (density level)
     is_trash = Column(Boolean, default=False, nullable=False)
+    # "<object name>#<generation>" of the uploaded image; makes processing idempotent
+    upload_key = Column(String(512), nullable=True)
     timestamp = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -79,10 +95,77 @@ class Point(Base):
 
     # GIST spatial index is created in migration
     __table_args__ = (
-        Index("idx_points_location", "location", postgresql_using="gist"),
+        # Only visible points are ever queried spatially
+        Index(
+            "idx_points_geom_visible",
+            "geom",
+            postgresql_using="gist",
+            postgresql_where=text("is_trash = false"),
+        ),
+        # Keyset pagination of a user's uploads, newest first
+        Index(
+            "ix_points_user_id_timestamp_id",
+            "user_id",
+            text("timestamp DESC"),
+            text("id DESC"),
+        ),
+        # Unique index (not constraint), as created by migration 008
+        Index("points_upload_key_key", "upload_key", unique=True),
     )
 
     def __repr__(self):
         return (
             f"<Point(id={self.id}, user_id={self.user_id}, category={self.category})>"
         )
+
+
+class UserDevice(Base):
+    """
+    Model for a device registered for push notifications.
+    A user has one row per device; notifications go to all of them.
+    """
+
+    __tablename__ = "user_devices"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    token = Column(Text, unique=True, nullable=False)  # FCM registration token
+    platform = Column(String(20), nullable=True)  # android, ios or web
+    last_seen = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    # Relationship to user
+    user = relationship("User", back_populates="devices")
+
+    def __repr__(self):
+        return f"<UserDevice(id={self.id}, user_id={self.user_id})>"
+
+
+class ClassificationCache(Base):
+    """
+    Model for Gemini classification results keyed by image content hash.
+    Lets the worker answer re-uploads and retries of the same image without
+    another model call.
+    """
+
+    __tablename__ = "classification_cache"
+
+    image_hash = Column(String(64), primary_key=True)  # SHA-256 hex of image bytes
+    is_valid = Column(Boolean, nullable=False)
+    category = Column(Integer, nullable=True)  # 1-4, NULL if not valid
+    weight = Column(Float, nullable=True)  # 0.25 to 1.0, NULL if not valid
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    def __repr__(self):
+        return (
+            f"<ClassificationCache(image_hash={self.image_hash}, "
+            f"category={self.category})>"
+        )
@@ -3,16 +3,16 @@ import json
 import logging
 from contextlib import asynccontextmanager
 
-from app.core.config import settings
-from app.db.crud import create_point_with_user_update, get_user_by_id
-from app.db.database import engine, get_db
-from app.services.fcm_service import (
-    initialize_firebase,
-    send_image_accepted_notification,
-    send_image_rejected_notification,
+from app.db.database import engine
+from app.pipeline import (
+    InvalidUploadError,
+    UploadInProgressError,
+    parse_notification,
+    upload_pipeline,
 )
-from app.services.gemini_service import GeminiService
-from app.services.storage_service import StorageService
+from app.services.fcm_service import initialize_firebase, notification_dispatcher
+from app.services.image_preprocessor import image_preprocessor
+from app.services.storage_service import storage_service
 from fastapi import FastAPI, HTTPException, Request
 
 # Configure logging
@@ -21,10 +21,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize services
-gemini_service = GeminiService()
-storage_service = StorageService()
-
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -33,6 +29,9 @@ async def lifespan(app: FastAPI):
     initialize_firebase()
     yield
     logger.info("Worker shutting down...")
+    await notification_dispatcher.close()
+    storage_service.close()
+    image_preprocessor.close()
     await engine.dispose()
 
 
@@ -96,103 +95,20 @@ async def process_upload(request: Request):
 
         logger.info(f"Decoded GCS notification: {data.get('name', 'unknown')}")
 
-        # Extract file information
-        file_name = data.get("name")
-        bucket_name = data.get("bucket")
-        metadata = data.get("metadata", {})
-
-        if not file_name:
-            logger.error("No file name in notification")
-            raise HTTPException(status_code=400, detail="No file name in notification")
-
-        # Extract metadata (custom metadata from signed URL)
         try:
-            user_id = int(metadata.get("user_id"))
-            latitude = float(metadata.get("latitude"))
-            longitude = float(metadata.get("longitude"))
-        except (ValueError, TypeError, KeyError) as e:
-            logger.error(f"Invalid metadata: {metadata}, error: {e}")
-            raise HTTPException(status_code=400, detail=f"Invalid metadata: {str(e)}")
-
-        logger.info(
-            f"Processing upload - User ID: {user_id}, Location: ({latitude}, {longitude})"
-        )
+            job = parse_notification(data, message_id=message.get("messageId"))
+        except InvalidUploadError as e:
+            logger.error(str(e))
+            raise HTTPException(status_code=400, detail=str(e))
 
-        # Download image from GCS
-        logger.info(f"Downloading image from GCS: {file_name}")
-        image_bytes = storage_service.download_image(file_name)
-        logger.info(f"Downloaded {len(image_bytes)} bytes")
-
-        # Analyze with Gemini
-        logger.info("Analyzing image with Gemini API...")
-        is_valid, category, weight = await gemini_service.analyze_image(image_bytes)
-        logger.info(
-            f"Gemini result - Valid: {is_valid}, Category: {category}, Weight: {weight}"
-        )
-
-        if not is_valid:
-            # Delete rejected image
-            logger.warning(f"Image rejected by Gemini: {file_name}")
-            deleted = await storage_service.delete_image_by_name(file_name)
-            logger.info(f"Rejected image deleted: {deleted}")
-
-            # Send rejection notification to user
-            async with get_db() as db:
-                user = await get_user_by_id(db, user_id)
-                if user and user.fcm_token:
-                    logger.info(f"Sending rejection notification to user {user_id}")
-                    await send_image_rejected_notification(
-                        token=user.fcm_token,
-                        reason="Image doesn't meet quality standards",
-                    )
-                else:
-                    logger.info(
-                        f"No FCM token for user {user_id}, skipping notification"
-                    )
-
-            return {
-                "status": "rejected",
-                "file_name": file_name,
-                "message": "Image rejected by AI validation",
-            }
-
-        # Save to database
-        logger.info("Saving point to database...")
-        async with get_db() as db:
-            image_url = f"https://storage.googleapis.com/{bucket_name}/{file_name}"
-
-            # Create point and update user stats in single transaction
-            new_point, user = await create_point_with_user_update(
-                db=db,
-                user_id=user_id,
-                image_url=image_url,
-                latitude=latitude,
-                longitude=longitude,
-                weight=weight,
-                category=category,
-            )
-
-            logger.info(f"Point created successfully - ID: {new_point.id}")
-
-            # Send acceptance notification to user
-            if user and user.fcm_token:
-                logger.info(f"Sending acceptance notification to user {user_id}")
-                await send_image_accepted_notification(
-                    token=user.fcm_token,
-                    category=category,
-                    weight=weight,
-                    points_earned=250,
-                )
-            else:
-                logger.info(f"No FCM token for user {user_id}, skipping notification")
-
-        return {
-            "status": "success",
-            "point_id": new_point.id,
-            "category": category,
-            "weight": weight,
-            "user_id": user_id,
-        }
+        # Download, classify, save and notify; each stage is concurrency-limited
+        # so many requests can be in flight on one instance
+        try:
+            return await upload_pipeline.process(job)
+        except UploadInProgressError as e:
+            # Non-2xx makes Pub/Sub redeliver later, once the first attempt is done
+            logger.info(str(e))
+            raise HTTPException(status_code=409, detail=str(e))
 
     except HTTPException:
         raise
@@ -0,0 +1,291 @@
+"""
+Staged processing pipeline for uploaded images.
+
+An upload moves through download -> preprocess -> classify -> save -> notify. Every stage
+uses non-blocking I/O and has its own concurrency limit, so one worker keeps
+many uploads in flight without exhausting the GCS threads, Gemini quota or
+database pool.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Set
+
+from app.core.cache import BoundedCache
+from app.core.config import settings
+from app.db.crud import (
+    POINTS_PER_UPLOAD,
+    create_point_with_user_update,
+    get_point_id_by_upload_key,
+    get_user_device_tokens,
+)
+from app.db.database import get_db
+from app.services.fcm_service import (
+    send_image_accepted_notification,
+    send_image_rejected_notification,
+)
+from app.services.classification_cache import (
+    Classification,
+    classification_cache,
+    hash_image,
+)
+from app.services.gemini_service import UnrecognizedResponseError, classifier
+from app.services.image_preprocessor import image_preprocessor
+from app.services.storage_service import storage_service
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidUploadError(ValueError):
+    """Raised for notifications that can never be processed (retrying won't help)."""
+
+
+class UploadInProgressError(Exception):
+    """Raised when the same upload is already being processed by this worker."""
+
+
+@dataclass(frozen=True)
+class UploadJob:
+    """An uploaded image to process, parsed from a GCS object notification."""
+
+    file_name: str
+    bucket_name: str
+    user_id: int
+    latitude: float
+    longitude: float
+    content_type: str
+    # Identifies the uploaded object across redeliveries ("<name>#<generation>")
+    upload_key: str
+
+    @property
+    def image_url(self) -> str:
+        return f"https://storage.googleapis.com/{self.bucket_name}/{self.file_name}"
+
+
+def parse_notification(data: dict, message_id: Optional[str] = None) -> UploadJob:
+    """
+    Build a job from a decoded GCS object notification.
+
+    Args:
+        data: Notification with the object name, bucket and custom metadata
+        message_id: Pub/Sub message ID, the idempotency key fallback when the
+            notification carries no object generation
+
+    Returns:
+        Upload job
+
+    Raises:
+        InvalidUploadError: If the file name or metadata is missing or invalid
+    """
+    if not isinstance(data, dict):
+        raise InvalidUploadError(f"Notification is not an object: {data!r}")
+
+    file_name = data.get("name")
+    if not file_name:
+        raise InvalidUploadError("No file name in notification")
+
+    # Extract metadata (custom metadata from signed URL)
+    metadata = data.get("metadata") or {}
+    try:
+        user_id = int(metadata.get("user_id"))
+        latitude = float(metadata.get("latitude"))
+        longitude = float(metadata.get("longitude"))
+    except (ValueError, TypeError) as e:
+        raise InvalidUploadError(f"Invalid metadata: {metadata}, error: {e}")
+
+    generation = data.get("generation")
+    if generation:
+        upload_key = f"{file_name}#{generation}"
+    else:
+        upload_key = f"{file_name}#{message_id}" if message_id else file_name
+
+    return UploadJob(
+        file_name=file_name,
+        bucket_name=data.get("bucket") or settings.gcs_bucket_name,
+        user_id=user_id,
+        latitude=latitude,
+        longitude=longitude,
+        content_type=data.get("contentType") or "image/jpeg",
+        upload_key=upload_key,
+    )
+
+
+class UploadPipeline:
+    """Runs upload jobs through the processing stages with bounded concurrency."""
+
+    def __init__(self):
+        # Uploads finished by this worker, and uploads being processed right now
+        self.seen = BoundedCache(max_cost=settings.seen_uploads_cache_size)
+        self.in_progress: Set[str] = set()
+
+        self.download_slots = asyncio.Semaphore(settings.download_concurrency)
+        self.classify_slots = asyncio.Semaphore(settings.classify_concurrency)
+        self.db_slots = asyncio.Semaphore(settings.db_concurrency)
+        self.notify_slots = asyncio.Semaphore(settings.notify_concurrency)
+
+    async def process(self, job: UploadJob) -> dict:
+        """
+        Process one uploaded image end to end.
+
+        Args:
+            job: Upload to process
+
+        Returns:
+            Result summary ("success", "rejected", "duplicate" or "missing")
+
+        Raises:
+            UploadInProgressError: If the same upload is already being processed
+            Exception: On transient failures; the upload should be retried
+        """
+        # Redelivered notifications are answered before any expensive work
+        result = self.seen.get(job.upload_key)
+        if result is not None:
+            logger.info(f"Upload {job.upload_key} already processed, skipping")
+            return {**result, "status": "duplicate"}
+
+        if job.upload_key in self.in_progress:
+            raise UploadInProgressError(f"Upload {job.upload_key} is in progress")
+
+        self.in_progress.add(job.upload_key)
+        try:
+            result = await self._process(job)
+        finally:
+            self.in_progress.discard(job.upload_key)
+
+        self.seen.set(job.upload_key, result)
+        return result
+
+    async def _process(self, job: UploadJob) -> dict:
+        logger.info(
+            f"Processing upload - User ID: {job.user_id}, "
+            f"Location: ({job.latitude}, {job.longitude})"
+        )
+
+        # Another instance may have processed this upload already
+        async with self.db_slots:
+            async with get_db() as db:
+                point_id = await get_point_id_by_upload_key(db, job.upload_key)
+        if point_id is not None:
+            logger.info(f"Upload {job.upload_key} already saved as point {point_id}")
+            return {"status": "duplicate", "point_id": point_id}
+
+        try:
+            async with self.download_slots:
+                image_bytes = await storage_service.download_image(job.file_name)
+        except FileNotFoundError:
+            # Deleted after a rejection (or by the user); retrying can't help
+            logger.warning(f"Image no longer exists, skipping: {job.file_name}")
+            return {"status": "missing", "file_name": job.file_name}
+        logger.info(f"Downloaded {len(image_bytes)} bytes: {job.file_name}")
+
+        is_valid, category, weight = await self._classify(job, image_bytes)
+
+        if not is_valid:
+            return await self._reject(job)
+        return await self._accept(job, category, weight)
+
+    async def _classify(self, job: UploadJob, image_bytes: bytes) -> Classification:
+        # Identical images (re-uploads, retries) reuse the stored result
+        image_hash = await hash_image(image_bytes)
+        async with self.db_slots:
+            result = await classification_cache.get(image_hash)
+        if result is not None:
+            logger.info(f"Classification cache hit: {image_hash}")
+            return result
+
+        # Downscale before the model call; bounded by the process pool size
+        image_bytes, mime_type = await image_preprocessor.prepare(
+            image_bytes, job.content_type
+        )
+
+        try:
+            async with self.classify_slots:
+                result = await classifier.analyze_image(image_bytes, mime_type)
+        except UnrecognizedResponseError as e:
+            # Rejected, but not cached: a re-upload gets a fresh verdict
+            logger.warning(f"No usable Gemini verdict, rejecting: {e}")
+            return (False, None, None)
+        is_valid, category, weight = result
+        logger.info(
+            f"Gemini result - Valid: {is_valid}, Category: {category}, Weight: {weight}"
+        )
+
+        async with self.db_slots:
+            await classification_cache.set(image_hash, result)
+        return result
+
+    async def _reject(self, job: UploadJob) -> dict:
+        logger.warning(f"Image rejected by Gemini: {job.file_name}")
+        deleted = await storage_service.delete_image_by_name(job.file_name)
+        logger.info(f"Rejected image deleted: {deleted}")
+
+        async with self.db_slots:
+            async with get_db() as db:
+                tokens = await get_user_device_tokens(db, job.user_id)
+
+        await self._notify(
+            job,
+            tokens,
+            send_image_rejected_notification,
+            reason="Image doesn't meet quality standards",
+        )
+
+        return {
+            "status": "rejected",
+            "file_name": job.file_name,
+            "message": "Image rejected by AI validation",
+        }
+
+    async def _accept(self, job: UploadJob, category: int, weight: float) -> dict:
+        async with self.db_slots:
+            async with get_db() as db:
+                # Create point and update user stats in a single statement
+                point_id = await create_point_with_user_update(
+                    db=db,
+                    user_id=job.user_id,
+                    image_url=job.image_url,
+                    latitude=job.latitude,
+                    longitude=job.longitude,
+                    weight=weight,
+                    category=category,
+                    upload_key=job.upload_key,
+                )
+                if point_id is not None:
+                    tokens = await get_user_device_tokens(db, job.user_id)
+
+        if point_id is None:
+            # Lost a race with another delivery of the same notification
+            return {"status": "duplicate", "file_name": job.file_name}
+        logger.info(f"Point created successfully - ID: {point_id}")
+
+        await self._notify(
+            job,
+            tokens,
+            send_image_accepted_notification,
+            category=category,
+            weight=weight,
+            points_earned=POINTS_PER_UPLOAD,
+        )
+
+        return {
+            "status": "success",
+            "point_id": point_id,
+            "category": category,
+            "weight": weight,
+            "user_id": job.user_id,
+        }
+
+    async def _notify(self, job: UploadJob, tokens: List[str], send, **kwargs) -> None:
+        if not tokens:
+            logger.info(f"No devices for user {job.user_id}, skipping notification")
+            return
+
+        async with self.notify_slots:
+            # Queued for the next FCM batch; the upload doesn't wait for delivery
+            logger.info(f"Queueing notification to user {job.user_id}")
+            await send(tokens=tokens, wait=False, **kwargs)
+
+
+# Singleton instance
+upload_pipeline = UploadPipeline()
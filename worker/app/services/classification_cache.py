@@ -0,0 +1,96 @@
+"""
+Two-tier cache of Gemini classification results keyed by image SHA-256.
+
+A bounded in-process LRU answers repeats seen by this worker; the
+classification_cache table shares results across workers and restarts.
+A hit returns (is_valid, category, weight) without calling the model.
+"""
+
+import asyncio
+import hashlib
+import logging
+from typing import Optional, Tuple
+
+from app.core.cache import BoundedCache
+from app.core.config import settings
+from app.db.crud import get_classification, save_classification
+from app.db.database import get_db
+
+logger = logging.getLogger(__name__)
+
+# (is_valid, category, weight) as returned by GeminiService.analyze_image
+Classification = Tuple[bool, Optional[int], Optional[float]]
+
+
+async def hash_image(image_bytes: bytes) -> str:
+    """
+    Get the cache key of an image.
+
+    Args:
+        image_bytes: Raw image bytes
+
+    Returns:
+        SHA-256 hex digest
+    """
+    # hashlib releases the GIL for large inputs, so hash multi-MB photos on a thread
+    digest = await asyncio.to_thread(hashlib.sha256, image_bytes)
+    return digest.hexdigest()
+
+
+class ClassificationCache:
+    """Local LRU in front of the classification_cache table."""
+
+    def __init__(self, max_entries: int = settings.classification_cache_size):
+        """
+        Args:
+            max_entries: Results kept in the local tier
+        """
+        self.local = BoundedCache(max_cost=max_entries)
+
+    async def get(self, image_hash: str) -> Optional[Classification]:
+        """
+        Look up a classification result.
+
+        Args:
+            image_hash: SHA-256 hex digest of the image bytes
+
+        Returns:
+            Cached result or None on a miss
+        """
+        result = self.local.get(image_hash)
+        if result is not None:
+            return result
+
+        async with get_db() as db:
+            row = await get_classification(db, image_hash)
+        if row is None:
+            return None
+
+        result = (row.is_valid, row.category, row.weight)
+        self.local.set(image_hash, result)
+        return result
+
+    async def set(self, image_hash: str, result: Classification) -> None:
+        """
+        Store a definite classification result in both tiers.
+
+        Only verdicts the model actually gave (NOT TRASH or a category) are
+        passed here; unparseable answers are never cached.
+
+        A failure to persist is logged and otherwise ignored; the result is
+        still returned to the caller and cached locally.
+
+        Args:
+            image_hash: SHA-256 hex digest of the image bytes
+            result: (is_valid, category, weight)
+        """
+        self.local.set(image_hash, result)
+        try:
+            async with get_db() as db:
+                await save_classification(db, image_hash, *result)
+        except Exception as e:
+            logger.warning(f"Failed to store classification for {image_hash}: {e}")
+
+
+# Singleton instance
+classification_cache = ClassificationCache()
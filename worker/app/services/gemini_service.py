@@ -1,8 +1,61 @@
-from typing import Optional, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple, Union
 
 from app.core.config import settings
 from google import genai
 from google.genai import types
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+# (is_valid, category, weight)
+Classification = Tuple[bool, Optional[int], Optional[float]]
+
+# An image to classify: (image_bytes, mime_type)
+ImageInput = Tuple[bytes, str]
+
+
+class UnrecognizedResponseError(Exception):
+    """Raised when the model's answer is neither NOT TRASH nor a category."""
+
+
+BATCH_PROMPT = """You will receive {count} images, each preceded by its label "Image N".
+Analyze each image independently and carefully:
+
+First, decide if it is a valid trash/waste image or NOT.
+Mark as NOT TRASH if the image is:
+- A selfie or portrait of a person
+- A meme, screenshot, or text-heavy image
+- An indoor scene
+- A random object not related to waste
+- Any inappropriate or irrelevant content
+
+If it IS a valid trash image, rate the trash density from 1-4:
+1 = Small/Light Trash: A few scattered items, minimal waste
+2 = Moderate Trash: Noticeable pile or bag, moderate amount
+3 = Heavy Trash: Large pile, multiple bags, visibly dense waste
+4 = Massive Trash: Huge dump site, overflowing bins, very large accumulation
+
+Return one result per image with its number, and category 0 for NOT TRASH."""
+
+
+def category_to_classification(category: int) -> Classification:
+    """
+    Map a density category (0 = not trash) to (is_valid, category, weight).
+
+    Raises:
+        UnrecognizedResponseError: If category is not 0-4
+    """
+    if category == 0:
+        return (False, None, None)
+    if category not in (1, 2, 3, 4):
+        raise UnrecognizedResponseError(f"Unexpected category: {category}")
+    # Convert category to weight (0.25, 0.5, 0.75, 1.0)
+    return (True, category, category / 4.0)
 
 
 class GeminiService:
@@ -13,13 +66,14 @@ class GeminiService:
         self.model_name = "gemini-2.5-flash"
 
     async def analyze_image(
-        self, image_bytes: bytes
+        self, image_bytes: bytes, mime_type: str = "image/jpeg"
     ) -> Tuple[bool, Optional[int], Optional[float]]:
         """
         Analyze an image to determine if it contains trash and its density.
 
         Args:
             image_bytes: Raw image bytes
+            mime_type: Image MIME type
 
         Returns:
             Tuple of (is_valid: bool, category: Optional[int], weight: Optional[float])
@@ -27,6 +81,7 @@ class GeminiService:
             - is_valid=False: Image is invalid (not trash), category and weight are None
 
         Raises:
+            UnrecognizedResponseError: If the answer can't be parsed
             Exception: If the API call fails
         """
         try:
@@ -55,11 +110,12 @@ OUTPUT ONLY ONE OF THE FOLLOWING:
 
 Output only the single word or number, nothing else."""
 
-            response = self.client.models.generate_content(
+            # Use the async client so the call doesn't block the event loop
+            response = await self.client.aio.models.generate_content(
                 model=self.model_name,
                 contents=[
                     prompt,
-                    types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg"),
+                    types.Part.from_bytes(data=image_bytes, mime_type=mime_type),
                 ],
             )
 
@@ -78,14 +134,214 @@ Output only the single word or number, nothing else."""
                     )  # Convert category to weight (0.25, 0.5, 0.75, 1.0)
                     return (True, category, weight)
 
-            # If no valid response, treat as invalid
-            print(f"Unexpected Gemini response: {result}")
-            return (False, None, None)
+            # No verdict; the caller decides what to do with the image
+            logger.warning(f"Unexpected Gemini response: {result}")
+            raise UnrecognizedResponseError(f"Unexpected Gemini response: {result}")
 
+        except UnrecognizedResponseError:
+            raise
         except Exception as e:
-            print(f"Gemini API error: {e}")
+            logger.exception(f"Gemini API error: {e}")
             raise Exception(f"Failed to analyze image: {str(e)}")
 
 
+class ImageResult(BaseModel):
+    """Structured model output for one image of a batch."""
+
+    image: int = Field(description="Image number, starting at 1")
+    category: int = Field(description="0 = NOT TRASH, 1-4 = trash density")
+
+
+class ClassifierBackend(ABC):
+    """Classifies several images with one model request."""
+
+    @abstractmethod
+    async def classify_batch(
+        self, images: List[ImageInput]
+    ) -> List[Union[Classification, UnrecognizedResponseError]]:
+        """
+        Classify images.
+
+        Args:
+            images: Images to classify
+
+        Returns:
+            One result per image, in the same order; an
+            UnrecognizedResponseError for an image without a usable answer
+        """
+
+
+class GeminiBatchBackend(ClassifierBackend):
+    """Sends all images of a batch in one multi-part request with a JSON schema."""
+
+    def __init__(self, service: GeminiService):
+        self.client = service.client
+        self.model_name = service.model_name
+
+    async def classify_batch(
+        self, images: List[ImageInput]
+    ) -> List[Union[Classification, UnrecognizedResponseError]]:
+        contents = [BATCH_PROMPT.format(count=len(images))]
+        for number, (image_bytes, mime_type) in enumerate(images, start=1):
+            contents.append(f"Image {number}")
+            contents.append(
+                types.Part.from_bytes(data=image_bytes, mime_type=mime_type)
+            )
+
+        response = await self.client.aio.models.generate_content(
+            model=self.model_name,
+            contents=contents,
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=list[ImageResult],
+            ),
+        )
+
+        results = response.parsed
+        if results is None:
+            results = [ImageResult(**item) for item in json.loads(response.text)]
+
+        categories = {result.image: result.category for result in results}
+        missing = [n for n in range(1, len(images) + 1) if n not in categories]
+        if missing:
+            raise Exception(f"Gemini returned no result for images {missing}")
+
+        classifications = []
+        for number in range(1, len(images) + 1):
+            try:
+                classifications.append(category_to_classification(categories[number]))
+            except UnrecognizedResponseError as e:
+                classifications.append(e)
+        return classifications
+
+
+class FakeClassifierBackend(ClassifierBackend):
+    """
+    Deterministic offline stand-in for Gemini.
+
+    The result depends only on the image bytes: SHA-256 first byte mod 5,
+    where 0 is NOT TRASH and 1-4 is the category. Batches are recorded in
+    calls.
+    """
+
+    def __init__(self):
+        self.calls: List[int] = []
+
+    async def classify_batch(self, images: List[ImageInput]) -> List[Classification]:
+        self.calls.append(len(images))
+        return [
+            category_to_classification(hashlib.sha256(image_bytes).digest()[0] % 5)
+            for image_bytes, _ in images
+        ]
+
+
+class BatchingClassifier:
+    """
+    Collects concurrent classification requests into batched model calls.
+
+    A batch is sent when it reaches max_batch_size or max_wait_seconds after
+    its first image arrived, whichever comes first. Each caller awaits only
+    its own result; if the batch request fails, every caller in it gets the
+    error.
+    """
+
+    def __init__(
+        self,
+        backend: ClassifierBackend,
+        max_batch_size: int = settings.gemini_batch_size,
+        max_wait_seconds: float = settings.gemini_batch_wait_seconds,
+    ):
+        """
+        Args:
+            backend: Model backend classifying a batch
+            max_batch_size: Max images per model request
+            max_wait_seconds: Max time an image waits for its batch to fill
+        """
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+
+        self._pending: List[Tuple[ImageInput, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def analyze_image(
+        self, image_bytes: bytes, mime_type: str = "image/jpeg"
+    ) -> Classification:
+        """
+        Classify an image as part of the next batch.
+
+        Same contract as GeminiService.analyze_image.
+
+        Args:
+            image_bytes: Raw image bytes
+            mime_type: Image MIME type
+
+        Returns:
+            Tuple of (is_valid, category, weight)
+
+        Raises:
+            UnrecognizedResponseError: If the model gave no usable answer
+            Exception: If the batch request fails
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(((image_bytes, mime_type), future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_seconds, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._classify(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _classify(self, batch: List[Tuple[ImageInput, asyncio.Future]]) -> None:
+        try:
+            results = await self.backend.classify_batch([image for image, _ in batch])
+            logger.info(f"Classified batch of {len(batch)} images")
+        except Exception as e:
+            logger.error(f"Batch classification failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(Exception(f"Failed to analyze image: {e}"))
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, UnrecognizedResponseError):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
 # Singleton instance
 gemini_service = GeminiService()
+
+
+def create_classifier():
+    """
+    Build the classifier used by the upload pipeline from settings.
+
+    GEMINI_BACKEND=fake classifies offline with FakeClassifierBackend;
+    GEMINI_BATCH_SIZE > 1 batches concurrent uploads into one request.
+    """
+    if settings.gemini_backend == "fake":
+        return BatchingClassifier(FakeClassifierBackend())
+    if settings.gemini_batch_size > 1:
+        return BatchingClassifier(GeminiBatchBackend(gemini_service))
+    return gemini_service
+
+
+classifier = create_classifier()
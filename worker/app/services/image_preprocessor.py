@@ -0,0 +1,116 @@
+"""
+Image preprocessing before Gemini classification.
+
+Phone photos are decoded, rotated upright from their EXIF orientation,
+downscaled to IMAGE_MAX_EDGE and re-encoded as JPEG. Decoding is CPU-bound,
+so it runs in a process pool instead of on the event loop.
+"""
+
+import asyncio
+import io
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple
+
+from app.core.config import settings
+from PIL import ExifTags, Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Pillow formats Gemini accepts as-is, with the MIME type to send them as.
+# MPO (multi-picture JPEG written by some phones) is a valid JPEG.
+PASSTHROUGH_MIME_TYPES = {
+    "JPEG": "image/jpeg",
+    "MPO": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp",
+}
+
+
+def preprocess_image(
+    image_bytes: bytes, max_edge: int, quality: int
+) -> Tuple[bytes, str]:
+    """
+    Make an upright image no larger than max_edge on its longest side.
+
+    Images that are already small enough, upright and in a format the model
+    accepts are returned unchanged; everything else is re-encoded as JPEG.
+
+    Args:
+        image_bytes: Raw image bytes
+        max_edge: Max width/height in pixels
+        quality: JPEG quality for re-encoded images
+
+    Returns:
+        Tuple of (image_bytes, mime_type)
+
+    Raises:
+        PIL.UnidentifiedImageError: If the bytes are not a supported image
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    mime_type = PASSTHROUGH_MIME_TYPES.get(image.format)
+
+    orientation = image.getexif().get(ExifTags.Base.Orientation, 1)
+    if mime_type and max(image.size) <= max_edge and orientation == 1:
+        return image_bytes, mime_type
+
+    # Let the JPEG decoder skip most of the pixels we'd throw away anyway
+    image.draft("RGB", (max_edge, max_edge))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+    output = io.BytesIO()
+    image.convert("RGB").save(output, format="JPEG", quality=quality)
+    return output.getvalue(), "image/jpeg"
+
+
+class ImagePreprocessor:
+    """Runs preprocess_image on a process pool."""
+
+    def __init__(self):
+        # spawn, not fork: the parent has GCS/gRPC threads running
+        self.executor = ProcessPoolExecutor(
+            max_workers=settings.preprocess_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    async def prepare(self, image_bytes: bytes, mime_type: str) -> Tuple[bytes, str]:
+        """
+        Downscale an image for classification.
+
+        Args:
+            image_bytes: Raw image bytes
+            mime_type: Content type reported by the upload, used if the image
+                can't be decoded
+
+        Returns:
+            Tuple of (image_bytes, mime_type) to send to the model
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            prepared, prepared_type = await loop.run_in_executor(
+                self.executor,
+                preprocess_image,
+                image_bytes,
+                settings.image_max_edge,
+                settings.image_jpeg_quality,
+            )
+        except Exception as e:
+            # Let the model judge images Pillow can't read
+            logger.warning(f"Image preprocessing failed, sending original: {e}")
+            return image_bytes, mime_type
+
+        logger.info(
+            f"Preprocessed image: {len(image_bytes)} -> {len(prepared)} bytes "
+            f"({prepared_type})"
+        )
+        return prepared, prepared_type
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Singleton instance
+image_preprocessor = ImagePreprocessor()
@@ -1,15 +1,58 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
 from app.core.config import settings
+from google.api_core.exceptions import NotFound
+from google.auth import default
+from google.auth.transport.requests import AuthorizedSession
 from google.cloud import storage
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
 
 
 class StorageService:
-    """Service for handling Google Cloud Storage operations in worker."""
+    """
+    Service for handling Google Cloud Storage operations in worker.
+
+    The google-cloud-storage client is synchronous, so every network call runs
+    on a bounded thread pool and never blocks the event loop. The client's
+    HTTP session keeps one pooled connection per worker thread.
+    """
 
     def __init__(self):
-        self.client = storage.Client()
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.storage_max_workers, thread_name_prefix="gcs"
+        )
+        credentials, project = default(scopes=storage.Client.SCOPE)
+
+        # Size the connection pool to the thread pool so connections are reused
+        session = AuthorizedSession(credentials)
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=settings.storage_max_workers
+        )
+        session.mount("https://", adapter)
+
+        self.client = storage.Client(
+            project=project, credentials=credentials, _http=session
+        )
         self.bucket = self.client.bucket(settings.gcs_bucket_name)
 
-    def download_image(self, file_name: str) -> bytes:
+    async def _run(self, func, *args, **kwargs):
+        """Run a blocking GCS call on the storage thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs)
+        )
+
+    def close(self) -> None:
+        """Release the thread pool and HTTP connections."""
+        self.executor.shutdown(wait=False)
+        self.client.close()
+
+    async def download_image(self, file_name: str) -> bytes:
         """
         Download an image from GCS by filename.
 
@@ -20,15 +63,16 @@ class StorageService:
             Image bytes
 
         Raises:
+            FileNotFoundError: If the image doesn't exist
             Exception: If download fails
         """
         try:
             blob = self.bucket.blob(file_name)
-            if not blob.exists():
-                raise Exception(f"File not found: {file_name}")
-            return blob.download_as_bytes()
+            return await self._run(blob.download_as_bytes)
+        except NotFound:
+            raise FileNotFoundError(f"File not found: {file_name}")
         except Exception as e:
-            print(f"GCS download error: {e}")
+            logger.error(f"GCS download error: {e}")
             raise Exception(f"Failed to download image: {str(e)}")
 
     async def delete_image_by_name(self, file_name: str) -> bool:
@@ -42,13 +86,12 @@ class StorageService:
             True if deleted successfully, False otherwise
         """
         try:
-            blob = self.bucket.blob(file_name)
-            if blob.exists():
-                blob.delete()
-                return True
+            await self._run(self.bucket.blob(file_name).delete)
+            return True
+        except NotFound:
             return False
         except Exception as e:
-            print(f"GCS delete error: {e}")
+            logger.error(f"GCS delete error: {e}")
             return False
 
 
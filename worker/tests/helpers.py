@@ -0,0 +1,57 @@
+"""
+Helpers shared by worker tests: a throwaway service account key and a
+fresh PostGIS schema.
+
+Nothing here imports the app at module level, so conftest can use it
+before settings are configured.
+"""
+
+import json
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+
+def service_account_info() -> str:
+    """Service account key file contents (JSON) for a throwaway key."""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_key = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    return json.dumps(
+        {
+            "type": "service_account",
+            "project_id": "test-project",
+            "private_key_id": "test-key",
+            "private_key": private_key.decode(),
+            "client_email": "test@test-project.iam.gserviceaccount.com",
+            "client_id": "1",
+            "token_uri": "https://oauth2.googleapis.com/token",
+        }
+    )
+
+
+async def create_schema(url: str):
+    """
+    Recreate the app's tables in an empty PostGIS database.
+
+    Args:
+        url: Database URL (postgresql+asyncpg://...)
+
+    Returns:
+        AsyncEngine without connection pooling (safe across event loops)
+    """
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    from app.db.models import Base
+
+    engine = create_async_engine(url, poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS postgis"))
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    return engine
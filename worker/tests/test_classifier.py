@@ -0,0 +1,198 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.gemini_service import (
+    BatchingClassifier,
+    ClassifierBackend,
+    FakeClassifierBackend,
+    GeminiBatchBackend,
+    GeminiService,
+    UnrecognizedResponseError,
+    category_to_classification,
+)
+
+
+def images(count: int):
+    return [f"image-{i}".encode() for i in range(count)]
+
+
+async def classify_all(classifier, payloads):
+    return await asyncio.gather(
+        *(classifier.analyze_image(payload) for payload in payloads),
+        return_exceptions=True,
+    )
+
+
+class ScriptedBackend(ClassifierBackend):
+    """Returns the scripted result for each image, or raises a batch error."""
+
+    def __init__(self, results=None, error=None):
+        self.results = results or {}
+        self.error = error
+
+    async def classify_batch(self, images):
+        if self.error is not None:
+            raise self.error
+        return [self.results[image_bytes] for image_bytes, _ in images]
+
+
+def test_full_batches_are_sent_without_waiting():
+    async def run():
+        backend = FakeClassifierBackend()
+        classifier = BatchingClassifier(backend, max_batch_size=4, max_wait_seconds=60)
+        await asyncio.wait_for(classify_all(classifier, images(8)), 5)
+        return backend
+
+    assert asyncio.run(run()).calls == [4, 4]
+
+
+def test_partial_batch_is_sent_after_max_wait():
+    async def run():
+        backend = FakeClassifierBackend()
+        classifier = BatchingClassifier(
+            backend, max_batch_size=10, max_wait_seconds=0.05
+        )
+        return backend, await classify_all(classifier, images(3))
+
+    backend, results = asyncio.run(run())
+
+    assert backend.calls == [3]
+    assert len(results) == 3
+
+
+def test_batched_results_match_single_image_results():
+    payloads = images(20)
+
+    async def run():
+        batched = BatchingClassifier(
+            FakeClassifierBackend(), max_batch_size=8, max_wait_seconds=0.01
+        )
+        single = BatchingClassifier(
+            FakeClassifierBackend(), max_batch_size=1, max_wait_seconds=0.01
+        )
+        return (
+            await classify_all(batched, payloads),
+            [await single.analyze_image(payload) for payload in payloads],
+        )
+
+    batched, single = asyncio.run(run())
+
+    assert batched == single
+    assert {result[0] for result in batched} == {True, False}
+
+
+def test_batch_error_reaches_every_caller():
+    async def run():
+        classifier = BatchingClassifier(
+            ScriptedBackend(error=RuntimeError("quota exceeded")),
+            max_batch_size=3,
+            max_wait_seconds=0.01,
+        )
+        return await classify_all(classifier, images(3))
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, Exception) for result in results)
+    assert all("quota exceeded" in str(result) for result in results)
+
+
+def test_unrecognized_answer_fails_only_its_image():
+    payloads = images(3)
+    results = {
+        payloads[0]: (True, 2, 0.5),
+        payloads[1]: UnrecognizedResponseError("Unexpected category: 9"),
+        payloads[2]: (False, None, None),
+    }
+
+    async def run():
+        classifier = BatchingClassifier(
+            ScriptedBackend(results), max_batch_size=3, max_wait_seconds=0.01
+        )
+        return await classify_all(classifier, payloads)
+
+    first, second, third = asyncio.run(run())
+
+    assert first == (True, 2, 0.5)
+    assert isinstance(second, UnrecognizedResponseError)
+    assert third == (False, None, None)
+
+
+def test_category_to_classification():
+    assert category_to_classification(0) == (False, None, None)
+    assert category_to_classification(3) == (True, 3, 0.75)
+    with pytest.raises(UnrecognizedResponseError):
+        category_to_classification(5)
+
+
+def gemini_backend(answer):
+    """GeminiBatchBackend whose client returns answer as the JSON response text."""
+
+    async def generate_content(**kwargs):
+        return SimpleNamespace(parsed=None, text=json.dumps(answer))
+
+    client = SimpleNamespace(
+        aio=SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))
+    )
+    return GeminiBatchBackend(SimpleNamespace(client=client, model_name="test"))
+
+
+def test_gemini_batch_answers_are_matched_by_image_number():
+    backend = gemini_backend(
+        [
+            {"image": 2, "category": 0},
+            {"image": 1, "category": 4},
+            {"image": 3, "category": 7},
+        ]
+    )
+
+    results = asyncio.run(
+        backend.classify_batch([(payload, "image/jpeg") for payload in images(3)])
+    )
+
+    assert results[0] == (True, 4, 1.0)
+    assert results[1] == (False, None, None)
+    assert isinstance(results[2], UnrecognizedResponseError)
+
+
+def test_gemini_batch_with_missing_answer_fails():
+    backend = gemini_backend([{"image": 1, "category": 1}])
+
+    with pytest.raises(Exception, match="no result for images \\[2\\]"):
+        asyncio.run(
+            backend.classify_batch([(payload, "image/jpeg") for payload in images(2)])
+        )
+
+
+def gemini_service(generate_content) -> GeminiService:
+    """GeminiService whose client calls generate_content instead of the API."""
+    service = GeminiService.__new__(GeminiService)
+    service.model_name = "test"
+    service.client = SimpleNamespace(
+        aio=SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))
+    )
+    return service
+
+
+def test_gemini_unexpected_answer_is_logged_and_raised(caplog):
+    async def generate_content(**kwargs):
+        return SimpleNamespace(text="maybe?")
+
+    with pytest.raises(UnrecognizedResponseError):
+        asyncio.run(gemini_service(generate_content).analyze_image(b"image"))
+
+    assert "Unexpected Gemini response: MAYBE?" in caplog.text
+
+
+def test_gemini_api_error_is_logged_with_traceback(caplog):
+    async def generate_content(**kwargs):
+        raise ConnectionError("quota exceeded")
+
+    with pytest.raises(Exception, match="Failed to analyze image: quota exceeded"):
+        asyncio.run(gemini_service(generate_content).analyze_image(b"image"))
+
+    (record,) = [r for r in caplog.records if "Gemini API error" in r.message]
+    assert record.levelname == "ERROR"
+    assert record.exc_info is not None
@@ -0,0 +1,180 @@
+import asyncio
+import json
+import time
+
+from app.consumer import InMemoryBroker, PullConsumer
+from app.pipeline import UploadInProgressError
+
+
+def notification(name: str) -> bytes:
+    return json.dumps(
+        {
+            "name": name,
+            "bucket": "test-bucket",
+            "generation": "1",
+            "metadata": {"user_id": "1", "latitude": "40.5", "longitude": "-74.0"},
+        }
+    ).encode()
+
+
+class FakePipeline:
+    """Records processed jobs; failures maps file names to errors raised in turn."""
+
+    def __init__(self, delay: float = 0.0, **failures):
+        self.delay = delay
+        self.failures = failures
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+
+    async def process(self, job):
+        self.calls.append((job.file_name, time.monotonic()))
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            errors = self.failures.get(job.file_name)
+            if errors:
+                raise errors.pop(0)
+            return {"status": "processed"}
+        finally:
+            self.running -= 1
+
+
+async def consume_until(consumer, done, timeout: float = 5.0) -> None:
+    """Run the consumer until done() holds, then stop it and wait for it."""
+    task = asyncio.create_task(consumer.run())
+    give_up_at = time.monotonic() + timeout
+    while not done() and time.monotonic() < give_up_at:
+        await asyncio.sleep(0.01)
+    consumer.stop()
+    await asyncio.wait_for(task, timeout)
+
+
+def test_processed_messages_are_acked():
+    async def run():
+        broker = InMemoryBroker()
+        pipeline = FakePipeline()
+        for i in range(10):
+            broker.publish(notification(f"uploads/{i}.jpg"))
+        consumer = PullConsumer(broker, pipeline, max_messages=4, pull_timeout=0.1)
+        await consume_until(consumer, lambda: len(broker.acked) == 10)
+        return broker, pipeline
+
+    broker, pipeline = asyncio.run(run())
+
+    assert sorted(name for name, _ in pipeline.calls) == sorted(
+        f"uploads/{i}.jpg" for i in range(10)
+    )
+    assert len(broker.acked) == 10
+
+
+def test_malformed_messages_are_dropped():
+    payloads = [b"not json", b"[]", b'"x"', json.dumps({"name": "a.jpg"}).encode()]
+
+    async def run():
+        broker = InMemoryBroker()
+        pipeline = FakePipeline()
+        for payload in payloads:
+            broker.publish(payload)
+        consumer = PullConsumer(broker, pipeline, pull_timeout=0.1)
+        await consume_until(consumer, lambda: len(broker.acked) == len(payloads))
+        return broker, pipeline
+
+    broker, pipeline = asyncio.run(run())
+
+    assert len(broker.acked) == len(payloads)
+    assert pipeline.calls == []
+
+
+def test_failed_message_is_redelivered_after_backoff():
+    async def run():
+        broker = InMemoryBroker()
+        pipeline = FakePipeline(**{"a.jpg": [RuntimeError("db down")]})
+        broker.publish(notification("a.jpg"))
+        consumer = PullConsumer(
+            broker, pipeline, pull_timeout=0.1, retry_base_seconds=1
+        )
+        await consume_until(consumer, lambda: broker.acked)
+        return broker, pipeline
+
+    broker, pipeline = asyncio.run(run())
+
+    (_, first), (_, second) = pipeline.calls
+    assert second - first >= 0.9
+    assert broker.acked[0].delivery_attempt == 2
+
+
+def test_upload_in_progress_is_not_redelivered_immediately():
+    async def run():
+        broker = InMemoryBroker()
+        pipeline = FakePipeline(**{"a.jpg": [UploadInProgressError("a.jpg")] * 10})
+        broker.publish(notification("a.jpg"))
+        consumer = PullConsumer(
+            broker, pipeline, pull_timeout=0.1, retry_base_seconds=5
+        )
+        await consume_until(consumer, lambda: False, timeout=1.5)
+        return broker, pipeline
+
+    broker, pipeline = asyncio.run(run())
+
+    assert len(pipeline.calls) == 1
+    assert broker.acked == []
+
+
+def test_lease_is_extended_while_processing():
+    async def run():
+        broker = InMemoryBroker(ack_deadline_seconds=1)
+        pipeline = FakePipeline(delay=2.0)
+        broker.publish(notification("slow.jpg"))
+        consumer = PullConsumer(broker, pipeline, lease_seconds=1, pull_timeout=0.1)
+        await consume_until(consumer, lambda: broker.acked)
+        return broker, pipeline
+
+    broker, pipeline = asyncio.run(run())
+
+    assert len(pipeline.calls) == 1
+    assert broker.acked[0].delivery_attempt == 1
+
+
+def test_max_in_flight_is_respected():
+    async def run():
+        broker = InMemoryBroker()
+        pipeline = FakePipeline(delay=0.05)
+        for i in range(12):
+            broker.publish(notification(f"{i}.jpg"))
+        consumer = PullConsumer(broker, pipeline, max_in_flight=3, pull_timeout=0.1)
+        await consume_until(consumer, lambda: len(broker.acked) == 12)
+        return broker, pipeline
+
+    broker, pipeline = asyncio.run(run())
+
+    assert len(broker.acked) == 12
+    assert pipeline.max_running == 3
+
+
+def test_stop_interrupts_pending_pull():
+    async def run():
+        consumer = PullConsumer(InMemoryBroker(), FakePipeline(), pull_timeout=30)
+        task = asyncio.create_task(consumer.run())
+        await asyncio.sleep(0.1)
+        started = time.monotonic()
+        consumer.stop()
+        await asyncio.wait_for(task, 5)
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) < 1
+
+
+def test_stop_finishes_messages_in_flight():
+    async def run():
+        broker = InMemoryBroker()
+        pipeline = FakePipeline(delay=0.3)
+        broker.publish(notification("a.jpg"))
+        consumer = PullConsumer(broker, pipeline, pull_timeout=0.1)
+        await consume_until(consumer, lambda: pipeline.calls)
+        return broker
+
+    broker = asyncio.run(run())
+
+    assert len(broker.acked) == 1
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.crud import POINTS_PER_UPLOAD, create_point_with_user_update
+from app.db.models import Point, User
+from tests.helpers import create_schema
+
+
+async def save_upload(engine, user_id: int, upload_key: str):
+    # One session (and connection) per upload, as in concurrent workers
+    async with AsyncSession(engine) as db:
+        return await create_point_with_user_update(
+            db=db,
+            user_id=user_id,
+            image_url=f"https://storage.googleapis.com/test-bucket/{upload_key}",
+            latitude=40.5,
+            longitude=-74.0,
+            weight=0.5,
+            category=2,
+            upload_key=upload_key,
+        )
+
+
+@pytest.mark.postgis
+def test_counters_stay_exact_under_concurrent_uploads(postgis_url):
+    uploads = 50
+    deliveries = 3  # Every upload is delivered several times at once
+
+    async def run():
+        engine = await create_schema(postgis_url)
+        try:
+            async with engine.begin() as conn:
+                user_id = (
+                    await conn.execute(
+                        insert(User)
+                        .values(email="user@example.com", name="User")
+                        .returning(User.id)
+                    )
+                ).scalar_one()
+
+            point_ids = await asyncio.gather(
+                *(
+                    save_upload(engine, user_id, f"uploads/{i}.jpg#1")
+                    for i in range(uploads)
+                    for _ in range(deliveries)
+                )
+            )
+
+            async with AsyncSession(engine) as db:
+                user = await db.get(User, user_id)
+                point_count = await db.scalar(select(func.count(Point.id)))
+            return point_ids, user, point_count
+        finally:
+            await engine.dispose()
+
+    point_ids, user, point_count = asyncio.run(run())
+
+    created = [point_id for point_id in point_ids if point_id is not None]
+    assert len(created) == len(set(created)) == uploads
+    assert point_count == uploads
+    assert user.total_uploads == uploads
+    assert user.total_points == uploads * POINTS_PER_UPLOAD
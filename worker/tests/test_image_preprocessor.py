@@ -0,0 +1,132 @@
+import asyncio
+import io
+import random
+
+import pytest
+from PIL import ExifTags, Image, UnidentifiedImageError
+
+from app.services.image_preprocessor import ImagePreprocessor, preprocess_image
+
+MAX_EDGE = 1024
+QUALITY = 85
+
+
+def encode(image: Image.Image, format: str, orientation: int = 1, **params) -> bytes:
+    output = io.BytesIO()
+    if orientation != 1:
+        exif = Image.Exif()
+        exif[ExifTags.Base.Orientation] = orientation
+        params["exif"] = exif
+    image.save(output, format=format, **params)
+    return output.getvalue()
+
+
+def photo(width: int, height: int) -> Image.Image:
+    """Noisy RGB image, so JPEG quality visibly affects the encoded size."""
+    noise = random.Random(0).randbytes(width * height * 3)
+    return Image.frombytes("RGB", (width, height), noise)
+
+
+def decode(image_bytes: bytes) -> Image.Image:
+    return Image.open(io.BytesIO(image_bytes))
+
+
+def test_exif_rotated_photo_is_turned_upright_and_downscaled():
+    original = encode(photo(4000, 3000), "JPEG", orientation=6)
+
+    prepared, mime_type = preprocess_image(original, MAX_EDGE, QUALITY)
+
+    image = decode(prepared)
+    assert mime_type == "image/jpeg"
+    assert image.format == "JPEG"
+    assert image.size == (768, 1024)
+    assert image.getexif().get(ExifTags.Base.Orientation, 1) == 1
+
+
+def test_small_rotated_photo_is_re_encoded_upright():
+    original = encode(photo(200, 100), "JPEG", orientation=6)
+
+    prepared, _ = preprocess_image(original, MAX_EDGE, QUALITY)
+
+    assert decode(prepared).size == (100, 200)
+
+
+def test_large_image_is_downscaled_to_max_edge():
+    original = encode(photo(3000, 1500), "PNG")
+
+    prepared, mime_type = preprocess_image(original, MAX_EDGE, QUALITY)
+
+    assert mime_type == "image/jpeg"
+    assert decode(prepared).size == (1024, 512)
+
+
+@pytest.mark.parametrize(
+    "format, mime_type",
+    [("JPEG", "image/jpeg"), ("PNG", "image/png"), ("WEBP", "image/webp")],
+)
+def test_small_upright_image_passes_through(format, mime_type):
+    original = encode(photo(800, 600), format)
+
+    prepared, prepared_type = preprocess_image(original, MAX_EDGE, QUALITY)
+
+    assert prepared == original
+    assert prepared_type == mime_type
+
+
+def test_small_mpo_passes_through_as_jpeg():
+    frames = [photo(400, 300), photo(400, 300)]
+    original = encode(frames[0], "MPO", save_all=True, append_images=frames[1:])
+    assert decode(original).format == "MPO"
+
+    prepared, mime_type = preprocess_image(original, MAX_EDGE, QUALITY)
+
+    assert prepared == original
+    assert mime_type == "image/jpeg"
+
+
+def test_large_mpo_is_re_encoded_as_single_jpeg():
+    frames = [photo(2048, 1536), photo(2048, 1536)]
+    original = encode(frames[0], "MPO", save_all=True, append_images=frames[1:])
+
+    prepared, mime_type = preprocess_image(original, MAX_EDGE, QUALITY)
+
+    image = decode(prepared)
+    assert mime_type == "image/jpeg"
+    assert image.format == "JPEG"
+    assert image.size == (1024, 768)
+    assert getattr(image, "n_frames", 1) == 1
+
+
+def test_unsupported_format_is_re_encoded_as_jpeg():
+    frames = [photo(100, 100).convert("P") for _ in range(3)]
+    original = encode(frames[0], "GIF", save_all=True, append_images=frames[1:])
+
+    prepared, mime_type = preprocess_image(original, MAX_EDGE, QUALITY)
+
+    assert mime_type == "image/jpeg"
+    assert decode(prepared).format == "JPEG"
+    assert decode(prepared).size == (100, 100)
+
+
+def test_re_encode_uses_requested_quality():
+    original = encode(photo(2000, 2000), "PNG")
+
+    low, _ = preprocess_image(original, MAX_EDGE, quality=30)
+    high, _ = preprocess_image(original, MAX_EDGE, quality=95)
+
+    assert len(low) < len(high)
+
+
+def test_unreadable_bytes_are_rejected():
+    with pytest.raises(UnidentifiedImageError):
+        preprocess_image(b"not an image", MAX_EDGE, QUALITY)
+
+
+def test_prepare_sends_unreadable_images_unchanged():
+    preprocessor = ImagePreprocessor()
+    try:
+        prepared = asyncio.run(preprocessor.prepare(b"not an image", "image/heic"))
+    finally:
+        preprocessor.close()
+
+    assert prepared == (b"not an image", "image/heic")
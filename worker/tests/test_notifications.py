@@ -0,0 +1,145 @@
+import asyncio
+
+from firebase_admin import messaging
+
+from app.services import fcm_service
+from app.services.fcm_service import FakeFcmTransport, NotificationDispatcher
+
+
+def message(token: str) -> messaging.Message:
+    return messaging.Message(data={"type": "test"}, token=token)
+
+
+class RecordingPruner:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, tokens):
+        self.calls.append(sorted(tokens))
+        return len(tokens)
+
+
+def dispatcher(transport, **kwargs) -> NotificationDispatcher:
+    kwargs.setdefault("max_wait_seconds", 0.01)
+    return NotificationDispatcher(transport=transport, **kwargs)
+
+
+def test_messages_are_sent_in_batches_of_max_size():
+    transport = FakeFcmTransport()
+
+    async def run():
+        notifications = dispatcher(transport, max_batch_size=500, max_wait_seconds=1)
+        futures = [notifications.enqueue(message(f"t{i}")) for i in range(1201)]
+        results = await asyncio.wait_for(asyncio.gather(*futures), 5)
+        await notifications.close()
+        return results
+
+    results = asyncio.run(run())
+
+    assert sorted(len(batch) for batch in transport.batches) == [201, 500, 500]
+    assert [result.token for result in results] == [f"t{i}" for i in range(1201)]
+    assert all(result.success for result in results)
+
+
+def test_each_caller_gets_its_own_result():
+    transport = FakeFcmTransport(unregistered={"dead"})
+
+    async def run():
+        notifications = dispatcher(transport)
+        futures = [notifications.enqueue(message(token)) for token in ("a", "dead")]
+        results = await asyncio.gather(*futures)
+        await notifications.close()
+        return results
+
+    alive, dead = asyncio.run(run())
+
+    assert alive.success and alive.message_id
+    assert not dead.success
+    assert isinstance(dead.error, messaging.UnregisteredError)
+
+
+def test_dead_tokens_are_pruned_in_bulk():
+    transport = FakeFcmTransport(unregistered={"dead1", "dead2"})
+    pruner = RecordingPruner()
+
+    async def run():
+        notifications = dispatcher(
+            transport, prune_tokens=pruner, prune_interval_seconds=0.05
+        )
+        await asyncio.gather(
+            *(notifications.enqueue(message(t)) for t in ("a", "dead1", "dead2"))
+        )
+        # Until pruned, dead tokens are skipped without an FCM call
+        skipped = await notifications.enqueue(message("dead1"))
+        await asyncio.sleep(0.2)
+        await notifications.close()
+        return notifications, skipped
+
+    notifications, skipped = asyncio.run(run())
+
+    assert pruner.calls == [["dead1", "dead2"]]
+    assert not skipped.success
+    assert sum(len(batch) for batch in transport.batches) == 3
+    assert notifications.dead_tokens == set()
+
+
+def test_transport_failure_fails_the_batch():
+    def broken_transport(messages):
+        raise ConnectionError("FCM unavailable")
+
+    async def run():
+        notifications = dispatcher(broken_transport)
+        results = await asyncio.gather(
+            *(notifications.enqueue(message(t)) for t in ("a", "b"))
+        )
+        await notifications.close()
+        return results
+
+    results = asyncio.run(run())
+
+    assert not any(result.success for result in results)
+    assert all(isinstance(result.error, ConnectionError) for result in results)
+
+
+def test_close_flushes_queued_messages_and_prunes():
+    transport = FakeFcmTransport(unregistered={"dead"})
+    pruner = RecordingPruner()
+
+    async def run():
+        notifications = dispatcher(
+            transport,
+            prune_tokens=pruner,
+            max_wait_seconds=60,
+            prune_interval_seconds=60,
+        )
+        futures = [notifications.enqueue(message(t)) for t in ("a", "b", "dead")]
+        await asyncio.wait_for(notifications.close(), 5)
+        return futures
+
+    futures = asyncio.run(run())
+
+    assert all(future.done() for future in futures)
+    assert pruner.calls == [["dead"]]
+
+
+def test_send_notification_multicasts_to_every_device(monkeypatch):
+    transport = FakeFcmTransport(unregistered={"dead"})
+
+    async def run():
+        notifications = dispatcher(transport)
+        monkeypatch.setattr(fcm_service, "notification_dispatcher", notifications)
+        delivered = await fcm_service.send_image_accepted_notification(
+            ["phone", "tablet", "dead"], category=2, weight=0.5
+        )
+        nobody = await fcm_service.send_notification(["dead"], "Title", "Body")
+        await notifications.close()
+        return delivered, nobody
+
+    delivered, nobody = asyncio.run(run())
+
+    sent = [message for batch in transport.batches for message in batch]
+    assert delivered
+    assert not nobody
+    assert sorted(message.token for message in sent) == ["dead", "phone", "tablet"]
+    assert all(message.data["type"] == "image_accepted" for message in sent)
+    assert all(message.android.priority == "high" for message in sent)
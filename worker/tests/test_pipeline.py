@@ -0,0 +1,186 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app import pipeline as pipeline_module
+from app.pipeline import UploadInProgressError, UploadJob, UploadPipeline
+
+
+def job(name: str = "uploads/a.jpg", generation: str = "1") -> UploadJob:
+    return UploadJob(
+        file_name=name,
+        bucket_name="test-bucket",
+        user_id=1,
+        latitude=40.5,
+        longitude=-74.0,
+        content_type="image/jpeg",
+        upload_key=f"{name}#{generation}",
+    )
+
+
+class FakeStorage:
+    def __init__(self, delay: float = 0.0, missing=()):
+        self.delay = delay
+        self.missing = set(missing)
+        self.downloads = []
+
+    async def download_image(self, file_name):
+        self.downloads.append(file_name)
+        await asyncio.sleep(self.delay)
+        if file_name in self.missing:
+            raise FileNotFoundError(file_name)
+        return file_name.encode()
+
+    async def delete_image_by_name(self, file_name):
+        return True
+
+
+class FakeDatabase:
+    """Points keyed by upload_key, shared by every "instance" of the worker."""
+
+    def __init__(self):
+        self.points = {}
+
+    async def get_point_id_by_upload_key(self, db, upload_key):
+        return self.points.get(upload_key)
+
+    async def create_point_with_user_update(self, db, upload_key, **kwargs):
+        # ON CONFLICT (upload_key) DO NOTHING
+        if upload_key in self.points:
+            return None
+        self.points[upload_key] = len(self.points) + 1
+        return self.points[upload_key]
+
+
+class FakeClassificationCache:
+    async def get(self, image_hash):
+        return None
+
+    async def set(self, image_hash, result):
+        pass
+
+
+class AlwaysTrash:
+    async def analyze_image(self, image_bytes, mime_type="image/jpeg"):
+        return (True, 2, 0.5)
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    storage = FakeStorage()
+    monkeypatch.setattr(pipeline_module, "storage_service", storage)
+    return storage
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase()
+
+    @asynccontextmanager
+    async def get_db():
+        yield None
+
+    async def no_devices(db, user_id):
+        return []
+
+    async def passthrough(image_bytes, content_type):
+        return image_bytes, content_type
+
+    monkeypatch.setattr(pipeline_module, "get_db", get_db)
+    monkeypatch.setattr(
+        pipeline_module,
+        "get_point_id_by_upload_key",
+        database.get_point_id_by_upload_key,
+    )
+    monkeypatch.setattr(
+        pipeline_module,
+        "create_point_with_user_update",
+        database.create_point_with_user_update,
+    )
+    monkeypatch.setattr(pipeline_module, "get_user_device_tokens", no_devices)
+    monkeypatch.setattr(
+        pipeline_module, "classification_cache", FakeClassificationCache()
+    )
+    monkeypatch.setattr(pipeline_module.image_preprocessor, "prepare", passthrough)
+    monkeypatch.setattr(pipeline_module, "classifier", AlwaysTrash())
+    return database
+
+
+def test_redelivered_upload_is_answered_from_memory(storage, database):
+    pipeline = UploadPipeline()
+
+    async def run():
+        return await pipeline.process(job()), await pipeline.process(job())
+
+    first, second = asyncio.run(run())
+
+    assert first["status"] == "success"
+    assert second["status"] == "duplicate"
+    assert second["point_id"] == first["point_id"]
+    assert storage.downloads == ["uploads/a.jpg"]
+
+
+def test_concurrent_delivery_of_same_upload_is_deferred(storage, database):
+    storage.delay = 0.1
+    pipeline = UploadPipeline()
+
+    async def run():
+        first = asyncio.create_task(pipeline.process(job()))
+        await asyncio.sleep(0.01)
+        with pytest.raises(UploadInProgressError):
+            await pipeline.process(job())
+        return await first
+
+    assert asyncio.run(run())["status"] == "success"
+    assert storage.downloads == ["uploads/a.jpg"]
+    assert len(database.points) == 1
+
+
+def test_upload_saved_by_another_instance_is_a_duplicate(storage, database):
+    database.points[job().upload_key] = 42
+
+    result = asyncio.run(UploadPipeline().process(job()))
+
+    assert result == {"status": "duplicate", "point_id": 42}
+    assert storage.downloads == []
+
+
+def test_lost_insert_race_is_a_duplicate(storage, database):
+    # Two instances pass the existence check; only one insert wins
+    storage.delay = 0.05
+    instances = [UploadPipeline(), UploadPipeline()]
+
+    async def run():
+        return await asyncio.gather(
+            *(instance.process(job()) for instance in instances)
+        )
+
+    statuses = sorted(result["status"] for result in asyncio.run(run()))
+
+    assert statuses == ["duplicate", "success"]
+    assert len(database.points) == 1
+
+
+def test_new_generation_of_same_file_is_processed(storage, database):
+    pipeline = UploadPipeline()
+
+    async def run():
+        return (
+            await pipeline.process(job(generation="1")),
+            await pipeline.process(job(generation="2")),
+        )
+
+    first, second = asyncio.run(run())
+
+    assert first["status"] == second["status"] == "success"
+    assert first["point_id"] != second["point_id"]
+
+
+def test_missing_image_is_skipped(storage, database):
+    storage.missing.add("uploads/a.jpg")
+
+    result = asyncio.run(UploadPipeline().process(job()))
+
+    assert result["status"] == "missing"
+    assert database.points == {}